@@ -0,0 +1,300 @@
+"""
+Admin routes: restaurants, sales analytics, background jobs, health and sample data
+"""
+
+from flask import Blueprint, request, jsonify, g
+from werkzeug.security import generate_password_hash
+from datetime import datetime
+import uuid
+from cache import cached
+import analytics
+import menu_sync
+from core import (
+    app, mongo, tenants, cache, job_queue, contact_buffer, order_spool, breakers, admin_required,
+    error_response
+)
+from startup import startup_profile
+from tenants import ensure_restaurant_indexes
+
+bp = Blueprint('admin', __name__, url_prefix='/api')
+
+# Restaurant Routes
+@bp.route('/admin/restaurants/<restaurant_id>', methods=['PUT'])
+@admin_required
+def save_restaurant(current_user, restaurant_id):
+    try:
+        # Only head-office admins (not tied to a restaurant) manage locations
+        if current_user.get('restaurant_id'):
+            return jsonify({'message': 'Admin access required!'}), 403
+        
+        data = request.get_json()
+        
+        if 'name' not in data:
+            return jsonify({'error': 'name is required'}), 400
+        
+        restaurant = {
+            'name': data['name'],
+            'hosts': [host.lower() for host in data.get('hosts', [])],
+            'database': data.get('database'),
+            'mongo_uri': data.get('mongo_uri')
+        }
+        
+        mongo.db.restaurants.update_one({'_id': restaurant_id}, {'$set': restaurant}, upsert=True)
+        # Other worker processes pick the change up on their next registry refresh
+        tenants.reload()
+        
+        # A dedicated database starts without any of the restaurant indexes
+        if restaurant['database']:
+            ensure_restaurant_indexes(tenants.database(restaurant_id))
+        
+        return jsonify({'message': 'Restaurant saved successfully'}), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+# Analytics Routes
+@bp.route('/analytics/top-items', methods=['GET'])
+@admin_required
+@cached(cache, tags=['analytics'], query_args=('days', 'limit', 'by'))
+def get_top_items(current_user):
+    try:
+        days = request.args.get('days', 30, type=int)
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        by = request.args.get('by', 'quantity')
+        
+        if by not in ('quantity', 'revenue'):
+            return jsonify({'error': 'by must be quantity or revenue'}), 400
+        
+        return jsonify(analytics.top_items(g.tenant.db, g.tenant.id, days, limit, by)), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/analytics/category-revenue', methods=['GET'])
+@admin_required
+@cached(cache, tags=['analytics'], query_args=('days',))
+def get_category_revenue(current_user):
+    try:
+        days = request.args.get('days', 30, type=int)
+        return jsonify(analytics.category_revenue(g.tenant.db, g.tenant.id, days)), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/analytics/heatmap', methods=['GET'])
+@admin_required
+@cached(cache, tags=['analytics'], query_args=('days',))
+def get_sales_heatmap(current_user):
+    try:
+        days = request.args.get('days', 28, type=int)
+        return jsonify(analytics.sales_heatmap(
+            g.tenant.db, g.tenant.id, days, app.config['ANALYTICS_TIMEZONE']
+        )), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+# Background Job Routes
+@bp.route('/admin/jobs', methods=['GET'])
+@admin_required
+def get_job_stats(current_user):
+    try:
+        return jsonify(job_queue.stats()), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/admin/jobs/dead/<job_id>/retry', methods=['POST'])
+@admin_required
+def retry_dead_job(current_user, job_id):
+    try:
+        if job_queue.retry_dead(job_id):
+            return jsonify({'message': 'Job re-queued successfully'}), 200
+        else:
+            return jsonify({'error': 'Job not found'}), 404
+            
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/admin/write-behind', methods=['GET'])
+@admin_required
+def get_write_behind_stats(current_user):
+    try:
+        return jsonify(dict(contact_buffer.stats, mode=contact_buffer.mode)), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/admin/archive', methods=['POST'])
+@admin_required
+def run_archive(current_user):
+    try:
+        job_id = job_queue.enqueue('archive_history', {'restaurant_id': g.tenant.id})
+        return jsonify({'message': 'Archival job queued', 'job_id': job_id}), 202
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/admin/analytics/rollup', methods=['POST'])
+@admin_required
+def run_sales_rollup(current_user):
+    try:
+        data = request.get_json(silent=True) or {}
+        job_id = job_queue.enqueue('sales_rollup', {
+            'restaurant_id': g.tenant.id,
+            'rebuild': bool(data.get('rebuild'))
+        })
+        return jsonify({'message': 'Sales rollup job queued', 'job_id': job_id}), 202
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/admin/cache', methods=['GET'])
+@admin_required
+def get_cache_stats(current_user):
+    try:
+        return jsonify(cache.stats), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/admin/health', methods=['GET'])
+@admin_required
+def get_database_health(current_user):
+    try:
+        return jsonify({
+            'breakers': {
+                name: dict(breaker.stats, state=breaker.state, retry_after=breaker.retry_after())
+                for name, breaker in breakers.items()
+            },
+            'order_spool': dict(order_spool.stats, pending=order_spool.pending()),
+            'stale_responses': cache.stats['stale']
+        }), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/admin/startup', methods=['GET'])
+@admin_required
+def get_startup_profile(current_user):
+    try:
+        return jsonify(startup_profile.report()), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+# Initialize sample data
+@bp.route('/init-data', methods=['POST'])
+def init_sample_data():
+    try:
+        # Create admin user
+        admin_id = str(uuid.uuid4())
+        admin_user = {
+            '_id': admin_id,
+            'name': 'Admin User',
+            'email': 'admin@savory.com',
+            'password': generate_password_hash('savory@admin'),
+            'phone': '+1234567890',
+            'role': 'admin',
+            'created_at': datetime.utcnow()
+        }
+        
+        # Create sample customer
+        customer_id = str(uuid.uuid4())
+        customer_user = {
+            '_id': customer_id,
+            'name': 'User',
+            'email': 'user@savory.com',
+            'password': generate_password_hash('savory@user'),
+            'phone': '+1234567891',
+            'role': 'customer',
+            'created_at': datetime.utcnow()
+        }
+        
+        # Insert users if they don't exist
+        for user in (admin_user, customer_user):
+            mongo.db.users.update_one({'email': user['email']}, {'$setOnInsert': user}, upsert=True)
+        
+        # Sample menu items
+        sample_menu_items = [
+            {
+                '_id': str(uuid.uuid4()),
+                'name': 'Grilled Salmon',
+                'category': 'main-course',
+                'description': 'Fresh Atlantic salmon grilled to perfection with herbs and lemon',
+                'price': 24.99,
+                'image': 'https://images.pexels.com/photos/1516415/pexels-photo-1516415.jpeg?auto=compress&cs=tinysrgb&w=600',
+                'available': True,
+                'popular': True,
+                'created_at': datetime.utcnow()
+            },
+            {
+                '_id': str(uuid.uuid4()),
+                'name': 'Caesar Salad',
+                'category': 'starters',
+                'description': 'Crisp romaine lettuce with parmesan cheese and our signature dressing',
+                'price': 12.99,
+                'image': 'https://images.pexels.com/photos/2097090/pexels-photo-2097090.jpeg?auto=compress&cs=tinysrgb&w=600',
+                'available': True,
+                'popular': True,
+                'created_at': datetime.utcnow()
+            },
+            {
+                '_id': str(uuid.uuid4()),
+                'name': 'Beef Steak',
+                'category': 'main-course',
+                'description': 'Premium beef steak cooked to your liking with roasted vegetables',
+                'price': 32.99,
+                'image': 'https://images.pexels.com/photos/769289/pexels-photo-769289.jpeg?auto=compress&cs=tinysrgb&w=600',
+                'available': True,
+                'popular': True,
+                'created_at': datetime.utcnow()
+            },
+            {
+                '_id': str(uuid.uuid4()),
+                'name': 'Chocolate Cake',
+                'category': 'desserts',
+                'description': 'Rich chocolate cake with layers of creamy frosting',
+                'price': 8.99,
+                'image': 'https://images.pexels.com/photos/291528/pexels-photo-291528.jpeg?auto=compress&cs=tinysrgb&w=600',
+                'available': True,
+                'popular': False,
+                'created_at': datetime.utcnow()
+            },
+            {
+                '_id': str(uuid.uuid4()),
+                'name': 'Fresh Orange Juice',
+                'category': 'beverages',
+                'description': 'Freshly squeezed orange juice',
+                'price': 4.99,
+                'image': 'https://images.pexels.com/photos/96974/pexels-photo-96974.jpeg?auto=compress&cs=tinysrgb&w=600',
+                'available': True,
+                'popular': False,
+                'created_at': datetime.utcnow()
+            },
+            {
+                '_id': str(uuid.uuid4()),
+                'name': 'Chicken Wings',
+                'category': 'starters',
+                'description': 'Spicy buffalo wings served with blue cheese dip',
+                'price': 14.99,
+                'image': 'https://images.pexels.com/photos/60616/fried-chicken-chicken-fried-crunchy-60616.jpeg?auto=compress&cs=tinysrgb&w=600',
+                'available': True,
+                'popular': True,
+                'created_at': datetime.utcnow()
+            }
+        ]
+        
+        for item in sample_menu_items:
+            item['restaurant_id'] = g.tenant.id
+        
+        # Insert menu items if this restaurant has none yet
+        if g.tenant.db.menu_items.count_documents({'restaurant_id': g.tenant.id}) == 0:
+            g.tenant.db.menu_items.insert_many(sample_menu_items)
+            menu_sync.record_change(g.tenant.db, g.tenant.id, [item['_id'] for item in sample_menu_items])
+            cache.invalidate('menu')
+        
+        return jsonify({'message': 'Sample data initialized successfully'}), 201
+        
+    except Exception as e:
+        return error_response(e)
@@ -0,0 +1,328 @@
+"""
+Sales analytics rollups
+
+Order line items are rolled up into per-item hourly (`sales_hourly`) and daily
+(`sales_daily`) sales counts and revenue by a background job. Each run only
+aggregates the orders placed (or cancelled) since the previous run and folds
+them into the existing buckets with `$merge`, so analytics queries read small
+rollup collections and never scan raw orders.
+
+An order counts towards the hour it was placed in unless it has been
+cancelled; cancelling an order that was already rolled up subtracts it again.
+Each restaurant has its own watermark and buckets.
+
+Windows are at most ROLLUP_SLICE long, and a run stops starting new ones
+after ROLLUP_BUDGET seconds, so the first run (or a rebuild) works through
+the order history over as many runs as it takes instead of pushing all of
+it through one merge. The watermark is saved after every window.
+
+A run claims its window as in progress and only moves the watermark once every
+merge has finished. A run that fails part way (job timeout, failover) leaves
+the window claimed; once the claim's lease runs out the next run resumes it.
+Each bucket remembers the last merge that changed it, so a merge that is
+repeated after failing half way only adds to the buckets it had not reached.
+"""
+
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+EPOCH = datetime(1970, 1, 1)
+
+# Orders newer than this are left for the next run, so writes still in flight
+# when a run starts are not skipped
+ROLLUP_LAG = 60
+
+UNITS = ['hour', 'day']
+
+# A claimed window not finished within this long is presumed abandoned; longer
+# than JOB_TIMEOUT_SECONDS, after which a run's database operations are aborted
+ROLLUP_LEASE = 300
+
+# Longest window one set of merges covers, and how long a run keeps starting
+# new windows; a window must finish well within JOB_TIMEOUT_SECONDS
+ROLLUP_SLICE = timedelta(days=1)
+ROLLUP_BUDGET = 30
+
+
+def ensure_indexes(db):
+    db.orders.create_index([('restaurant_id', ASCENDING), ('order_date', ASCENDING)])
+    db.orders.create_index([('restaurant_id', ASCENDING), ('status', ASCENDING), ('status_updated_at', ASCENDING)])
+    db.sales_hourly.create_index([('restaurant_id', ASCENDING), ('hour', ASCENDING)])
+    db.sales_daily.create_index([('restaurant_id', ASCENDING), ('day', DESCENDING)])
+
+
+def _bucket(unit):
+    # $dateFromParts rather than $dateTrunc so older servers can run it too
+    parts = {
+        'year': {'$year': '$order_date'},
+        'month': {'$month': '$order_date'},
+        'day': {'$dayOfMonth': '$order_date'}
+    }
+    if unit == 'hour':
+        parts['hour'] = {'$hour': '$order_date'}
+    return {'$dateFromParts': parts}
+
+
+def rollup_pipeline(query, unit, part, sign=1):
+    """Aggregate matching orders into `sales_<unit>` buckets; sign=-1 subtracts them
+
+    `part` names this merge; buckets it already changed are left alone if it runs again.
+    """
+    into = 'sales_hourly' if unit == 'hour' else 'sales_daily'
+    applied = {'$eq': ['$rollup_part', '$$new.rollup_part']}
+    return [
+        {'$match': query},
+        {'$unwind': '$items'},
+        {'$group': {
+            '_id': {'restaurant_id': '$restaurant_id', 'item_id': '$items.id', unit: _bucket(unit)},
+            'name': {'$last': '$items.name'},
+            'quantity': {'$sum': {'$multiply': ['$items.quantity', sign]}},
+            'revenue': {'$sum': {'$multiply': ['$items.price', '$items.quantity', sign]}},
+            'orders': {'$sum': sign}
+        }},
+        {'$lookup': {
+            'from': 'menu_items',
+            'localField': '_id.item_id',
+            'foreignField': '_id',
+            'as': 'menu_item'
+        }},
+        {'$project': {
+            'restaurant_id': '$_id.restaurant_id',
+            'item_id': '$_id.item_id',
+            unit: f'$_id.{unit}',
+            'name': 1,
+            'category': {'$ifNull': [{'$arrayElemAt': ['$menu_item.category', 0]}, 'uncategorized']},
+            'quantity': 1,
+            'revenue': 1,
+            'orders': 1,
+            'rollup_part': {'$literal': part}
+        }},
+        {'$merge': {
+            'into': into,
+            'on': '_id',
+            'whenMatched': [{'$set': {
+                'quantity': {'$cond': [applied, '$quantity', {'$add': ['$quantity', '$$new.quantity']}]},
+                'revenue': {'$cond': [applied, '$revenue', {'$add': ['$revenue', '$$new.revenue']}]},
+                'orders': {'$cond': [applied, '$orders', {'$add': ['$orders', '$$new.orders']}]},
+                'name': '$$new.name',
+                'category': '$$new.category',
+                'rollup_part': '$$new.rollup_part'
+            }}],
+            'whenNotMatched': 'insert'
+        }}
+    ]
+
+
+def _oldest_order_date(db, restaurant_id):
+    dates = [
+        doc['order_date']
+        for source in (db.orders, db.orders_archive)
+        for doc in source.find({'restaurant_id': restaurant_id}, {'order_date': 1}).sort('order_date', 1).limit(1)
+    ]
+    return min(dates) if dates else None
+
+
+def _claim_window(db, state_id, restaurant_id, lag, lease, span):
+    """Claim the next window, or take over one whose run was abandoned; returns (since, window) or None"""
+    now = datetime.utcnow()
+    state = db.analytics_state.find_one({'_id': state_id})
+    if state is None:
+        try:
+            db.analytics_state.insert_one({'_id': state_id, 'watermark': EPOCH})
+        except DuplicateKeyError:
+            pass  # created by a concurrent run
+        state = db.analytics_state.find_one({'_id': state_id})
+
+    window = state.get('window')
+    owner = uuid.uuid4().hex
+    if window is None:
+        latest = now - timedelta(seconds=lag)
+        # Stored dates keep milliseconds; a resumed run must see the same window
+        latest = latest.replace(microsecond=latest.microsecond // 1000 * 1000)
+        since = state['watermark']
+        if latest <= since:
+            return None
+        # The first window starts at the oldest order rather than at EPOCH
+        start = since if since != EPOCH else _oldest_order_date(db, restaurant_id) or latest
+        until = min(latest, start + span)
+        query = {'_id': state_id, 'watermark': since, 'window': {'$exists': False}}
+        window = {
+            'id': uuid.uuid4().hex,
+            'until': until,
+            'done': [],
+            'owner': owner,
+            'claimed_at': now,
+            # Until the rollups catch up, history may already have been archived
+            'backfill': since == EPOCH or state.get('backfill', False),
+            'caught_up': until == latest
+        }
+    elif window['claimed_at'] > now - timedelta(seconds=lease):
+        return None  # another run is still working on it
+    else:
+        query = {'_id': state_id, 'window.owner': window['owner']}
+        window = dict(window, owner=owner, claimed_at=now)
+
+    if not db.analytics_state.update_one(query, {'$set': {'window': window}}).modified_count:
+        return None
+    return state['watermark'], window
+
+
+def rollup_sales(db, restaurant_id, lag=ROLLUP_LAG, lease=ROLLUP_LEASE, span=ROLLUP_SLICE, budget=ROLLUP_BUDGET):
+    """Fold a restaurant's orders placed or cancelled since the last run into the rollups.
+
+    Works through windows of at most `span` until it has caught up or has run
+    for `budget` seconds. Returns the (since, until) span that was processed,
+    or None if another run is processing it or there is nothing new yet.
+    """
+    started = time.monotonic()
+    processed = None
+    while time.monotonic() - started < budget:
+        window = _rollup_window(db, restaurant_id, lag, lease, span)
+        if window is None:
+            break
+        since, until, caught_up = window
+        processed = (processed[0] if processed else since, until)
+        if caught_up:
+            break
+    return processed
+
+
+def _rollup_window(db, restaurant_id, lag, lease, span):
+    state_id = f'sales_rollup:{restaurant_id}'
+    claimed = _claim_window(db, state_id, restaurant_id, lag, lease, span)
+    if claimed is None:
+        return None
+    since, window = claimed
+    until = window['until']
+    caught_up = window.get('caught_up', True)
+    mine = {'_id': state_id, 'window.owner': window['owner']}
+
+    # Everything placed in the window that was not already cancelled by its end
+    placed = {
+        'restaurant_id': restaurant_id,
+        'order_date': {'$gt': since, '$lte': until},
+        '$or': [{'status': {'$ne': 'cancelled'}}, {'status_updated_at': {'$gt': until}}]
+    }
+    # Orders counted by an earlier run and cancelled during this window
+    cancelled = {
+        'restaurant_id': restaurant_id,
+        'status': 'cancelled',
+        'status_updated_at': {'$gt': since, '$lte': until},
+        'order_date': {'$lte': since}
+    }
+
+    # While catching up, also pick up history that has already been archived
+    sources = [db.orders, db.orders_archive] if window.get('backfill', since == EPOCH) else [db.orders]
+
+    merges = []
+    for unit in UNITS:
+        for source in sources:
+            merges.append((source, placed, unit, 1))
+            if since != EPOCH:
+                merges.append((source, cancelled, unit, -1))
+
+    for source, query, unit, sign in merges:
+        part = f"{window['id']}:{unit}:{source.name}:{'add' if sign > 0 else 'subtract'}"
+        if part in window['done']:
+            continue
+        source.aggregate(rollup_pipeline(query, unit, part, sign))
+        if not db.analytics_state.update_one(mine, {'$push': {'window.done': part}}).modified_count:
+            return None  # our lease ran out and another run took the window over
+
+    finished = db.analytics_state.update_one(
+        mine,
+        {
+            '$set': {
+                'watermark': until,
+                'backfill': bool(window.get('backfill')) and not caught_up,
+                'updated_at': datetime.utcnow()
+            },
+            '$unset': {'window': ''}
+        }
+    ).modified_count
+    return (since, until, caught_up) if finished else None
+
+
+def rebuild_sales(db, restaurant_id):
+    """Drop a restaurant's rollups and aggregate all of its order history from scratch
+
+    Runs that follow carry on where this one's budget ran out.
+    """
+    db.analytics_state.delete_one({'_id': f'sales_rollup:{restaurant_id}'})
+    db.sales_hourly.delete_many({'restaurant_id': restaurant_id})
+    db.sales_daily.delete_many({'restaurant_id': restaurant_id})
+    return rollup_sales(db, restaurant_id)
+
+
+def _days_ago(days):
+    # Whole days, so the oldest daily bucket in range is not dropped
+    start = datetime.utcnow() - timedelta(days=days)
+    return start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _round_revenue(rows):
+    for row in rows:
+        row['revenue'] = round(row['revenue'], 2)
+    return rows
+
+
+def top_items(db, restaurant_id, days=30, limit=10, by='quantity'):
+    """Best sellers over the last `days` days, ranked by quantity or revenue"""
+    return _round_revenue(list(db.sales_daily.aggregate([
+        {'$match': {'restaurant_id': restaurant_id, 'day': {'$gte': _days_ago(days)}}},
+        {'$group': {
+            '_id': '$item_id',
+            'name': {'$last': '$name'},
+            'category': {'$last': '$category'},
+            'quantity': {'$sum': '$quantity'},
+            'revenue': {'$sum': '$revenue'}
+        }},
+        {'$match': {'quantity': {'$gt': 0}}},
+        {'$sort': {by: -1, '_id': 1}},
+        {'$limit': limit}
+    ])))
+
+
+def category_revenue(db, restaurant_id, days=30):
+    return _round_revenue(list(db.sales_daily.aggregate([
+        {'$match': {'restaurant_id': restaurant_id, 'day': {'$gte': _days_ago(days)}}},
+        {'$group': {
+            '_id': '$category',
+            'quantity': {'$sum': '$quantity'},
+            'revenue': {'$sum': '$revenue'}
+        }},
+        {'$match': {'quantity': {'$gt': 0}}},
+        {'$sort': {'revenue': -1}}
+    ])))
+
+
+def sales_heatmap(db, restaurant_id, days=28, timezone='UTC'):
+    """Quantity and revenue by weekday (1 = Sunday) and hour of day in `timezone`"""
+    rows = db.sales_hourly.aggregate([
+        {'$match': {'restaurant_id': restaurant_id, 'hour': {'$gte': _days_ago(days)}}},
+        {'$group': {
+            '_id': {
+                'weekday': {'$dayOfWeek': {'date': '$hour', 'timezone': timezone}},
+                'hour': {'$hour': {'date': '$hour', 'timezone': timezone}}
+            },
+            'quantity': {'$sum': '$quantity'},
+            'revenue': {'$sum': '$revenue'}
+        }}
+    ])
+    return _round_revenue([
+        {
+            'weekday': row['_id']['weekday'],
+            'hour': row['_id']['hour'],
+            'quantity': row['quantity'],
+            'revenue': row['revenue']
+        }
+        for row in rows
+    ])
+
+
+def popular_item_ids(db, restaurant_id, days=30, limit=6):
+    return [row['_id'] for row in top_items(db, restaurant_id, days, limit)]
@@ -1,70 +1,26 @@
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for
-from flask_pymongo import PyMongo
-from werkzeug.security import generate_password_hash, check_password_hash
-import jwt
-from datetime import datetime, timedelta
-import uuid
-from functools import wraps
+from core import app, tenants, cache, BOOTSTRAP_SECTIONS, error_response, resolve_user
+from flask import request, jsonify, render_template, send_from_directory, g
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
 import os
-from flask_cors import CORS
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
-app.config['MONGO_URI'] = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/restaurant_db')
-
-# Initialize MongoDB
-mongo = PyMongo(app)
-CORS(app)
-
-# Authentication decorator
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
-        
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]
-        
-        if not token:
-            return jsonify({'message': 'Token is missing!'}), 401
-        
-        try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = mongo.db.users.find_one({'_id': data['user_id']})
-        except:
-            return jsonify({'message': 'Token is invalid!'}), 401
-        
-        return f(current_user, *args, **kwargs)
-    return decorated
-
-# Admin required decorator
-def admin_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
-        
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]
-        
-        if not token:
-            return jsonify({'message': 'Token is missing!'}), 401
-        
-        try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = mongo.db.users.find_one({'_id': data['user_id']})
-            
-            if current_user['role'] != 'admin':
-                return jsonify({'message': 'Admin access required!'}), 403
-                
-        except:
-            return jsonify({'message': 'Token is invalid!'}), 401
-        
-        return f(current_user, *args, **kwargs)
-    return decorated
+from resilience import CircuitOpenError, is_unavailable
+from startup import startup_profile, print_report
+
+# API blueprints and the modules defining them; only those listed in BLUEPRINTS
+# are imported, so a worker pool serving part of the API loads only that part
+BLUEPRINT_MODULES = {
+    'auth': 'auth_views',
+    'menu': 'menu_views',
+    'orders': 'order_views',
+    'reservations': 'reservation_views',
+    'contact': 'contact_views',
+    'admin': 'admin_views',
+    'v2': 'v2_views'
+}
+
+for name in app.config['BLUEPRINTS']:
+    app.register_blueprint(import_module(BLUEPRINT_MODULES[name]).bp)
+    startup_profile.mark(f'blueprint:{name}')
 
 # HTML Routes
 @app.route('/')
@@ -113,588 +69,113 @@ def admin_menu():
 
 @app.route('/admin/orders')
 def admin_orders():
-    return render_template('admin/orders.html')
+    from kitchen import ORDER_TRANSITIONS
+    # The status form only offers the moves the state machine allows
+    return render_template('admin/orders.html', order_transitions=ORDER_TRANSITIONS)
 
 @app.route('/admin/reservations')
 def admin_reservations():
     return render_template('admin/reservations.html')
 
-# API Routes
+# Service worker must be served from the site root to control every page
+@app.route('/sw.js')
+def service_worker():
+    response = send_from_directory(app.static_folder, 'sw.js', mimetype='application/javascript')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Uploaded media (content-hashed, so safe to cache forever)
+@app.route('/media/menu/<path:filename>')
+def media_file(filename):
+    response = send_from_directory(
+        os.path.join(app.config['UPLOAD_FOLDER'], 'menu'),
+        filename,
+        max_age=app.config['MEDIA_CACHE_MAX_AGE']
+    )
+    response.headers['Cache-Control'] = f"public, max-age={app.config['MEDIA_CACHE_MAX_AGE']}, immutable"
+    return response
 
-# Authentication Routes
-@app.route('/api/register', methods=['POST'])
-def register():
-    try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['name', 'email', 'password']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} is required'}), 400
-        
-        # Check if user already exists
-        existing_user = mongo.db.users.find_one({'email': data['email']})
-        if existing_user:
-            return jsonify({'error': 'User already exists'}), 400
-        
-        # Create new user
-        user_id = str(uuid.uuid4())
-        hashed_password = generate_password_hash(data['password'])
-        
-        new_user = {
-            '_id': user_id,
-            'name': data['name'],
-            'email': data['email'],
-            'password': hashed_password,
-            'phone': data.get('phone', ''),
-            'role': 'customer',
-            'created_at': datetime.utcnow()
-        }
-        
-        mongo.db.users.insert_one(new_user)
-        
-        # Generate token
-        token = jwt.encode({
-            'user_id': user_id,
-            'exp': datetime.utcnow() + timedelta(hours=24)
-        }, app.config['SECRET_KEY'], algorithm='HS256')
-        
-        return jsonify({
-            'message': 'Registration successful',
-            'token': token,
-            'user': {
-                'id': user_id,
-                'name': data['name'],
-                'email': data['email'],
-                'role': 'customer'
-            }
-        }), 201
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/login', methods=['POST'])
-def login():
-    try:
-        data = request.get_json()
-        
-        if not data.get('email') or not data.get('password'):
-            return jsonify({'error': 'Email and password are required'}), 400
-        
-        user = mongo.db.users.find_one({'email': data['email']})
-        
-        if user and check_password_hash(user['password'], data['password']):
-            token = jwt.encode({
-                'user_id': user['_id'],
-                'exp': datetime.utcnow() + timedelta(hours=24)
-            }, app.config['SECRET_KEY'], algorithm='HS256')
-            
-            return jsonify({
-                'message': 'Login successful',
-                'token': token,
-                'user': {
-                    'id': user['_id'],
-                    'name': user['name'],
-                    'email': user['email'],
-                    'role': user['role']
-                }
-            }), 200
-        else:
-            return jsonify({'error': 'Invalid credentials'}), 401
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-# Menu Routes
-@app.route('/api/menu', methods=['GET'])
-def get_menu():
-    try:
-        category = request.args.get('category')
-        search = request.args.get('search')
-        
-        query = {'available': True}
-        
-        if category and category != 'all':
-            query['category'] = category
-            
-        if search:
-            query['$or'] = [
-                {'name': {'$regex': search, '$options': 'i'}},
-                {'description': {'$regex': search, '$options': 'i'}}
-            ]
-        
-        menu_items = list(mongo.db.menu_items.find(query))
-        
-        # Convert ObjectId to string for JSON serialization
-        for item in menu_items:
-            item['_id'] = str(item['_id'])
-        
-        return jsonify(menu_items), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/menu/popular', methods=['GET'])
-def get_popular_menu():
-    try:
-        popular_items = list(mongo.db.menu_items.find({'popular': True, 'available': True}).limit(6))
-        
-        for item in popular_items:
-            item['_id'] = str(item['_id'])
-        
-        return jsonify(popular_items), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/menu', methods=['POST'])
-@admin_required
-def add_menu_item(current_user):
-    try:
-        data = request.get_json()
-        
-        required_fields = ['name', 'category', 'description', 'price']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} is required'}), 400
-        
-        menu_item_id = str(uuid.uuid4())
-        new_item = {
-            '_id': menu_item_id,
-            'name': data['name'],
-            'category': data['category'],
-            'description': data['description'],
-            'price': float(data['price']),
-            'image': data.get('image', ''),
-            'available': data.get('available', True),
-            'popular': data.get('popular', False),
-            'created_at': datetime.utcnow()
-        }
-        
-        mongo.db.menu_items.insert_one(new_item)
-        new_item['_id'] = str(new_item['_id'])
-        
-        return jsonify(new_item), 201
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/menu/<item_id>', methods=['PUT'])
-@admin_required
-def update_menu_item(current_user, item_id):
-    try:
-        data = request.get_json()
-        
-        update_data = {
-            'name': data['name'],
-            'category': data['category'],
-            'description': data['description'],
-            'price': float(data['price']),
-            'image': data.get('image', ''),
-            'available': data.get('available', True),
-            'popular': data.get('popular', False)
-        }
-        
-        result = mongo.db.menu_items.update_one(
-            {'_id': item_id},
-            {'$set': update_data}
-        )
-        
-        if result.modified_count:
-            return jsonify({'message': 'Menu item updated successfully'}), 200
-        else:
-            return jsonify({'error': 'Menu item not found'}), 404
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/menu/<item_id>', methods=['DELETE'])
-@admin_required
-def delete_menu_item(current_user, item_id):
-    try:
-        result = mongo.db.menu_items.delete_one({'_id': item_id})
-        
-        if result.deleted_count:
-            return jsonify({'message': 'Menu item deleted successfully'}), 200
-        else:
-            return jsonify({'error': 'Menu item not found'}), 404
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-# Order Routes
-@app.route('/api/orders', methods=['POST'])
-@token_required
-def create_order(current_user):
-    try:
-        data = request.get_json()
-        
-        required_fields = ['items', 'total', 'delivery_address']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} is required'}), 400
-        
-        order_id = str(uuid.uuid4())
-        new_order = {
-            '_id': order_id,
-            'user_id': current_user['_id'],
-            'items': data['items'],
-            'total': float(data['total']),
-            'delivery_address': data['delivery_address'],
-            'notes': data.get('notes', ''),
-            'status': 'pending',
-            'order_date': datetime.utcnow()
-        }
-        
-        mongo.db.orders.insert_one(new_order)
-        new_order['_id'] = str(new_order['_id'])
-        
-        return jsonify(new_order), 201
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/orders', methods=['GET'])
-@token_required
-def get_orders(current_user):
-    try:
-        if current_user['role'] == 'admin':
-            # Admin can see all orders
-            orders = list(mongo.db.orders.find().sort('order_date', -1))
-            
-            # Populate user information for admin
-            for order in orders:
-                user = mongo.db.users.find_one({'_id': order['user_id']})
-                order['user'] = {
-                    'name': user['name'],
-                    'email': user['email'],
-                    'phone': user.get('phone', '')
-                } if user else None
-        else:
-            # Regular users can only see their own orders
-            orders = list(mongo.db.orders.find({'user_id': current_user['_id']}).sort('order_date', -1))
-        
-        for order in orders:
-            order['_id'] = str(order['_id'])
-        
-        return jsonify(orders), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/orders/<order_id>/status', methods=['PUT'])
-@admin_required
-def update_order_status(current_user, order_id):
-    try:
-        data = request.get_json()
-        
-        if 'status' not in data:
-            return jsonify({'error': 'Status is required'}), 400
-        
-        result = mongo.db.orders.update_one(
-            {'_id': order_id},
-            {'$set': {'status': data['status']}}
-        )
-        
-        if result.modified_count:
-            return jsonify({'message': 'Order status updated successfully'}), 200
-        else:
-            return jsonify({'error': 'Order not found'}), 404
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-# Reservation Routes
-@app.route('/api/reservations', methods=['POST'])
-@token_required
-def create_reservation(current_user):
-    try:
-        data = request.get_json()
-        
-        required_fields = ['date', 'time', 'guests']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} is required'}), 400
-        
-        reservation_id = str(uuid.uuid4())
-        new_reservation = {
-            '_id': reservation_id,
-            'user_id': current_user['_id'],
-            'date': data['date'],
-            'time': data['time'],
-            'guests': int(data['guests']),
-            'notes': data.get('notes', ''),
-            'status': 'pending',
-            'created_at': datetime.utcnow()
-        }
-        
-        mongo.db.reservations.insert_one(new_reservation)
-        new_reservation['_id'] = str(new_reservation['_id'])
-        
-        return jsonify(new_reservation), 201
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/reservations', methods=['GET'])
-@token_required
-def get_reservations(current_user):
-    try:
-        if current_user['role'] == 'admin':
-            reservations = list(mongo.db.reservations.find().sort('created_at', -1))
-            
-            # Populate user information for admin
-            for reservation in reservations:
-                user = mongo.db.users.find_one({'_id': reservation['user_id']})
-                reservation['user'] = {
-                    'name': user['name'],
-                    'email': user['email'],
-                    'phone': user.get('phone', '')
-                } if user else None
-        else:
-            reservations = list(mongo.db.reservations.find({'user_id': current_user['_id']}).sort('created_at', -1))
-        
-        for reservation in reservations:
-            reservation['_id'] = str(reservation['_id'])
-        
-        return jsonify(reservations), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/reservations/<reservation_id>/status', methods=['PUT'])
-@admin_required
-def update_reservation_status(current_user, reservation_id):
-    try:
-        data = request.get_json()
-        
-        if 'status' not in data:
-            return jsonify({'error': 'Status is required'}), 400
-        
-        result = mongo.db.reservations.update_one(
-            {'_id': reservation_id},
-            {'$set': {'status': data['status']}}
-        )
-        
-        if result.modified_count:
-            return jsonify({'message': 'Reservation status updated successfully'}), 200
-        else:
-            return jsonify({'error': 'Reservation not found'}), 404
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@app.route('/api/change-password', methods=['PUT'])
-@token_required
-def change_password(current_user):
-    try:
-        data = request.get_json()
-        
-        current_password = data.get('currentPassword')
-        new_password = data.get('newPassword')
-        
-        if not current_password or not new_password:
-            return jsonify({'error': 'Current and new passwords are required'}), 400
-        
-        # Verify current password
-        if not check_password_hash(current_user['password'], current_password):
-            return jsonify({'error': 'Current password is incorrect'}), 401
-        
-        # Hash and update new password
-        hashed_new_password = generate_password_hash(new_password)
-        mongo.db.users.update_one(
-            {'_id': current_user['_id']},
-            {'$set': {'password': hashed_new_password}}
-        )
-        
-        return jsonify({'message': 'Password changed successfully'}), 200
-
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-# Profile Routes
-@app.route('/api/profile', methods=['GET'])
-@token_required
-def get_profile(current_user):
-    try:
-        user_data = {
-            'id': current_user['_id'],
-            'name': current_user['name'],
-            'email': current_user['email'],
-            'phone': current_user.get('phone', ''),
-            'role': current_user['role']
-        }
-        
-        return jsonify(user_data), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+# API Routes
 
-@app.route('/api/profile', methods=['PUT'])
-@token_required
-def update_profile(current_user):
+# Restaurant Routes
+@app.route('/api/restaurants', methods=['GET'])
+def get_restaurants():
     try:
-        data = request.get_json()
-        
-        update_data = {}
-        if 'name' in data:
-            update_data['name'] = data['name']
-        if 'phone' in data:
-            update_data['phone'] = data['phone']
-        
-        if update_data:
-            mongo.db.users.update_one(
-                {'_id': current_user['_id']},
-                {'$set': update_data}
+        restaurants = [
+            {'id': restaurant_id, 'name': doc.get('name', restaurant_id)}
+            for restaurant_id, doc in tenants.restaurants().items()
+        ]
+        return jsonify({'current': g.tenant.id, 'restaurants': restaurants}), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+# Bootstrap Route
+# Sections are registered by the blueprints that own their data (core.BOOTSTRAP_SECTIONS)
+bootstrap_executor = ThreadPoolExecutor(max_workers=app.config['BOOTSTRAP_WORKERS'])
+
+def load_bootstrap_section(name, tenant, user, degraded=False):
+    # Runs on a pool thread, so the restaurant is passed in rather than read from g
+    loader, needs_auth, tags = BOOTSTRAP_SECTIONS[name]
+    
+    def load():
+        if degraded:
+            raise CircuitOpenError('Database is unavailable')
+        return loader(tenant, user)
+    
+    if tags is None:
+        return load(), False
+    
+    key = f"bootstrap:{name}:{user['_id'] if user and needs_auth else ''}"
+    return cache.fetch(key, load, tags(user), scope=tenant.id)
+
+@app.route('/api/bootstrap', methods=['GET'])
+def bootstrap():
+    try:
+        include = [name for name in request.args.get('include', '').split(',') if name]
+        
+        unknown = [name for name in include if name not in BOOTSTRAP_SECTIONS]
+        if unknown:
+            return jsonify({'error': f"Unknown sections: {', '.join(unknown)}"}), 400
+        
+        # Resolve the caller once for every section
+        user, auth_error = resolve_user()
+        if auth_error:
+            return jsonify({'message': auth_error}), 401
+        
+        payload = {}
+        errors = {}
+        futures = {}
+        
+        for name in include:
+            needs_auth = BOOTSTRAP_SECTIONS[name][1]
+            if needs_auth and not user:
+                errors[name] = 'Authentication required'
+                continue
+            futures[name] = bootstrap_executor.submit(
+                load_bootstrap_section, name, g.tenant, user, g.get('degraded', False)
             )
         
-        return jsonify({'message': 'Profile updated successfully'}), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-# Contact Routes
-@app.route('/api/contact', methods=['POST'])
-def submit_contact():
-    try:
-        data = request.get_json()
+        stale = []
+        for name, future in futures.items():
+            try:
+                payload[name], is_stale = future.result()
+                if is_stale:
+                    stale.append(name)
+            except Exception as e:
+                errors[name] = 'Temporarily unavailable' if is_unavailable(e) else str(e)
         
-        required_fields = ['name', 'email', 'subject', 'message']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} is required'}), 400
-        
-        contact_id = str(uuid.uuid4())
-        contact_message = {
-            '_id': contact_id,
-            'name': data['name'],
-            'email': data['email'],
-            'subject': data['subject'],
-            'message': data['message'],
-            'created_at': datetime.utcnow(),
-            'status': 'unread'
-        }
-        
-        mongo.db.contacts.insert_one(contact_message)
-        
-        return jsonify({'message': 'Thank you for your message. We will get back to you soon!'}), 201
+        payload['errors'] = errors
+        if stale:
+            payload['stale'] = stale
+        return jsonify(payload), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
-# Initialize sample data
-@app.route('/api/init-data', methods=['POST'])
-def init_sample_data():
-    try:
-        # Create admin user
-        admin_id = str(uuid.uuid4())
-        admin_user = {
-            '_id': admin_id,
-            'name': 'Admin User',
-            'email': 'admin@savory.com',
-            'password': generate_password_hash('savory@admin'),
-            'phone': '+1234567890',
-            'role': 'admin',
-            'created_at': datetime.utcnow()
-        }
-        
-        # Create sample customer
-        customer_id = str(uuid.uuid4())
-        customer_user = {
-            '_id': customer_id,
-            'name': 'User',
-            'email': 'user@savory.com',
-            'password': generate_password_hash('savory@user'),
-            'phone': '+1234567891',
-            'role': 'customer',
-            'created_at': datetime.utcnow()
-        }
-        
-        # Insert users if they don't exist
-        if not mongo.db.users.find_one({'email': 'admin@savory.com'}):
-            mongo.db.users.insert_one(admin_user)
-        if not mongo.db.users.find_one({'email': 'user@savory.com'}):
-            mongo.db.users.insert_one(customer_user)
-        
-        # Sample menu items
-        sample_menu_items = [
-            {
-                '_id': str(uuid.uuid4()),
-                'name': 'Grilled Salmon',
-                'category': 'main-course',
-                'description': 'Fresh Atlantic salmon grilled to perfection with herbs and lemon',
-                'price': 24.99,
-                'image': 'https://images.pexels.com/photos/1516415/pexels-photo-1516415.jpeg?auto=compress&cs=tinysrgb&w=600',
-                'available': True,
-                'popular': True,
-                'created_at': datetime.utcnow()
-            },
-            {
-                '_id': str(uuid.uuid4()),
-                'name': 'Caesar Salad',
-                'category': 'starters',
-                'description': 'Crisp romaine lettuce with parmesan cheese and our signature dressing',
-                'price': 12.99,
-                'image': 'https://images.pexels.com/photos/2097090/pexels-photo-2097090.jpeg?auto=compress&cs=tinysrgb&w=600',
-                'available': True,
-                'popular': True,
-                'created_at': datetime.utcnow()
-            },
-            {
-                '_id': str(uuid.uuid4()),
-                'name': 'Beef Steak',
-                'category': 'main-course',
-                'description': 'Premium beef steak cooked to your liking with roasted vegetables',
-                'price': 32.99,
-                'image': 'https://images.pexels.com/photos/769289/pexels-photo-769289.jpeg?auto=compress&cs=tinysrgb&w=600',
-                'available': True,
-                'popular': True,
-                'created_at': datetime.utcnow()
-            },
-            {
-                '_id': str(uuid.uuid4()),
-                'name': 'Chocolate Cake',
-                'category': 'desserts',
-                'description': 'Rich chocolate cake with layers of creamy frosting',
-                'price': 8.99,
-                'image': 'https://images.pexels.com/photos/291528/pexels-photo-291528.jpeg?auto=compress&cs=tinysrgb&w=600',
-                'available': True,
-                'popular': False,
-                'created_at': datetime.utcnow()
-            },
-            {
-                '_id': str(uuid.uuid4()),
-                'name': 'Fresh Orange Juice',
-                'category': 'beverages',
-                'description': 'Freshly squeezed orange juice',
-                'price': 4.99,
-                'image': 'https://images.pexels.com/photos/96974/pexels-photo-96974.jpeg?auto=compress&cs=tinysrgb&w=600',
-                'available': True,
-                'popular': False,
-                'created_at': datetime.utcnow()
-            },
-            {
-                '_id': str(uuid.uuid4()),
-                'name': 'Chicken Wings',
-                'category': 'starters',
-                'description': 'Spicy buffalo wings served with blue cheese dip',
-                'price': 14.99,
-                'image': 'https://images.pexels.com/photos/60616/fried-chicken-chicken-fried-crunchy-60616.jpeg?auto=compress&cs=tinysrgb&w=600',
-                'available': True,
-                'popular': True,
-                'created_at': datetime.utcnow()
-            }
-        ]
-        
-        # Insert menu items if collection is empty
-        if mongo.db.menu_items.count_documents({}) == 0:
-            mongo.db.menu_items.insert_many(sample_menu_items)
-        
-        return jsonify({'message': 'Sample data initialized successfully'}), 201
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+startup_profile.mark('routes')
+if app.config['STARTUP_PROFILE']:
+    startup_profile.instrument(app, on_report=print_report)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,109 @@
+"""
+Hot/cold tiering for orders and reservations
+
+Finished orders and past reservations are moved in batches from the hot
+`orders`/`reservations` collections into `orders_archive` and
+`reservations_archive`, so the hot collections (and their indexes) only hold
+recent and in-flight documents.
+"""
+
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+
+ARCHIVABLE_ORDER_STATUSES = ['delivered', 'cancelled']
+
+
+def ensure_indexes(db):
+    db.orders.create_index([('restaurant_id', ASCENDING), ('status', ASCENDING), ('order_date', ASCENDING)])
+    db.reservations.create_index([('restaurant_id', ASCENDING), ('date', ASCENDING)])
+    # Archive pages are read newest first, with _id breaking ties between equal dates
+    db.orders_archive.create_index(
+        [('restaurant_id', ASCENDING), ('user_id', ASCENDING), ('order_date', DESCENDING), ('_id', DESCENDING)]
+    )
+    db.orders_archive.create_index([('restaurant_id', ASCENDING), ('order_date', DESCENDING), ('_id', DESCENDING)])
+    db.reservations_archive.create_index(
+        [('restaurant_id', ASCENDING), ('user_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]
+    )
+    db.reservations_archive.create_index([('restaurant_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)])
+
+
+def move_batch(source, target, query, sort_field, batch_size):
+    """Copy one batch into the archive, then remove it from the hot collection.
+
+    The copy is an idempotent upsert, so a crash between the two steps only
+    leaves documents in both places and the next run finishes the move.
+    """
+    batch = list(source.find(query).sort(sort_field, ASCENDING).limit(batch_size))
+    if not batch:
+        return []
+
+    now = datetime.utcnow()
+    target.bulk_write(
+        [ReplaceOne({'_id': doc['_id']}, dict(doc, archived_at=now), upsert=True) for doc in batch],
+        ordered=False
+    )
+    source.delete_many({'_id': {'$in': [doc['_id'] for doc in batch]}})
+    return batch
+
+
+def archive_history(db, restaurant_id, order_days=90, reservation_days=30, batch_size=500, max_batches=100):
+    """Archive one restaurant's old finished orders and past reservations; returns affected user ids and counts"""
+    now = datetime.utcnow()
+    order_query = {
+        'restaurant_id': restaurant_id,
+        'status': {'$in': ARCHIVABLE_ORDER_STATUSES},
+        'order_date': {'$lt': now - timedelta(days=order_days)}
+    }
+    # Reservation dates are stored as YYYY-MM-DD strings, which sort chronologically
+    reservation_query = {
+        'restaurant_id': restaurant_id,
+        'date': {'$lt': (now - timedelta(days=reservation_days)).strftime('%Y-%m-%d')}
+    }
+
+    user_ids = set()
+    counts = {'orders': 0, 'reservations': 0}
+
+    for name, source, target, query, sort_field in [
+        ('orders', db.orders, db.orders_archive, order_query, 'order_date'),
+        ('reservations', db.reservations, db.reservations_archive, reservation_query, 'date')
+    ]:
+        for _ in range(max_batches):
+            batch = move_batch(source, target, query, sort_field, batch_size)
+            if not batch:
+                break
+            counts[name] += len(batch)
+            user_ids.update(doc['user_id'] for doc in batch)
+
+    return user_ids, counts
+
+
+def parse_cursor(value):
+    """(date, _id) from a `next_before` cursor; a bare date (older clients) has no _id"""
+    if not value:
+        return None
+    date, _, doc_id = value.partition('|')
+    return datetime.fromisoformat(date), doc_id or None
+
+
+def fetch_archived(collection, sort_field, query, before=None, limit=20):
+    """One page of archived documents, newest first, after the `before` cursor
+
+    Pages are ordered by (sort_field, _id), so documents sharing a date are
+    neither skipped nor repeated at a page boundary.
+    """
+    if before:
+        date, doc_id = before
+        if doc_id is None:
+            query = dict(query, **{sort_field: {'$lt': date}})
+        else:
+            query = dict(query, **{'$or': [
+                {sort_field: {'$lt': date}},
+                {sort_field: date, '_id': {'$lt': doc_id}}
+            ]})
+
+    documents = list(collection.find(query).sort([(sort_field, DESCENDING), ('_id', DESCENDING)]).limit(limit))
+    if len(documents) < limit:
+        return documents, None
+    last = documents[-1]
+    return documents, f"{last[sort_field].isoformat()}|{last['_id']}"
@@ -0,0 +1,211 @@
+"""
+Authentication, password and profile routes
+"""
+
+from flask import Blueprint, request, jsonify, g
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime
+import uuid
+from cache import cached
+import order_summary
+from resilience import is_unavailable
+from core import app, mongo, tenants, cache, token_required, issue_token, error_response, register_bootstrap_section
+
+bp = Blueprint('auth', __name__, url_prefix='/api')
+
+# Registration is only race-free with a unique email index: the loser of two
+# concurrent sign-ups then gets DuplicateKeyError. The app makes sure it exists
+# before its first sign-up rather than relying on init_data.py having been run.
+email_index_ready = False
+
+def ensure_email_index():
+    global email_index_ready
+    if email_index_ready:
+        return
+    try:
+        mongo.db.users.create_index('email', unique=True)
+    except OperationFailure as e:
+        if is_unavailable(e):
+            raise
+        # Existing accounts share an email; retrying cannot help until they are
+        # merged, so sign-ups rely on the duplicate pre-check until then
+        app.logger.error(
+            'Cannot create the unique index on users.email (%s); registration falls back to '
+            'a non-atomic duplicate check. Run python init_data.py --migrate for details.', e
+        )
+    email_index_ready = True
+
+@bp.route('/register', methods=['POST'])
+def register():
+    try:
+        data = request.get_json()
+        
+        # Validate required fields
+        required_fields = ['name', 'email', 'password']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        # Check if user already exists (cheap rejection before hashing; the index decides)
+        existing_user = mongo.db.users.find_one({'email': data['email']})
+        if existing_user:
+            return jsonify({'error': 'User already exists'}), 400
+        
+        # Create new user
+        user_id = str(uuid.uuid4())
+        hashed_password = generate_password_hash(data['password'])
+        
+        new_user = {
+            '_id': user_id,
+            'name': data['name'],
+            'email': data['email'],
+            'password': hashed_password,
+            'phone': data.get('phone', ''),
+            'role': 'customer',
+            'created_at': datetime.utcnow()
+        }
+        
+        ensure_email_index()
+        try:
+            mongo.db.users.insert_one(new_user)
+        except DuplicateKeyError:
+            return jsonify({'error': 'User already exists'}), 400
+        
+        # Generate token
+        token = issue_token(new_user)
+        
+        return jsonify({
+            'message': 'Registration successful',
+            'token': token,
+            'user': {
+                'id': user_id,
+                'name': data['name'],
+                'email': data['email'],
+                'role': 'customer'
+            }
+        }), 201
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/login', methods=['POST'])
+def login():
+    try:
+        data = request.get_json()
+        
+        if not data.get('email') or not data.get('password'):
+            return jsonify({'error': 'Email and password are required'}), 400
+        
+        user = mongo.db.users.find_one({'email': data['email']})
+        
+        if user and check_password_hash(user['password'], data['password']):
+            token = issue_token(user)
+            
+            return jsonify({
+                'message': 'Login successful',
+                'token': token,
+                'user': {
+                    'id': user['_id'],
+                    'name': user['name'],
+                    'email': user['email'],
+                    'role': user['role']
+                }
+            }), 200
+        else:
+            return jsonify({'error': 'Invalid credentials'}), 401
+            
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/change-password', methods=['PUT'])
+@token_required
+def change_password(current_user):
+    try:
+        data = request.get_json()
+        
+        current_password = data.get('currentPassword')
+        new_password = data.get('newPassword')
+        
+        if not current_password or not new_password:
+            return jsonify({'error': 'Current and new passwords are required'}), 400
+        
+        # Verify current password
+        if not check_password_hash(current_user['password'], current_password):
+            return jsonify({'error': 'Current password is incorrect'}), 401
+        
+        # Hash and update new password
+        hashed_new_password = generate_password_hash(new_password)
+        mongo.db.users.update_one(
+            {'_id': current_user['_id']},
+            {'$set': {'password': hashed_new_password}}
+        )
+        
+        return jsonify({'message': 'Password changed successfully'}), 200
+
+    except Exception as e:
+        return error_response(e)
+
+# Profile Routes
+def fetch_profile(current_user):
+    return {
+        'id': current_user['_id'],
+        'name': current_user['name'],
+        'email': current_user['email'],
+        'phone': current_user.get('phone', ''),
+        'role': current_user['role']
+    }
+
+@bp.route('/profile', methods=['GET'])
+@token_required
+def get_profile(current_user):
+    try:
+        return jsonify(fetch_profile(current_user)), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/profile/summary', methods=['GET'])
+@token_required
+@cached(cache, tags=['orders:{user_id}'], per_user=True)
+def get_profile_summary(current_user):
+    try:
+        return jsonify(order_summary.get_summary(g.tenant.db, g.tenant.id, current_user['_id'])), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/profile', methods=['PUT'])
+@token_required
+def update_profile(current_user):
+    try:
+        data = request.get_json()
+        
+        update_data = {}
+        if 'name' in data:
+            update_data['name'] = data['name']
+        if 'phone' in data:
+            update_data['phone'] = data['phone']
+        
+        if update_data:
+            mongo.db.users.update_one(
+                {'_id': current_user['_id']},
+                {'$set': update_data}
+            )
+            # Admin order listings embed the customer's name and phone, at every restaurant
+            for restaurant_id in tenants.restaurants():
+                cache.invalidate(f"profile:{current_user['_id']}", 'orders:all', scope=restaurant_id)
+        
+        return jsonify({'message': 'Profile updated successfully'}), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+register_bootstrap_section(
+    'profile', lambda tenant, user: fetch_profile(user), needs_auth=True,
+    tags=lambda user: [f"profile:{user['_id']}"]
+)
+register_bootstrap_section(
+    'order_summary', lambda tenant, user: order_summary.get_summary(tenant.db, tenant.id, user['_id']),
+    needs_auth=True, tags=lambda user: [f"orders:{user['_id']}"]
+)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Payload benchmark: v1 vs v2 menu and order listings
+
+Reads the configured database (seed it with init_data.py first) and, for each
+listing, times the query (database + driver) and the JSON encoding separately
+and reports the response size, raw and gzipped. v1 rows go through jsonify,
+v2 rows through the v2 projection and encoder.
+
+Usage: python bench_payloads.py [--runs N] [--email user@savory.com] [--restaurant main]
+"""
+
+import argparse
+import gzip
+import statistics
+import time
+
+from flask import jsonify
+from core import app, mongo, tenants
+import menu_views
+import order_views
+import v2_views
+
+
+def median_ms(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def measure(label, fetch, encode, runs):
+    fetch_ms, rows = median_ms(fetch, runs)
+    encode_ms, body = median_ms(lambda: encode(rows).get_data(), runs)
+    return {
+        'label': label,
+        'rows': len(rows),
+        'fetch_ms': fetch_ms,
+        'encode_ms': encode_ms,
+        'bytes': len(body),
+        'gzip_bytes': len(gzip.compress(body))
+    }
+
+
+def print_table(title, results):
+    baseline = results[0]
+    print(f"\n{title} ({baseline['rows']} rows)")
+    print(f"  {'':<34} {'query ms':>9} {'encode ms':>10} {'bytes':>9} {'gzip':>8} {'saved':>7}")
+    for result in results:
+        saved = 1 - result['bytes'] / baseline['bytes'] if baseline['bytes'] else 0
+        print(
+            f"  {result['label']:<34} {result['fetch_ms']:9.2f} {result['encode_ms']:10.3f} "
+            f"{result['bytes']:9d} {result['gzip_bytes']:8d} {saved:7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare v1 and v2 listing payloads')
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--email', default='user@savory.com', help='customer whose orders are listed')
+    parser.add_argument('--restaurant', default=app.config['DEFAULT_RESTAURANT_ID'])
+    parser.add_argument('--menu-fields', default='id,name,price_cents', help='v2 fieldset for the cart case')
+    args = parser.parse_args()
+
+    with app.app_context():
+        tenant = tenants.get(args.restaurant)
+        cart_fields = v2_views.parse_fields(args.menu_fields, v2_views.MENU_FIELDS, v2_views.MENU_DEFAULT)
+
+        print_table('Menu', [
+            measure('v1 /api/menu', lambda: menu_views.fetch_menu(tenant), jsonify, args.runs),
+            measure(
+                'v2 /api/v2/menu',
+                lambda: v2_views.fetch_menu(tenant, v2_views.MENU_DEFAULT),
+                v2_views.respond,
+                args.runs
+            ),
+            measure(
+                f'v2 ?fields={args.menu_fields}',
+                lambda: v2_views.fetch_menu(tenant, cart_fields),
+                v2_views.respond,
+                args.runs
+            )
+        ])
+
+        user = mongo.db.users.find_one({'email': args.email})
+        if user is None:
+            raise SystemExit(f'No user with email {args.email}')
+
+        print_table(f'Orders for {args.email}', [
+            measure(
+                'v1 /api/orders?view=full',
+                lambda: order_views.fetch_orders(tenant, user, compact=False),
+                jsonify,
+                args.runs
+            ),
+            measure('v1 /api/orders', lambda: order_views.fetch_orders(tenant, user), jsonify, args.runs),
+            measure(
+                'v2 /api/v2/orders',
+                lambda: v2_views.fetch_orders(tenant, user, v2_views.ORDER_DEFAULT),
+                v2_views.respond,
+                args.runs
+            ),
+            measure(
+                'v2 ?fields=...,items',
+                lambda: v2_views.fetch_orders(tenant, user, v2_views.ORDER_DEFAULT + ['items']),
+                v2_views.respond,
+                args.runs
+            )
+        ])
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark for the Restaurant Management System
+
+Starts a fresh server process per run and measures the time from spawning it
+to the first HTTP response, the figure that matters when workers are scaled
+up. With --importtime it also runs `python -X importtime -c "import app"` and
+sums import time by top-level package.
+
+Usage: python bench_startup.py [--runs N] [--path /api/menu] [--importtime]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+SERVER = (
+    "import sys; from werkzeug.serving import run_simple; from app import app; "
+    "run_simple('127.0.0.1', int(sys.argv[1]), app, threaded=True)"
+)
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def cold_start(path, timeout):
+    port = free_port()
+    url = f'http://127.0.0.1:{port}{path}'
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-c', SERVER, str(port)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                urllib.request.urlopen(url, timeout=timeout).read()
+                return time.perf_counter() - started
+            except urllib.error.HTTPError:
+                # Any answer counts: the app is up and served the request
+                return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError(f'Server exited with status {server.returncode}')
+                time.sleep(0.005)
+        raise RuntimeError(f'No response from {url} within {timeout}s')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def import_breakdown(top):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    packages = Counter()
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        packages[name.strip().split('.')[0]] += int(self_us)
+
+    total = sum(packages.values())
+    print(f"\nImport time by package (total {total / 1000:.1f} ms):")
+    for package, micros in packages.most_common(top):
+        print(f"  {package:<24} {micros / 1000:8.1f} ms  {micros / total:6.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure cold-start-to-first-response time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/api/menu')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--importtime', action='store_true', help='also break import time down by package')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    timings = [cold_start(args.path, args.timeout) * 1000 for _ in range(args.runs)]
+
+    print(f"Cold start to first response for {args.path} ({args.runs} runs):")
+    print(f"  min {min(timings):.0f} ms  median {statistics.median(timings):.0f} ms  max {max(timings):.0f} ms")
+
+    if args.importtime:
+        import_breakdown(args.top)
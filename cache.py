@@ -0,0 +1,429 @@
+"""
+Two-tier response cache for the Restaurant Management System
+
+Reads go through a small per-process LRU first, then a shared store that all
+workers can see. Entries carry tags; invalidating a tag bumps its version in
+the shared store so stale entries are ignored everywhere, and drops matching
+entries from this process's LRU straight away. Concurrent misses for the same
+key are collapsed so only one of them runs the loader.
+
+Keys and tags are namespaced by a scope (the restaurant a request belongs
+to), and each scope gets its own LRU partition, so one busy restaurant cannot
+evict another's hot entries.
+
+Every stored value is also kept as a long-lived last-known-good copy. When a
+load fails because the database is unavailable (or the `guard` refuses to let
+it reach the database), that copy is served instead, flagged as stale.
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, Response
+
+
+class LocalLRU:
+    def __init__(self, maxsize=1024, ttl=5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + min(ttl or self.ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_tagged(self, tag):
+        with self._lock:
+            for key in [k for k, (_, v) in self._data.items() if tag in v['tags']]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class MemoryStore:
+    """Shared-store stand-in that lives in this process (tests, single worker)
+
+    Holds at most `maxsize` entries, dropping the least recently used, and
+    clears out expired ones every `sweep_interval` seconds. Tag versions are
+    kept apart and never evicted: losing one would bring back entries it had
+    invalidated.
+    """
+
+    def __init__(self, maxsize=10000, sweep_interval=60):
+        self.maxsize = maxsize
+        self.sweep_interval = sweep_interval
+        self._data = OrderedDict()
+        self._counters = {}
+        self._next_sweep = time.time() + sweep_interval
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._counters:
+                    found[key] = self._counters[key]
+                    continue
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                if entry[0] is not None and entry[0] <= now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = entry[1]
+            return found
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._data[key] = (now + ttl if ttl else None, value)
+            self._data.move_to_end(key)
+            if now >= self._next_sweep:
+                self._sweep(now)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _sweep(self, now):
+        for key in [k for k, (expires, _) in self._data.items() if expires is not None and expires <= now]:
+            del self._data[key]
+        self._next_sweep = now + self.sweep_interval
+
+    def incr(self, key):
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def __len__(self):
+        return len(self._data) + len(self._counters)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class SQLiteStore:
+    """Shared store for all worker processes on one host
+
+    Every `sweep_interval` seconds a write deletes expired rows and, past
+    `maxsize` entries, the ones closest to expiring. Tag versions have no
+    expiry and are never deleted.
+    """
+
+    def __init__(self, path, maxsize=10000, sweep_interval=60):
+        self.path = path
+        self.maxsize = maxsize
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value BLOB, expires REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+
+    def _connect(self):
+        import sqlite3  # not needed at all with the memory backend
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        rows = self._connect().execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) '
+            f'AND (expires IS NULL OR expires > ?)',
+            (*keys, time.time())
+        ).fetchall()
+        return {key: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        self._connect().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value), now + ttl if ttl else None)
+        )
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep(now)
+
+    def sweep(self, now=None):
+        conn = self._connect()
+        conn.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (now or time.time(),)
+        )
+        count = conn.execute('SELECT COUNT(*) FROM cache WHERE expires IS NOT NULL').fetchone()[0]
+        if count > self.maxsize:
+            conn.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'WHERE expires IS NOT NULL ORDER BY expires LIMIT ?)',
+                (count - self.maxsize,)
+            )
+
+    def incr(self, key):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+            value = (pickle.loads(row[0]) if row else 0) + 1
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, NULL)',
+                (key, pickle.dumps(value))
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return value
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache')
+
+
+class Cache:
+    def __init__(self, shared, local_factory=LocalLRU, default_ttl=60, scope=None,
+                 stale_ttl=None, guard=None, fallback=None):
+        self.shared = shared
+        self.local_factory = local_factory
+        self.default_ttl = default_ttl
+        self.scope = scope
+        self.stale_ttl = stale_ttl
+        self.guard = guard
+        self.fallback = fallback
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'coalesced': 0, 'stale': 0}
+        self._locals = {}
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def _scope(self, scope):
+        if scope is None and self.scope is not None:
+            scope = self.scope()
+        return scope or ''
+
+    def _scoped(self, names, scope):
+        return [f'{scope}/{name}' if scope else name for name in names]
+
+    def _local(self, scope):
+        local = self._locals.get(scope)
+        if local is None:
+            local = self._locals.setdefault(scope, self.local_factory())
+        return local
+
+    def _tag_versions(self, tags):
+        keys = [f'tag:{tag}' for tag in tags]
+        found = self.shared.get_many(keys)
+        return {tag: found.get(f'tag:{tag}', 0) for tag in tags}
+
+    def get(self, key, scope=None):
+        scope = self._scope(scope)
+        return self._get(self._scoped([key], scope)[0], scope)
+
+    def _get(self, key, scope):
+        local = self._local(scope)
+        entry = local.get(key)
+        if entry is not None:
+            self.stats['local_hits'] += 1
+            return entry['value']
+
+        entry = self.shared.get_many([key]).get(key)
+        if entry is not None and self._tag_versions(entry['tags']) == entry['tags']:
+            self.stats['shared_hits'] += 1
+            local.set(key, entry)
+            return entry['value']
+
+        return None
+
+    def set(self, key, value, tags=(), ttl=None, scope=None):
+        scope = self._scope(scope)
+        self._set(self._scoped([key], scope)[0], value, self._scoped(tags, scope), ttl, scope)
+
+    def _set(self, key, value, tags, ttl, scope, versions=None):
+        entry = {'value': value, 'tags': versions or self._tag_versions(tags)}
+        self.shared.set(key, entry, ttl or self.default_ttl)
+        self._local(scope).set(key, entry, ttl or self.default_ttl)
+        if self.stale_ttl:
+            self.shared.set(f'stale:{key}', value, self.stale_ttl)
+
+    def get_or_set(self, key, loader, tags=(), ttl=None, cacheable=lambda value: True, scope=None):
+        return self.fetch(key, loader, tags, ttl, cacheable, scope)[0]
+
+    def fetch(self, key, loader, tags=(), ttl=None, cacheable=lambda value: True, scope=None):
+        """Like get_or_set, but returns (value, stale)"""
+        scope = self._scope(scope)
+        key = self._scoped([key], scope)[0]
+        tags = self._scoped(tags, scope)
+
+        value = self._get(key, scope)
+        if value is not None:
+            return value, False
+
+        # Single flight: the first thread to miss loads, the rest wait for it
+        with self._inflight_lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait(timeout=30)
+            value = self._get(key, scope)
+            if value is not None:
+                self.stats['coalesced'] += 1
+                return value, False
+            return self._load(key, loader, tags, ttl, cacheable, scope)
+
+        try:
+            self.stats['misses'] += 1
+            return self._load(key, loader, tags, ttl, cacheable, scope)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            event.set()
+
+    def _load(self, key, loader, tags, ttl, cacheable, scope):
+        try:
+            if self.guard:
+                self.guard(scope)
+            # Read versions before loading so a concurrent invalidation wins
+            versions = self._tag_versions(tags)
+            value = loader()
+        except Exception as e:
+            if not (self.stale_ttl and (isinstance(e, Unavailable) or self.fallback and self.fallback(e))):
+                raise
+            stale = self.shared.get_many([f'stale:{key}']).get(f'stale:{key}')
+            if stale is None:
+                raise
+            self.stats['stale'] += 1
+            return stale, True
+
+        # Skip storing if a tag was invalidated while we were loading
+        if cacheable(value) and self._tag_versions(tags) == versions:
+            self._set(key, value, tags, ttl, scope, versions)
+        return value, False
+
+    def invalidate(self, *tags, scope=None):
+        scope = self._scope(scope)
+        local = self._local(scope)
+        for tag in self._scoped(tags, scope):
+            self.shared.incr(f'tag:{tag}')
+            local.delete_tagged(tag)
+
+    def clear(self):
+        for local in list(self._locals.values()):
+            local.clear()
+        self.shared.clear()
+
+
+class Unavailable(Exception):
+    """A view answered 503; carries the response so it can be returned if nothing stale exists"""
+
+    def __init__(self, response):
+        super().__init__('Service unavailable')
+        self.response = response
+
+
+def create_cache(config, scope=None, guard=None, fallback=None):
+    # MemoryStore is per-process, so invalidations never reach other workers
+    if config.get('TESTING') or config.get('CACHE_BACKEND', 'memory') == 'memory':
+        shared = MemoryStore(config.get('CACHE_MAX_ENTRIES', 10000), config.get('CACHE_SWEEP_INTERVAL', 60))
+    else:
+        shared = SQLiteStore(
+            config['CACHE_SQLITE_PATH'], config.get('CACHE_MAX_ENTRIES', 10000), config.get('CACHE_SWEEP_INTERVAL', 60)
+        )
+
+    return Cache(
+        shared,
+        lambda: LocalLRU(config.get('CACHE_LOCAL_MAXSIZE', 1024), config.get('CACHE_LOCAL_TTL', 5)),
+        config.get('CACHE_DEFAULT_TTL', 60),
+        scope,
+        config.get('CACHE_STALE_TTL'),
+        guard,
+        fallback
+    )
+
+
+def cached(cache, tags=(), ttl=None, per_user=False, query_args=()):
+    """Cache a view's JSON response.
+
+    The key is built from the endpoint, view arguments, the query arguments
+    named in `query_args` and (when `per_user` is set) the user the view was
+    called for. Other query arguments are left out, so cache busters like
+    `?_=123` cannot fill the store with copies of one response. Tags may
+    reference `{user_id}`, or be a callable that takes the current user and
+    returns the tag list. Only 200 responses are stored; when the view answers 503 the
+    last-known-good response is returned instead, if there is one.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            user_id = args[0]['_id'] if per_user and args else None
+
+            key = ':'.join([
+                'view',
+                request.endpoint or f.__name__,
+                repr(sorted(kwargs.items())),
+                repr([request.args.getlist(name) for name in query_args]),
+                str(user_id or '')
+            ])
+            if callable(tags):
+                resolved_tags = tags(args[0] if args else None)
+            else:
+                resolved_tags = [tag.format(user_id=user_id) for tag in tags]
+
+            def load():
+                rv = f(*args, **kwargs)
+                response, status = rv if isinstance(rv, tuple) else (rv, 200)
+                if status == 503:
+                    raise Unavailable(rv)
+                return (response.get_data(), status, response.mimetype)
+
+            try:
+                (body, status, mimetype), stale = cache.fetch(
+                    key, load, resolved_tags, ttl,
+                    cacheable=lambda value: value[1] == 200
+                )
+            except Unavailable as e:
+                return e.response
+            response = Response(body, status=status, mimetype=mimetype)
+            if stale:
+                response.headers['Warning'] = '110 - "Response is Stale"'
+            return response
+        return decorated
+    return decorator
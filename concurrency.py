@@ -0,0 +1,37 @@
+"""
+Safe concurrent writes
+
+Staff edits use optimistic concurrency: documents carry a `version` that
+every status change increments, and a client that sends the version it last
+saw only succeeds if nobody changed the document since. Creating orders and
+reservations is idempotent when the client sends an `Idempotency-Key` (a
+UUID): the key becomes the document id, so a retried or double-submitted
+request finds the first document instead of writing a second one.
+"""
+
+import uuid
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class VersionConflict(Exception):
+    def __init__(self, current):
+        super().__init__('Modified by someone else; reload and try again')
+        self.current = current
+
+
+def parse_version(data):
+    """The `version` a client expects, or None if it did not send one"""
+    version = data.get('version')
+    return None if version is None else int(version)
+
+
+def version_filter(version):
+    # Documents written before versioning have no field and count as version 0
+    return {'version': {'$in': [0, None]}} if version == 0 else {'version': version}
+
+
+def idempotent_id(headers):
+    """The document id for a create request: its Idempotency-Key, or a new one"""
+    key = headers.get(IDEMPOTENCY_HEADER)
+    return str(uuid.UUID(key)) if key else str(uuid.uuid4())
@@ -2,6 +2,10 @@
 
 import os
 from datetime import timedelta
+from dotenv import load_dotenv
+
+# Load .env once, before any setting below reads the environment
+load_dotenv()
 
 class Config:
     # Basic Flask configuration
@@ -9,21 +13,102 @@ class Config:
     
     # MongoDB Configuration
     MONGO_URI = os.environ.get('MONGO_URI') or 'mongodb://localhost:27017/restaurant_db'
+    # Upper bounds so a slow or unreachable database fails fast instead of tying up workers
+    MONGO_TIMEOUT_MS = int(os.environ.get('MONGO_TIMEOUT_MS') or 2000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS') or 2000)
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS') or 2000)
+    
+    # Circuit breaker: open after this many failed operations (and at least half of
+    # those in a 10 second window), then let one trial through after BREAKER_RESET_SECONDS
+    BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD') or 5)
+    BREAKER_RESET_SECONDS = int(os.environ.get('BREAKER_RESET_SECONDS') or 10)
+    
+    # Orders accepted while the database is unavailable wait here until they are written
+    ORDER_SPOOL_DIR = os.environ.get('ORDER_SPOOL_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'instance', 'pending_orders')
+    ORDER_SPOOL_REPLAY_INTERVAL = float(os.environ.get('ORDER_SPOOL_REPLAY_INTERVAL') or 5)
     
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or SECRET_KEY
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     
-    # Flask-Mail Configuration (for future email features)
+    # Mail Configuration (used by background jobs)
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'localhost'
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 25)
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'false').lower() in ['true', 'on', '1']
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'no-reply@savory.com'
+    MAIL_BACKEND = os.environ.get('MAIL_BACKEND') or 'smtp'  # 'smtp' or 'memory'
+    
+    # Background Job Queue Configuration
+    JOB_QUEUE_EAGER = os.environ.get('JOB_QUEUE_EAGER', 'false').lower() in ['true', 'on', '1']
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS') or 5)
+    JOB_BACKOFF_SECONDS = int(os.environ.get('JOB_BACKOFF_SECONDS') or 5)
+    JOB_TIMEOUT_SECONDS = int(os.environ.get('JOB_TIMEOUT_SECONDS') or 60)
     
     # File Upload Configuration
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MEDIA_WIDTHS = [160, 320, 640, 1280]
+    MEDIA_WORKERS = int(os.environ.get('MEDIA_WORKERS') or 2)
+    MEDIA_CACHE_MAX_AGE = 365 * 24 * 3600
+    
+    # Response Cache Configuration
+    # 'memory' or 'sqlite'. The memory store is private to one process, so other
+    # workers would keep serving invalidated entries until CACHE_DEFAULT_TTL;
+    # it is only the default when a single worker runs
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY') or 1)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or ('sqlite' if WEB_CONCURRENCY > 1 else 'memory')
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'instance', 'cache.sqlite3')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL') or 60)
+    CACHE_LOCAL_TTL = int(os.environ.get('CACHE_LOCAL_TTL') or 5)
+    CACHE_LOCAL_MAXSIZE = int(os.environ.get('CACHE_LOCAL_MAXSIZE') or 1024)
+    # How long last-known-good responses are kept for serving during an outage
+    CACHE_STALE_TTL = int(os.environ.get('CACHE_STALE_TTL') or 86400)
+    # Upper bound on shared store entries, and how often expired ones are swept
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or 10000)
+    CACHE_SWEEP_INTERVAL = int(os.environ.get('CACHE_SWEEP_INTERVAL') or 60)
+    
+    # Write-behind buffer for contact messages ('memory', 'journal' or 'sync')
+    WRITE_BEHIND_MODE = os.environ.get('WRITE_BEHIND_MODE') or 'memory'
+    WRITE_BEHIND_MAX_SIZE = int(os.environ.get('WRITE_BEHIND_MAX_SIZE') or 100)
+    WRITE_BEHIND_MAX_DELAY = float(os.environ.get('WRITE_BEHIND_MAX_DELAY') or 1.0)
+    WRITE_BEHIND_JOURNAL_DIR = os.environ.get('WRITE_BEHIND_JOURNAL_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'instance', 'journal')
+    
+    # Restaurants: requests without a /r/<id>/ prefix, known host or header use the default
+    DEFAULT_RESTAURANT_ID = os.environ.get('DEFAULT_RESTAURANT_ID') or 'main'
+    RESTAURANT_PATH_PREFIX = os.environ.get('RESTAURANT_PATH_PREFIX') or 'r'
+    RESTAURANT_REGISTRY_REFRESH = int(os.environ.get('RESTAURANT_REGISTRY_REFRESH') or 60)
+    
+    # Maximum active orders returned to kitchen display screens
+    KITCHEN_QUEUE_LIMIT = int(os.environ.get('KITCHEN_QUEUE_LIMIT') or 50)
+    
+    # Archival of finished orders and past reservations into *_archive collections
+    ARCHIVE_ORDERS_AFTER_DAYS = int(os.environ.get('ARCHIVE_ORDERS_AFTER_DAYS') or 90)
+    ARCHIVE_RESERVATIONS_AFTER_DAYS = int(os.environ.get('ARCHIVE_RESERVATIONS_AFTER_DAYS') or 30)
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 500)
+    ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('ARCHIVE_INTERVAL_SECONDS') or 3600)
+    
+    # Sales analytics rollups; POPULAR_MENU_SOURCE is 'flag' (admin-picked) or 'sales'
+    ANALYTICS_INTERVAL_SECONDS = int(os.environ.get('ANALYTICS_INTERVAL_SECONDS') or 300)
+    ANALYTICS_TIMEZONE = os.environ.get('ANALYTICS_TIMEZONE') or 'UTC'
+    POPULAR_MENU_SOURCE = os.environ.get('POPULAR_MENU_SOURCE') or 'flag'
+    POPULAR_MENU_DAYS = int(os.environ.get('POPULAR_MENU_DAYS') or 30)
+    
+    # API blueprints this process serves (auth, menu, orders, reservations, contact, admin, v2)
+    BLUEPRINTS = [
+        name.strip()
+        for name in (os.environ.get('BLUEPRINTS') or 'auth,menu,orders,reservations,contact,admin,v2').split(',')
+        if name.strip()
+    ]
+    # Print a startup phase / first request timing report (also at /api/admin/startup)
+    STARTUP_PROFILE = os.environ.get('STARTUP_PROFILE', 'false').lower() in ['true', 'on', '1']
+    
+    # Threads used to load /api/bootstrap sections concurrently
+    BOOTSTRAP_WORKERS = int(os.environ.get('BOOTSTRAP_WORKERS') or 4)
     
     # Pagination
     ITEMS_PER_PAGE = 20
@@ -44,6 +129,9 @@ class TestingConfig(Config):
     TESTING = True
     MONGO_URI = os.environ.get('TEST_MONGO_URI') or 'mongodb://localhost:27017/restaurant_test'
     WTF_CSRF_ENABLED = False
+    MAIL_BACKEND = 'memory'
+    JOB_QUEUE_EAGER = True
+    WRITE_BEHIND_MODE = 'sync'
 
 # Configuration dictionary
 config = {
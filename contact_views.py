@@ -0,0 +1,39 @@
+"""
+Contact form route
+"""
+
+from flask import Blueprint, request, jsonify, g
+from datetime import datetime
+import uuid
+from core import contact_buffer, error_response
+
+bp = Blueprint('contact', __name__, url_prefix='/api')
+
+@bp.route('/contact', methods=['POST'])
+def submit_contact():
+    try:
+        data = request.get_json()
+        
+        required_fields = ['name', 'email', 'subject', 'message']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        contact_id = str(uuid.uuid4())
+        contact_message = {
+            '_id': contact_id,
+            'restaurant_id': g.tenant.id,
+            'name': data['name'],
+            'email': data['email'],
+            'subject': data['subject'],
+            'message': data['message'],
+            'created_at': datetime.utcnow(),
+            'status': 'unread'
+        }
+        
+        contact_buffer.insert(contact_message)
+        
+        return jsonify({'message': 'Thank you for your message. We will get back to you soon!'}), 201
+        
+    except Exception as e:
+        return error_response(e)
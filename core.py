@@ -0,0 +1,296 @@
+"""
+Shared application objects for the Restaurant Management System
+
+The Flask app, its database clients, cache, job queue and buffers, the
+request hooks every blueprint relies on (restaurant selection, database
+availability) and authentication helpers live here. Route modules import
+what they need from this module; app.py registers the configured blueprints,
+and worker.py uses it on its own without loading any routes.
+"""
+
+from startup import startup_profile  # first, so the imports below are timed
+from flask import Flask, request, jsonify, g, has_request_context
+from flask_pymongo import PyMongo
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from datetime import datetime, timedelta
+from functools import wraps
+import os
+from flask_cors import CORS
+import config as settings
+from jobs import JobQueue, JobContext
+from mailer import create_mailer
+from cache import create_cache
+from write_buffer import WriteBehindBuffer
+from tenants import TenantRouter, PathPrefixMiddleware, PREFIX_ENVIRON_KEY, COOKIE_NAME, HEADER_NAME
+from resilience import CircuitBreaker, CircuitOpenError, LocalSpool, client_options, is_unavailable
+
+startup_profile.mark('imports')
+
+app = Flask(__name__)
+# APP_CONFIG picks development, production or testing settings from config.py;
+# without it the base Config is used
+config_name = os.environ.get('APP_CONFIG')
+if config_name and config_name not in settings.config:
+    raise RuntimeError(f"Unknown APP_CONFIG '{config_name}'; use one of: {', '.join(settings.config)}")
+app.config.from_object(settings.config[config_name] if config_name else settings.Config)
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+startup_profile.mark('config')
+
+def create_breaker(name):
+    return CircuitBreaker(
+        name,
+        failure_threshold=app.config['BREAKER_FAILURE_THRESHOLD'],
+        reset_timeout=app.config['BREAKER_RESET_SECONDS']
+    )
+
+# Initialize MongoDB with bounded timeouts; each cluster gets a circuit breaker
+# fed by the driver's monitoring events
+breakers = {'main': create_breaker('main')}
+mongo = PyMongo(app, **client_options(app.config, breakers['main']))
+CORS(app)
+
+def cluster_client(uri):
+    breaker = breakers.setdefault(uri, create_breaker(uri))
+    return MongoClient(uri, **client_options(app.config, breaker))
+
+# Restaurants (tenants): which one a request is for, and where its data lives
+tenants = TenantRouter(
+    mongo.db,
+    default_restaurant=app.config['DEFAULT_RESTAURANT_ID'],
+    refresh_interval=app.config['RESTAURANT_REGISTRY_REFRESH'],
+    client_factory=cluster_client
+)
+app.wsgi_app = PathPrefixMiddleware(app.wsgi_app, app.config['RESTAURANT_PATH_PREFIX'])
+startup_profile.mark('database')
+
+def breaker_for(restaurant_id):
+    uri = tenants.cluster(restaurant_id)
+    if uri is None:
+        return breakers['main']
+    tenants.database(restaurant_id)  # creates the client and its breaker
+    return breakers[uri]
+
+def database_guard(scope):
+    # Degraded requests never reach the database; the cache serves stale copies instead
+    if has_request_context() and g.get('degraded'):
+        raise CircuitOpenError('Database is unavailable')
+
+# Response cache for read endpoints (per-process LRU in front of a shared store),
+# namespaced by restaurant; serves last-known-good copies while the database is down
+cache = create_cache(
+    app.config,
+    scope=lambda: g.tenant.id if has_request_context() and 'tenant' in g else None,
+    guard=database_guard,
+    fallback=is_unavailable
+)
+
+# Background jobs (emails, notifications, contact triage, archival)
+job_queue = JobQueue(
+    mongo.db,
+    max_attempts=app.config['JOB_MAX_ATTEMPTS'],
+    backoff_base=app.config['JOB_BACKOFF_SECONDS'],
+    eager=app.config['JOB_QUEUE_EAGER'],
+    timeout=app.config['JOB_TIMEOUT_SECONDS'],
+    handlers='tasks',
+    context=JobContext(mongo.db, create_mailer(app.config), app.config, cache, tenants)
+)
+job_queue.schedule('archive_history', app.config['ARCHIVE_INTERVAL_SECONDS'])
+job_queue.schedule('sales_rollup', app.config['ANALYTICS_INTERVAL_SECONDS'])
+
+# Contact messages are written in batches off the request path; triage jobs
+# are queued once each batch is in the database
+contact_buffer = WriteBehindBuffer(
+    mongo.db.contacts,
+    max_size=app.config['WRITE_BEHIND_MAX_SIZE'],
+    max_delay=app.config['WRITE_BEHIND_MAX_DELAY'],
+    mode=app.config['WRITE_BEHIND_MODE'],
+    journal_dir=app.config['WRITE_BEHIND_JOURNAL_DIR'],
+    on_flush=lambda documents: job_queue.enqueue_many(
+        'contact_received', [{'contact_id': doc['_id']} for doc in documents]
+    )
+)
+
+# Orders accepted while the database was unavailable, replayed once it is back
+order_spool = LocalSpool(app.config['ORDER_SPOOL_DIR'], 'orders')
+startup_profile.mark('services')
+
+@app.before_request
+def select_restaurant():
+    restaurant_id = tenants.resolve(
+        request.environ,
+        host=request.host,
+        header=request.headers.get(HEADER_NAME),
+        cookie=request.cookies.get(COOKIE_NAME)
+    )
+    if restaurant_id is None:
+        return jsonify({'error': 'Unknown restaurant'}), 404
+    g.tenant = tenants.get(restaurant_id)
+
+# Reads that can be answered from the stale cache, and writes that can be spooled,
+# while the database is unavailable
+# (the health endpoint needs neither, but must stay reachable during an outage)
+STALE_OK_ENDPOINTS = {
+    'menu.get_menu', 'menu.get_popular_menu', 'menu.get_menu_changes', 'orders.get_orders',
+    'auth.get_profile_summary', 'bootstrap', 'admin.get_database_health',
+    'v2.get_menu', 'v2.get_orders'
+}
+SPOOLED_ENDPOINTS = {'orders.create_order'}
+
+@app.before_request
+def check_database():
+    if not request.path.startswith('/api/') or 'tenant' not in g:
+        return None
+    
+    breaker = breaker_for(g.tenant.id)
+    if breaker.allow():
+        return None
+    
+    if (request.method == 'GET' and request.endpoint in STALE_OK_ENDPOINTS) or request.endpoint in SPOOLED_ENDPOINTS:
+        g.degraded = True
+        return None
+    
+    response = jsonify({'error': 'Service temporarily unavailable, please try again shortly'})
+    response.headers['Retry-After'] = str(breaker.retry_after())
+    return response, 503
+
+def error_response(e):
+    if is_unavailable(e):
+        response = jsonify({'error': 'Service temporarily unavailable, please try again shortly'})
+        restaurant_id = g.tenant.id if 'tenant' in g else app.config['DEFAULT_RESTAURANT_ID']
+        response.headers['Retry-After'] = str(max(1, breaker_for(restaurant_id).retry_after()))
+        return response, 503
+    return jsonify({'error': str(e)}), 500
+
+@app.errorhandler(PyMongoError)
+def database_error(e):
+    return error_response(e)
+
+@app.after_request
+def remember_restaurant(response):
+    # Pages opened under /r/<id>/ link to and fetch unprefixed URLs, so keep the choice in a cookie
+    if request.environ.get(PREFIX_ENVIRON_KEY) and 'tenant' in g and request.cookies.get(COOKIE_NAME) != g.tenant.id:
+        response.set_cookie(COOKIE_NAME, g.tenant.id, samesite='Lax')
+    return response
+
+def order_cache_tags(user):
+    # Admins list every order, customers only their own
+    if user['role'] == 'admin':
+        return ['orders:all']
+    return [f"orders:{user['_id']}"]
+
+def load_current_user(claims):
+    # While degraded, trust the signed token rather than waiting on the database
+    if g.get('degraded') and 'role' in claims:
+        return {'_id': claims['user_id'], 'role': claims['role'], 'restaurant_id': claims.get('restaurant_id')}
+    return mongo.db.users.find_one({'_id': claims['user_id']})
+
+def issue_token(user):
+    import jwt
+    return jwt.encode({
+        'user_id': user['_id'],
+        'role': user['role'],
+        'restaurant_id': user.get('restaurant_id'),
+        'exp': datetime.utcnow() + timedelta(hours=24)
+    }, app.config['SECRET_KEY'], algorithm='HS256')
+
+def decode_token(token):
+    # PyJWT is only needed once a token arrives, so it is not imported at startup
+    import jwt
+    return jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+
+# Authentication decorator
+def token_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = None
+        
+        if 'Authorization' in request.headers:
+            token = request.headers['Authorization'].split(" ")[1]
+        
+        if not token:
+            return jsonify({'message': 'Token is missing!'}), 401
+        
+        try:
+            data = decode_token(token)
+            current_user = load_current_user(data)
+        except PyMongoError as e:
+            return error_response(e)
+        except:
+            return jsonify({'message': 'Token is invalid!'}), 401
+        
+        return f(current_user, *args, **kwargs)
+    return decorated
+
+# Admin required decorator
+def admin_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = None
+        
+        if 'Authorization' in request.headers:
+            token = request.headers['Authorization'].split(" ")[1]
+        
+        if not token:
+            return jsonify({'message': 'Token is missing!'}), 401
+        
+        try:
+            data = decode_token(token)
+            current_user = load_current_user(data)
+            
+            if current_user['role'] != 'admin':
+                return jsonify({'message': 'Admin access required!'}), 403
+            
+            # Staff tied to one restaurant only manage that restaurant
+            if current_user.get('restaurant_id') not in (None, g.tenant.id):
+                return jsonify({'message': 'Admin access required!'}), 403
+                
+        except PyMongoError as e:
+            return error_response(e)
+        except:
+            return jsonify({'message': 'Token is invalid!'}), 401
+        
+        return f(current_user, *args, **kwargs)
+    return decorated
+
+def attach_users(documents):
+    # One $in lookup for every customer referenced by the documents
+    user_ids = list({doc['user_id'] for doc in documents})
+    users = {
+        user['_id']: user
+        for user in mongo.db.users.find({'_id': {'$in': user_ids}}, {'name': 1, 'email': 1, 'phone': 1})
+    }
+    
+    for doc in documents:
+        user = users.get(doc['user_id'])
+        doc['user'] = {
+            'name': user['name'],
+            'email': user['email'],
+            'phone': user.get('phone', '')
+        } if user else None
+
+def resolve_user():
+    """Return (user, error) for the request's bearer token; (None, None) if there is none"""
+    auth_header = request.headers.get('Authorization', '')
+    parts = auth_header.split(" ")
+    if len(parts) != 2 or not parts[1]:
+        return None, None
+    
+    try:
+        data = decode_token(parts[1])
+        user = load_current_user(data)
+    except PyMongoError:
+        raise
+    except Exception:
+        return None, 'Token is invalid!'
+    
+    if not user:
+        return None, 'Token is invalid!'
+    return user, None
+
+# Sections /api/bootstrap can load in one request, registered by the blueprints
+# that own the data: name -> (loader(tenant, user), needs auth, cache tags(user) or None)
+BOOTSTRAP_SECTIONS = {}
+
+def register_bootstrap_section(name, loader, needs_auth=False, tags=None):
+    BOOTSTRAP_SECTIONS[name] = (loader, needs_auth, tags)
@@ -0,0 +1,57 @@
+"""
+Sparse fieldsets for the v2 API
+
+A resource is described by a dict of API field name -> Field. Each field names
+the part of the Mongo document it needs (a projection fragment, which may be
+an aggregation expression) and how to render it. `?fields=id,name,price_cents`
+is turned into one projection, so only the requested data is read, sent by
+the server and encoded.
+"""
+
+from collections import namedtuple
+from datetime import timezone
+
+Field = namedtuple('Field', ['projection', 'render'])
+
+
+class UnknownFields(ValueError):
+    def __init__(self, unknown, allowed):
+        super().__init__(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+
+
+def field(name, render=None):
+    """A field read straight from document key `name`"""
+    return Field({name: 1}, render or (lambda doc: doc.get(name)))
+
+
+def parse_fields(value, fields, default):
+    """The requested field names, in the resource's order; `default` when none are given"""
+    requested = {name.strip() for name in (value or '').split(',') if name.strip()}
+    if not requested:
+        return list(default)
+
+    unknown = sorted(requested - set(fields))
+    if unknown:
+        raise UnknownFields(unknown, list(fields))
+    return [name for name in fields if name in requested]
+
+
+def projection(names, fields):
+    # Mongo returns _id unless told not to
+    result = {'_id': 0}
+    for name in names:
+        result.update(fields[name].projection)
+    return result
+
+
+def render(doc, names, fields):
+    return {name: fields[name].render(doc) for name in names}
+
+
+def cents(value):
+    return None if value is None else int(round(value * 100))
+
+
+def timestamp(value):
+    # Stored datetimes are naive UTC
+    return None if value is None else int(value.replace(tzinfo=timezone.utc).timestamp())
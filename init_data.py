@@ -3,34 +3,89 @@
 Initialize the database with sample data for the Restaurant Management System
 """
 
+import sys
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure
 from werkzeug.security import generate_password_hash
 import uuid
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from jobs import JobQueue
+import menu_sync
+import tenants
+import order_summary
 
 # Load environment variables
 load_dotenv()
 
-def init_database():
+DEFAULT_RESTAURANT_ID = os.environ.get('DEFAULT_RESTAURANT_ID') or 'main'
+
+def connect():
     # Connect to MongoDB
     mongo_uri = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/restaurant_db')
     client = MongoClient(mongo_uri)
     
     # Extract database name from URI
     db_name = mongo_uri.split('/')[-1]
-    db = client[db_name]
+    return client, client[db_name]
+
+def create_email_index(db):
+    try:
+        db.users.create_index("email", unique=True)
+    except OperationFailure as e:
+        duplicates = [row['_id'] for row in db.users.aggregate([
+            {'$group': {'_id': '$email', 'accounts': {'$sum': 1}}},
+            {'$match': {'accounts': {'$gt': 1}}}
+        ])]
+        if not duplicates:
+            raise
+        sys.exit(
+            f"Cannot create the unique index on users.email: {len(duplicates)} email(s) "
+            f"belong to more than one account ({', '.join(map(str, duplicates[:10]))}). "
+            f"Merge or remove those accounts and run again. ({e})"
+        )
+
+def create_indexes(db):
+    create_email_index(db)
+    JobQueue(db).ensure_indexes()
+    tenants.ensure_restaurant_indexes(db)
+
+def migrate_restaurants():
+    """Assign existing data to the default restaurant without clearing anything"""
+    client, db = connect()
+    
+    print(f"Assigning existing data in {db.name} to restaurant '{DEFAULT_RESTAURANT_ID}'...")
+    tenants.backfill(db, DEFAULT_RESTAURANT_ID)
+    create_indexes(db)
+    
+    # Restaurants with their own database need the same indexes there
+    for tenant in tenants.TenantRouter(db, DEFAULT_RESTAURANT_ID).all():
+        if tenant.db is not db:
+            print(f"Creating indexes for restaurant '{tenant.id}' in {tenant.db.name}...")
+            tenants.ensure_restaurant_indexes(tenant.db)
     
-    print(f"Initializing database: {db_name}")
+    print("Building customer order summaries...")
+    order_summary.rebuild_summaries(db, DEFAULT_RESTAURANT_ID)
+    
+    print("Migration completed successfully!")
+    client.close()
+
+def init_database():
+    client, db = connect()
+    
+    print(f"Initializing database: {db.name}")
     
     # Clear existing data
     print("Clearing existing data...")
     db.users.drop()
     db.menu_items.drop()
     db.orders.drop()
+    db.order_summaries.drop()
     db.reservations.drop()
     db.contacts.drop()
+    db.menu_changes.drop()
+    db.counters.delete_one({'_id': f'menu_version:{DEFAULT_RESTAURANT_ID}'})
     
     # Create admin user
     print("Creating admin user...")
@@ -195,17 +250,18 @@ def init_database():
         }
     ]
     
+    for item in sample_menu_items:
+        item['restaurant_id'] = DEFAULT_RESTAURANT_ID
+    
     db.menu_items.insert_many(sample_menu_items)
+    menu_sync.record_change(db, DEFAULT_RESTAURANT_ID, [item['_id'] for item in sample_menu_items])
+    
+    # Archived history is kept; make sure it belongs to a restaurant
+    tenants.backfill(db, DEFAULT_RESTAURANT_ID)
     
     # Create indexes for better performance
     print("Creating database indexes...")
-    db.users.create_index("email", unique=True)
-    db.menu_items.create_index("category")
-    db.menu_items.create_index("available")
-    db.orders.create_index("user_id")
-    db.orders.create_index("order_date")
-    db.reservations.create_index("user_id")
-    db.reservations.create_index("date")
+    create_indexes(db)
     
     print("Database initialization completed successfully!")
     print("\nDemo Credentials:")
@@ -215,4 +271,7 @@ def init_database():
     client.close()
 
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    if '--migrate' in sys.argv:
+        migrate_restaurants()
+    else:
+        init_database()
\ No newline at end of file
@@ -0,0 +1,303 @@
+"""
+Durable background job queue for the Restaurant Management System
+
+Jobs are stored in the `jobs` collection and claimed atomically by worker
+processes (see worker.py). Failed jobs are retried with exponential backoff
+and moved to `jobs_dead` once they run out of attempts. Periodic jobs are
+tracked in `jobs_schedule`; whichever worker claims a due slot enqueues it.
+"""
+
+import os
+import socket
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from importlib import import_module
+
+import pymongo
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Registered job handlers, keyed by job type
+HANDLERS = {}
+
+
+def job_handler(job_type):
+    """Register a function as the handler for a job type"""
+    def decorator(f):
+        HANDLERS[job_type] = f
+        return f
+    return decorator
+
+
+class JobContext:
+    """Everything a handler needs to do its work outside of a request"""
+
+    def __init__(self, db, mailer, config, cache=None, tenants=None):
+        self.db = db
+        self.mailer = mailer
+        self.config = config
+        self.cache = cache
+        self.tenants = tenants
+        self.queue = None
+
+    def restaurant_db(self, restaurant_id):
+        """Database holding a restaurant's menu, orders and reservations"""
+        if self.tenants is None or restaurant_id is None:
+            return self.db
+        return self.tenants.database(restaurant_id)
+
+    def restaurants(self, restaurant_id=None):
+        """(restaurant id, database) pairs for one restaurant, or all of them"""
+        if restaurant_id is not None:
+            return [(restaurant_id, self.restaurant_db(restaurant_id))]
+        if self.tenants is None:
+            return [(self.config['DEFAULT_RESTAURANT_ID'], self.db)]
+        return [(tenant.id, tenant.db) for tenant in self.tenants.all()]
+
+
+class JobQueue:
+    def __init__(self, db, max_attempts=5, backoff_base=5, backoff_cap=3600,
+                 lock_timeout=300, eager=False, context=None, timeout=None, handlers=None):
+        self.db = db
+        self.jobs = db.jobs
+        self.dead = db.jobs_dead
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.lock_timeout = lock_timeout
+        self.eager = eager
+        self.context = context
+        # Per-job database time budget, replacing the client's request-sized timeoutMS
+        self.timeout = timeout
+        # Module registering the handlers; imported when the first job runs, so
+        # web processes that only enqueue never load it
+        self.handlers = handlers
+        self.schedules = {}
+        if context is not None:
+            context.queue = self
+
+    def ensure_indexes(self):
+        self.jobs.create_index([('status', ASCENDING), ('run_at', ASCENDING)])
+        # Finished jobs are only kept around long enough to feed the metrics
+        self.jobs.create_index('completed_at', expireAfterSeconds=24 * 3600)
+
+    def enqueue(self, job_type, payload=None, delay=0, max_attempts=None):
+        now = datetime.utcnow()
+        job = {
+            '_id': str(uuid.uuid4()),
+            'type': job_type,
+            'payload': payload or {},
+            'status': 'queued',
+            'attempts': 0,
+            'max_attempts': max_attempts or self.max_attempts,
+            'enqueued_at': now,
+            'run_at': now + timedelta(seconds=delay)
+        }
+
+        if self.eager:
+            # Run inline (tests and single-process development setups)
+            job['status'] = 'running'
+            job['attempts'] = 1
+            job['locked_at'] = now
+            self.jobs.insert_one(job)
+            self.process(job)
+        else:
+            self.jobs.insert_one(job)
+
+        return job['_id']
+
+    def enqueue_many(self, job_type, payloads):
+        """Enqueue one job per payload with a single insert"""
+        if not payloads:
+            return []
+        if self.eager:
+            return [self.enqueue(job_type, payload) for payload in payloads]
+
+        now = datetime.utcnow()
+        jobs = [{
+            '_id': str(uuid.uuid4()),
+            'type': job_type,
+            'payload': payload,
+            'status': 'queued',
+            'attempts': 0,
+            'max_attempts': self.max_attempts,
+            'enqueued_at': now,
+            'run_at': now
+        } for payload in payloads]
+        self.jobs.insert_many(jobs, ordered=False)
+        return [job['_id'] for job in jobs]
+
+    def schedule(self, job_type, interval, payload=None):
+        """Run `job_type` every `interval` seconds (picked up by run_worker)"""
+        self.schedules[job_type] = (interval, payload or {})
+
+    def enqueue_due(self):
+        now = datetime.utcnow()
+        enqueued = []
+
+        for job_type, (interval, payload) in self.schedules.items():
+            try:
+                self.db.jobs_schedule.update_one(
+                    {'_id': job_type},
+                    {'$setOnInsert': {'next_run': now}},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                pass  # another worker created it first
+
+            # Only one worker wins the slot, so each run is enqueued once
+            slot = self.db.jobs_schedule.find_one_and_update(
+                {'_id': job_type, 'next_run': {'$lte': now}},
+                {'$set': {'next_run': now + timedelta(seconds=interval), 'last_run': now}}
+            )
+            if slot:
+                self.enqueue(job_type, payload)
+                enqueued.append(job_type)
+
+        return enqueued
+
+    def claim(self, worker_id):
+        now = datetime.utcnow()
+        return self.jobs.find_one_and_update(
+            {'status': 'queued', 'run_at': {'$lte': now}},
+            {
+                '$set': {'status': 'running', 'locked_by': worker_id, 'locked_at': now},
+                '$inc': {'attempts': 1}
+            },
+            sort=[('run_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def process(self, job):
+        if self.handlers:
+            import_module(self.handlers)
+        handler = HANDLERS.get(job['type'])
+
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type '{job['type']}'")
+            with pymongo.timeout(self.timeout):
+                handler(self.context, job['payload'])
+        except Exception:
+            self.fail(job, traceback.format_exc())
+            return False
+
+        self.complete(job)
+        return True
+
+    def complete(self, job):
+        now = datetime.utcnow()
+        latency = (now - job['enqueued_at']).total_seconds() * 1000
+        self.jobs.update_one(
+            {'_id': job['_id']},
+            {
+                '$set': {'status': 'done', 'completed_at': now, 'latency_ms': latency},
+                '$unset': {'locked_by': '', 'locked_at': ''}
+            }
+        )
+
+    def fail(self, job, error):
+        if job['attempts'] >= job['max_attempts']:
+            job = dict(job, status='dead', last_error=error, failed_at=datetime.utcnow())
+            self.dead.insert_one(job)
+            self.jobs.delete_one({'_id': job['_id']})
+            return
+
+        delay = min(self.backoff_base * 2 ** (job['attempts'] - 1), self.backoff_cap)
+        self.jobs.update_one(
+            {'_id': job['_id']},
+            {
+                '$set': {
+                    'status': 'queued',
+                    'last_error': error,
+                    'run_at': datetime.utcnow() + timedelta(seconds=delay)
+                },
+                '$unset': {'locked_by': '', 'locked_at': ''}
+            }
+        )
+
+    def requeue_stale(self):
+        # Jobs whose worker died mid-run are handed back to the queue
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lock_timeout)
+        result = self.jobs.update_many(
+            {'status': 'running', 'locked_at': {'$lt': cutoff}},
+            {
+                '$set': {'status': 'queued', 'run_at': datetime.utcnow()},
+                '$unset': {'locked_by': '', 'locked_at': ''}
+            }
+        )
+        return result.modified_count
+
+    def retry_dead(self, job_id):
+        job = self.dead.find_one({'_id': job_id})
+        if not job:
+            return False
+
+        job.update(status='queued', attempts=0, run_at=datetime.utcnow())
+        job.pop('failed_at', None)
+        self.jobs.insert_one(job)
+        self.dead.delete_one({'_id': job_id})
+        return True
+
+    def stats(self):
+        now = datetime.utcnow()
+
+        counts = {'queued': 0, 'running': 0, 'done': 0}
+        for row in self.jobs.aggregate([{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]):
+            counts[row['_id']] = row['count']
+
+        due = self.jobs.count_documents({'status': 'queued', 'run_at': {'$lte': now}})
+        oldest = self.jobs.find_one(
+            {'status': 'queued', 'run_at': {'$lte': now}},
+            sort=[('run_at', ASCENDING)]
+        )
+
+        latency = list(self.jobs.aggregate([
+            {'$match': {'status': 'done', 'completed_at': {'$gte': now - timedelta(hours=1)}}},
+            {'$group': {
+                '_id': None,
+                'avg': {'$avg': '$latency_ms'},
+                'max': {'$max': '$latency_ms'},
+                'count': {'$sum': 1}
+            }}
+        ]))
+        latency = latency[0] if latency else {'avg': 0, 'max': 0, 'count': 0}
+
+        return {
+            'depth': due,
+            'queued': counts['queued'],
+            'running': counts['running'],
+            'done': counts['done'],
+            'dead': self.dead.count_documents({}),
+            'oldest_wait_seconds': (now - oldest['run_at']).total_seconds() if oldest else 0,
+            'latency_ms': {
+                'avg': round(latency['avg'] or 0, 1),
+                'max': round(latency['max'] or 0, 1),
+                'completed_last_hour': latency['count']
+            }
+        }
+
+
+def run_worker(queue, poll_interval=1.0, stop=None):
+    """Claim and process jobs until `stop` (a callable) returns True"""
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    last_sweep = 0
+    last_schedule_check = 0
+
+    while not (stop and stop()):
+        if time.monotonic() - last_sweep > queue.lock_timeout:
+            queue.requeue_stale()
+            last_sweep = time.monotonic()
+
+        if queue.schedules and time.monotonic() - last_schedule_check > 30:
+            queue.enqueue_due()
+            last_schedule_check = time.monotonic()
+
+        job = queue.claim(worker_id)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        queue.process(job)
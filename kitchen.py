@@ -0,0 +1,105 @@
+"""
+Order status state machine and kitchen display queue
+
+Orders move pending -> (confirmed ->) preparing -> ready -> delivered and can
+be cancelled until they are delivered. Transitions are applied with a single
+conditional update, so two staff members acting on the same order cannot both
+win, and a client that sends the order `version` it saw cannot overwrite a
+change it has not seen. Active orders carry `active: True`, which a partial
+index covers, so the kitchen queue query stays small no matter how much order
+history exists.
+"""
+
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from concurrency import VersionConflict, version_filter
+
+# Allowed previous statuses for each target status
+ORDER_TRANSITIONS = {
+    'confirmed': ['pending'],
+    'preparing': ['pending', 'confirmed'],
+    'ready': ['preparing'],
+    'delivered': ['ready'],
+    'cancelled': ['pending', 'confirmed', 'preparing', 'ready']
+}
+
+ACTIVE_STATUSES = ['pending', 'confirmed', 'preparing', 'ready']
+
+KITCHEN_PROJECTION = {
+    'items.name': 1,
+    'items.quantity': 1,
+    'notes': 1,
+    'status': 1,
+    'priority': 1,
+    'order_date': 1
+}
+
+
+def ensure_indexes(db):
+    db.orders.create_index(
+        [('restaurant_id', ASCENDING), ('priority', DESCENDING), ('order_date', ASCENDING)],
+        name='kitchen_queue',
+        partialFilterExpression={'active': True}
+    )
+    # Orders created before the state machine existed
+    db.orders.update_many(
+        {'active': {'$exists': False}},
+        [{'$set': {'active': {'$in': ['$status', ACTIVE_STATUSES]}}}]
+    )
+
+
+class InvalidTransition(Exception):
+    def __init__(self, current, target):
+        super().__init__(f"Cannot change order from '{current}' to '{target}'")
+        self.current = current
+        self.target = target
+
+
+def transition_order(db, restaurant_id, order_id, status, version=None):
+    """Atomically move an order to `status`; returns the order as it was before, or None if missing
+
+    With `version`, the order is only changed if it is still at that version.
+    """
+    if status not in ORDER_TRANSITIONS:
+        raise InvalidTransition(None, status)
+
+    query = {'_id': order_id, 'restaurant_id': restaurant_id, 'status': {'$in': ORDER_TRANSITIONS[status]}}
+    if version is not None:
+        query.update(version_filter(version))
+
+    now = datetime.utcnow()
+    previous = db.orders.find_one_and_update(
+        query,
+        {
+            '$set': {
+                'status': status,
+                'active': status in ACTIVE_STATUSES,
+                'status_updated_at': now
+            },
+            '$inc': {'version': 1},
+            '$push': {'status_history': {'status': status, 'at': now}}
+        },
+        projection={'user_id': 1, 'status': 1, 'version': 1},
+        return_document=ReturnDocument.BEFORE
+    )
+
+    if previous is None:
+        current = db.orders.find_one({'_id': order_id, 'restaurant_id': restaurant_id}, {'status': 1, 'version': 1})
+        if current is None:
+            return None
+        if version is not None and current.get('version', 0) != version:
+            raise VersionConflict(current)
+        raise InvalidTransition(current['status'], status)
+
+    return previous
+
+
+def kitchen_queue(db, restaurant_id, limit=50):
+    """Active orders, rush orders first, then oldest first"""
+    return list(
+        db.orders.find({'restaurant_id': restaurant_id, 'active': True}, KITCHEN_PROJECTION)
+        .sort([('priority', DESCENDING), ('order_date', ASCENDING)])
+        .limit(limit)
+    )
@@ -0,0 +1,59 @@
+"""
+Outgoing email backends for the Restaurant Management System
+"""
+
+
+class SMTPMailer:
+    """Sends messages through the SMTP server configured by MAIL_* settings"""
+
+    def __init__(self, config):
+        self.server = config.get('MAIL_SERVER', 'localhost')
+        self.port = config.get('MAIL_PORT', 25)
+        self.use_tls = config.get('MAIL_USE_TLS', False)
+        self.username = config.get('MAIL_USERNAME')
+        self.password = config.get('MAIL_PASSWORD')
+        self.sender = config.get('MAIL_DEFAULT_SENDER', 'no-reply@savory.com')
+        self.timeout = config.get('MAIL_TIMEOUT', 10)
+
+    def send(self, to, subject, body):
+        # Only job workers send mail, so web processes never load these
+        import smtplib
+        from email.message import EmailMessage
+
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = to
+        message['Subject'] = subject
+        message.set_content(body)
+
+        with smtplib.SMTP(self.server, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+class MemoryMailer:
+    """Local SMTP stand-in that keeps sent messages in an in-process outbox"""
+
+    def __init__(self, config=None):
+        self.sender = (config or {}).get('MAIL_DEFAULT_SENDER', 'no-reply@savory.com')
+        self.outbox = []
+
+    def send(self, to, subject, body):
+        self.outbox.append({
+            'from': self.sender,
+            'to': to,
+            'subject': subject,
+            'body': body
+        })
+
+
+def create_mailer(config):
+    # TESTING always uses the in-memory outbox so no real mail leaves the box
+    backend = 'memory' if config.get('TESTING') else config.get('MAIL_BACKEND', 'smtp')
+
+    if backend == 'memory':
+        return MemoryMailer(config)
+    return SMTPMailer(config)
@@ -0,0 +1,141 @@
+"""
+Menu image upload pipeline for the Restaurant Management System
+
+Uploads are streamed to disk under a content-hashed name, then resized into
+WebP/JPEG variants at several widths in a background process pool. Variant
+files never change once written, so they can be served with immutable cache
+headers.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime
+
+ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
+VARIANT_FORMATS = ('webp', 'jpeg')
+CHUNK_SIZE = 64 * 1024
+
+_executor = None
+
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def save_upload(stream, filename, dest_dir):
+    """Stream an upload to disk, returning (digest, stored filename)"""
+    os.makedirs(dest_dir, exist_ok=True)
+    ext = filename.rsplit('.', 1)[1].lower()
+    sha = hashlib.sha256()
+
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                sha.update(chunk)
+                out.write(chunk)
+
+        digest = sha.hexdigest()[:20]
+        stored_name = f'{digest}.{ext}'
+        os.replace(tmp_path, os.path.join(dest_dir, stored_name))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return digest, stored_name
+
+
+def render_variants(source_path, dest_dir, digest, widths):
+    """Resize an image into every width/format pair (runs in a worker process)"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    # Never upscale; always produce at least one variant
+    targets = [w for w in sorted(widths) if w <= image.width] or [image.width]
+
+    for width in targets:
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        resized.save(os.path.join(dest_dir, f'{digest}-{width}.webp'), 'WEBP', quality=80, method=6)
+        resized.save(os.path.join(dest_dir, f'{digest}-{width}.jpg'), 'JPEG', quality=80,
+                     optimize=True, progressive=True)
+
+    return {'hash': digest, 'widths': targets, 'formats': list(VARIANT_FORMATS)}
+
+
+def get_executor(max_workers=2):
+    global _executor
+    if _executor is None:
+        # Only processes that receive an upload need the multiprocessing machinery
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        _executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _executor
+
+
+def process_upload(db, source_path, dest_dir, digest, widths, max_workers=2, on_ready=None):
+    """Queue variant generation and record the result in the `media` collection"""
+    existing = db.media.find_one({'_id': digest})
+    if existing and existing['status'] in ('processing', 'ready'):
+        return existing
+
+    media = {
+        '_id': digest,
+        'source': os.path.basename(source_path),
+        'status': 'processing',
+        'created_at': datetime.utcnow()
+    }
+    db.media.replace_one({'_id': digest}, media, upsert=True)
+
+    def on_done(future):
+        try:
+            variants = future.result()
+        except Exception as e:
+            db.media.update_one({'_id': digest}, {'$set': {'status': 'failed', 'error': str(e)}})
+            return
+
+        db.media.update_one({'_id': digest}, {'$set': {'status': 'ready', 'variants': variants}})
+        # Items saved before processing finished pick up their variants now
+        db.menu_items.update_many({'image_hash': digest}, {'$set': {'image_variants': variants}})
+        if on_ready:
+            on_ready()
+
+    future = get_executor(max_workers).submit(render_variants, source_path, dest_dir, digest, widths)
+    future.add_done_callback(on_done)
+    return media
+
+
+def variants_for(db, digest):
+    if not digest:
+        return None
+    media = db.media.find_one({'_id': digest, 'status': 'ready'})
+    return media['variants'] if media else None
+
+
+def build_srcset(item, media_url='/media/menu'):
+    """srcset strings per format for a menu item, or None if it has no variants"""
+    variants = item.get('image_variants')
+    if variants:
+        ext = {'webp': 'webp', 'jpeg': 'jpg'}
+        return {
+            fmt: ', '.join(f"{media_url}/{variants['hash']}-{w}.{ext[fmt]} {w}w" for w in variants['widths'])
+            for fmt in variants['formats']
+        }
+
+    # Pexels can resize on the fly, so seeded images get a srcset too
+    image = item.get('image') or ''
+    if 'images.pexels.com' in image:
+        base = re.sub(r'([?&])w=\d+&?', r'\1', image).rstrip('?&')
+        sep = '&' if '?' in base else '?'
+        return {'jpeg': ', '.join(f'{base}{sep}w={w} {w}w' for w in (160, 320, 640, 960))}
+
+    return None
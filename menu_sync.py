@@ -0,0 +1,77 @@
+"""
+Menu change log for delta sync
+
+Every menu write records the touched item ids under a new, monotonically
+increasing menu version (one sequence per restaurant). Clients that already hold the menu at some version
+ask for the changes since then instead of downloading the whole menu again.
+"""
+
+from datetime import datetime
+
+from pymongo import ASCENDING, ReturnDocument
+
+# Change log entries older than this are dropped; clients further behind resync fully
+CHANGE_LOG_TTL = 30 * 24 * 3600
+
+
+def ensure_indexes(db):
+    db.menu_changes.create_index('at', expireAfterSeconds=CHANGE_LOG_TTL)
+    db.menu_changes.create_index([('restaurant_id', ASCENDING), ('version', ASCENDING)], unique=True)
+
+
+def current_version(db, restaurant_id):
+    counter = db.counters.find_one({'_id': f'menu_version:{restaurant_id}'})
+    return counter['seq'] if counter else 0
+
+
+def record_change(db, restaurant_id, item_ids, op='upsert'):
+    """Log a change to one or more menu items; op is 'upsert' or 'delete'"""
+    if isinstance(item_ids, str):
+        item_ids = [item_ids]
+    if not item_ids:
+        return current_version(db, restaurant_id)
+
+    counter = db.counters.find_one_and_update(
+        {'_id': f'menu_version:{restaurant_id}'},
+        {'$inc': {'seq': 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    db.menu_changes.insert_one({
+        '_id': f"{restaurant_id}:{counter['seq']}",
+        'restaurant_id': restaurant_id,
+        'version': counter['seq'],
+        'item_ids': list(item_ids),
+        'op': op,
+        'at': datetime.utcnow()
+    })
+    return counter['seq']
+
+
+def changes_since(db, restaurant_id, since):
+    """Return (version, changed item ids, deleted item ids), or None if a full resync is needed"""
+    latest = current_version(db, restaurant_id)
+
+    if not since or since > latest:
+        return None
+    if since == latest:
+        return since, [], []
+
+    version = since
+    latest_op = {}
+    changes = db.menu_changes.find({'restaurant_id': restaurant_id, 'version': {'$gt': since}})
+    for change in changes.sort('version', 1):
+        # Stop at a gap: either the log was trimmed past `since`, or a writer
+        # has taken a version number but not logged its change yet
+        if change['version'] != version + 1:
+            break
+        version = change['version']
+        for item_id in change['item_ids']:
+            latest_op[item_id] = change['op']
+
+    if version == since:
+        return None  # nothing usable after `since`, so resync from scratch
+
+    changed = [item_id for item_id, op in latest_op.items() if op == 'upsert']
+    deleted = [item_id for item_id, op in latest_op.items() if op == 'delete']
+    return version, changed, deleted
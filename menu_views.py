@@ -0,0 +1,273 @@
+"""
+Menu routes: browsing, delta sync for offline clients and admin editing
+"""
+
+from flask import Blueprint, request, jsonify, url_for, g
+from datetime import datetime
+import uuid
+import os
+from cache import cached
+import analytics
+import menu_sync
+from media import allowed_file, save_upload, process_upload, variants_for, build_srcset
+from core import app, cache, admin_required, error_response, register_bootstrap_section
+
+bp = Blueprint('menu', __name__, url_prefix='/api')
+
+def menu_query(tenant, category=None, search=None):
+    query = {'restaurant_id': tenant.id, 'available': True}
+    
+    if category and category != 'all':
+        query['category'] = category
+        
+    if search:
+        query['$or'] = [
+            {'name': {'$regex': search, '$options': 'i'}},
+            {'description': {'$regex': search, '$options': 'i'}}
+        ]
+    
+    return query
+
+def fetch_menu(tenant, category=None, search=None):
+    menu_items = list(tenant.db.menu_items.find(menu_query(tenant, category, search)))
+    
+    # Convert ObjectId to string for JSON serialization
+    for item in menu_items:
+        item['_id'] = str(item['_id'])
+        item['srcset'] = build_srcset(item)
+    
+    return menu_items
+
+@bp.route('/menu', methods=['GET'])
+@cached(cache, tags=['menu'], query_args=('category', 'search'))
+def get_menu():
+    try:
+        category = request.args.get('category')
+        search = request.args.get('search')
+        
+        return jsonify(fetch_menu(g.tenant, category, search)), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+def fetch_popular_menu(tenant):
+    popular_items = []
+    
+    if app.config['POPULAR_MENU_SOURCE'] == 'sales':
+        # Rank by recent sales, then top up with admin-picked items if too few have sold
+        ranked_ids = analytics.popular_item_ids(tenant.db, tenant.id, app.config['POPULAR_MENU_DAYS'], limit=12)
+        items = {
+            item['_id']: item
+            for item in tenant.db.menu_items.find({
+                'restaurant_id': tenant.id,
+                '_id': {'$in': ranked_ids},
+                'available': True
+            })
+        }
+        popular_items = [items[item_id] for item_id in ranked_ids if item_id in items][:6]
+    
+    if len(popular_items) < 6:
+        popular_items += list(tenant.db.menu_items.find({
+            'restaurant_id': tenant.id,
+            'popular': True,
+            'available': True,
+            '_id': {'$nin': [item['_id'] for item in popular_items]}
+        }).limit(6 - len(popular_items)))
+    
+    for item in popular_items:
+        item['_id'] = str(item['_id'])
+        item['srcset'] = build_srcset(item)
+    
+    return popular_items
+
+@bp.route('/menu/popular', methods=['GET'])
+@cached(cache, tags=['menu', 'analytics'])
+def get_popular_menu():
+    try:
+        return jsonify(fetch_popular_menu(g.tenant)), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/menu/changes', methods=['GET'])
+@cached(cache, tags=['menu'], query_args=('since', 'restaurant_id'))
+def get_menu_changes():
+    try:
+        since = request.args.get('since', type=int)
+        
+        # A menu stored for another restaurant cannot be patched up
+        if request.args.get('restaurant_id', g.tenant.id) != g.tenant.id:
+            since = None
+        
+        # Read the version before the items so nothing written meanwhile is skipped
+        version = menu_sync.current_version(g.tenant.db, g.tenant.id)
+        delta = menu_sync.changes_since(g.tenant.db, g.tenant.id, since)
+        
+        if delta is None:
+            return jsonify({
+                'restaurant_id': g.tenant.id,
+                'version': version,
+                'full': True,
+                'items': fetch_menu(g.tenant)
+            }), 200
+        
+        version, changed, deleted = delta
+        upserts = []
+        
+        for item in g.tenant.db.menu_items.find({'restaurant_id': g.tenant.id, '_id': {'$in': changed}}):
+            # Items that went unavailable disappear from the customer menu
+            if not item.get('available'):
+                deleted.append(item['_id'])
+                continue
+            item['_id'] = str(item['_id'])
+            item['srcset'] = build_srcset(item)
+            upserts.append(item)
+        
+        found = {item['_id'] for item in upserts} | set(deleted)
+        deleted.extend(item_id for item_id in changed if item_id not in found)
+        
+        return jsonify({
+            'restaurant_id': g.tenant.id,
+            'version': version,
+            'full': False,
+            'upserts': upserts,
+            'deletes': deleted
+        }), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/menu', methods=['POST'])
+@admin_required
+def add_menu_item(current_user):
+    try:
+        data = request.get_json()
+        
+        required_fields = ['name', 'category', 'description', 'price']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        menu_item_id = str(uuid.uuid4())
+        new_item = {
+            '_id': menu_item_id,
+            'restaurant_id': g.tenant.id,
+            'name': data['name'],
+            'category': data['category'],
+            'description': data['description'],
+            'price': float(data['price']),
+            'image': data.get('image', ''),
+            'image_hash': data.get('image_hash'),
+            'image_variants': variants_for(g.tenant.db, data.get('image_hash')),
+            'available': data.get('available', True),
+            'popular': data.get('popular', False),
+            'created_at': datetime.utcnow()
+        }
+        
+        g.tenant.db.menu_items.insert_one(new_item)
+        new_item['_id'] = str(new_item['_id'])
+        menu_sync.record_change(g.tenant.db, g.tenant.id, menu_item_id)
+        cache.invalidate('menu')
+        
+        return jsonify(new_item), 201
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/menu/upload', methods=['POST'])
+@admin_required
+def upload_menu_image(current_user):
+    try:
+        file = request.files.get('image')
+        
+        if not file or not file.filename:
+            return jsonify({'error': 'image is required'}), 400
+        
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Unsupported image type'}), 400
+        
+        dest_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'menu')
+        digest, stored_name = save_upload(file.stream, file.filename, dest_dir)
+        tenant = g.tenant
+        
+        def on_ready():
+            # Items already using this image just gained their variants
+            item_ids = [
+                item['_id']
+                for item in tenant.db.menu_items.find({'restaurant_id': tenant.id, 'image_hash': digest}, {'_id': 1})
+            ]
+            menu_sync.record_change(tenant.db, tenant.id, item_ids)
+            cache.invalidate('menu', scope=tenant.id)
+        
+        media = process_upload(
+            tenant.db,
+            os.path.join(dest_dir, stored_name),
+            dest_dir,
+            digest,
+            app.config['MEDIA_WIDTHS'],
+            app.config['MEDIA_WORKERS'],
+            on_ready=on_ready
+        )
+        
+        return jsonify({
+            'image': url_for('media_file', filename=stored_name),
+            'image_hash': digest,
+            'status': media['status']
+        }), 201
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/menu/<item_id>', methods=['PUT'])
+@admin_required
+def update_menu_item(current_user, item_id):
+    try:
+        data = request.get_json()
+        
+        update_data = {
+            'name': data['name'],
+            'category': data['category'],
+            'description': data['description'],
+            'price': float(data['price']),
+            'image': data.get('image', ''),
+            'image_hash': data.get('image_hash'),
+            'image_variants': variants_for(g.tenant.db, data.get('image_hash')),
+            'available': data.get('available', True),
+            'popular': data.get('popular', False)
+        }
+        
+        result = g.tenant.db.menu_items.update_one(
+            {'_id': item_id, 'restaurant_id': g.tenant.id},
+            {'$set': update_data}
+        )
+        
+        if result.modified_count:
+            menu_sync.record_change(g.tenant.db, g.tenant.id, item_id)
+            cache.invalidate('menu')
+            return jsonify({'message': 'Menu item updated successfully'}), 200
+        else:
+            return jsonify({'error': 'Menu item not found'}), 404
+            
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/menu/<item_id>', methods=['DELETE'])
+@admin_required
+def delete_menu_item(current_user, item_id):
+    try:
+        result = g.tenant.db.menu_items.delete_one({'_id': item_id, 'restaurant_id': g.tenant.id})
+        
+        if result.deleted_count:
+            menu_sync.record_change(g.tenant.db, g.tenant.id, item_id, op='delete')
+            cache.invalidate('menu')
+            return jsonify({'message': 'Menu item deleted successfully'}), 200
+        else:
+            return jsonify({'error': 'Menu item not found'}), 404
+            
+    except Exception as e:
+        return error_response(e)
+
+register_bootstrap_section('menu', lambda tenant, user: fetch_menu(tenant), tags=lambda user: ['menu'])
+register_bootstrap_section(
+    'popular', lambda tenant, user: fetch_popular_menu(tenant), tags=lambda user: ['menu', 'analytics']
+)
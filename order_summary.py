@@ -0,0 +1,168 @@
+"""
+Per-customer order summaries
+
+Each customer has one `order_summaries` document per restaurant holding their
+order count, lifetime spend, most recent order and how many of each item they
+have ordered. It is updated as orders are placed and cancelled, so the
+profile page reads a single document instead of the whole order history.
+Cancelled orders do not count towards the totals.
+
+A missing summary is rebuilt from the customer's order history on first
+read. A rebuild never overwrites an existing summary, since that could lose
+updates made while it was reading. Run `python init_data.py --migrate` once
+when deploying, before new orders come in, so customers whose first action
+afterwards is a new order keep their earlier history.
+"""
+
+import re
+from datetime import datetime
+
+from pymongo import ReturnDocument
+
+FAVORITE_ITEMS = 3
+
+
+def summary_id(restaurant_id, user_id):
+    return f'{restaurant_id}:{user_id}'
+
+
+def _item_key(item):
+    # Item ids come from the client; keep them usable as a field name
+    return re.sub(r'[^\w-]', '_', str(item.get('id') or item.get('_id') or item.get('name')))
+
+
+def _last_order(order):
+    return {
+        '_id': order['_id'],
+        'order_date': order['order_date'],
+        'total': order['total'],
+        'status': order['status']
+    }
+
+
+def _apply(db, restaurant_id, user_id, items, total, sign):
+    quantities = {}
+    names = {}
+    for item in items:
+        key = _item_key(item)
+        quantities[key] = quantities.get(key, 0) + item.get('quantity', 1)
+        names[key] = item.get('name')
+
+    inc = {'order_count': sign, 'total_spent': sign * total}
+    updates = {'updated_at': datetime.utcnow()}
+    for key, quantity in quantities.items():
+        inc[f'items.{key}.quantity'] = sign * quantity
+        updates[f'items.{key}.name'] = names[key]
+
+    db.order_summaries.update_one(
+        {'_id': summary_id(restaurant_id, user_id)},
+        {
+            '$inc': inc,
+            '$set': updates,
+            '$setOnInsert': {'restaurant_id': restaurant_id, 'user_id': user_id}
+        },
+        upsert=True
+    )
+
+
+def record_order(db, order):
+    """Count a newly placed order"""
+    _apply(db, order['restaurant_id'], order['user_id'], order['items'], order['total'], 1)
+    db.order_summaries.update_one(
+        {
+            '_id': summary_id(order['restaurant_id'], order['user_id']),
+            '$or': [
+                {'last_order': {'$exists': False}},
+                {'last_order.order_date': {'$lte': order['order_date']}}
+            ]
+        },
+        {'$set': {'last_order': _last_order(order)}}
+    )
+
+
+def record_status_change(db, restaurant_id, order_id, user_id, status):
+    """Reflect a status transition (made atomically by kitchen.transition_order)"""
+    if status == 'cancelled':
+        order = db.orders.find_one({'_id': order_id, 'restaurant_id': restaurant_id}, {'items': 1, 'total': 1})
+        if order:
+            _apply(db, restaurant_id, user_id, order['items'], order['total'], -1)
+
+    db.order_summaries.update_one(
+        {'_id': summary_id(restaurant_id, user_id), 'last_order._id': order_id},
+        {'$set': {'last_order.status': status}}
+    )
+
+
+def rebuild_summary(db, restaurant_id, user_id):
+    """Compute a customer's summary from their live and archived orders and store it
+    unless one exists; returns the stored summary"""
+    query = {'restaurant_id': restaurant_id, 'user_id': user_id}
+    counted = dict(query, status={'$ne': 'cancelled'})
+
+    summary = {
+        'restaurant_id': restaurant_id,
+        'user_id': user_id,
+        'order_count': 0,
+        'total_spent': 0,
+        'items': {},
+        'updated_at': datetime.utcnow()
+    }
+
+    for source in (db.orders, db.orders_archive):
+        for row in source.aggregate([
+            {'$match': counted},
+            {'$group': {'_id': None, 'order_count': {'$sum': 1}, 'total_spent': {'$sum': '$total'}}}
+        ]):
+            summary['order_count'] += row['order_count']
+            summary['total_spent'] += row['total_spent']
+
+        for row in source.aggregate([
+            {'$match': counted},
+            {'$unwind': '$items'},
+            {'$group': {'_id': '$items.id', 'name': {'$last': '$items.name'}, 'quantity': {'$sum': '$items.quantity'}}}
+        ]):
+            entry = summary['items'].setdefault(_item_key({'id': row['_id'], 'name': row['name']}), {
+                'name': row['name'],
+                'quantity': 0
+            })
+            entry['quantity'] += row['quantity']
+
+    for source in (db.orders, db.orders_archive):
+        last = next(iter(source.find(query).sort('order_date', -1).limit(1)), None)
+        if last and ('last_order' not in summary or last['order_date'] > summary['last_order']['order_date']):
+            summary['last_order'] = _last_order(last)
+
+    # A summary written meanwhile (by record_order or another rebuild) wins:
+    # replacing it could undo an $inc made after the reads above
+    return db.order_summaries.find_one_and_update(
+        {'_id': summary_id(restaurant_id, user_id)},
+        {'$setOnInsert': summary},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def rebuild_summaries(db, restaurant_id):
+    user_ids = set(db.orders.distinct('user_id', {'restaurant_id': restaurant_id}))
+    user_ids |= set(db.orders_archive.distinct('user_id', {'restaurant_id': restaurant_id}))
+    for user_id in user_ids:
+        rebuild_summary(db, restaurant_id, user_id)
+    return len(user_ids)
+
+
+def get_summary(db, restaurant_id, user_id):
+    summary = db.order_summaries.find_one({'_id': summary_id(restaurant_id, user_id)})
+    if summary is None:
+        summary = rebuild_summary(db, restaurant_id, user_id)
+
+    favorites = sorted(
+        ({'id': key, 'name': item['name'], 'quantity': item['quantity']}
+         for key, item in summary.get('items', {}).items() if item['quantity'] > 0),
+        key=lambda item: (-item['quantity'], item['name'] or '')
+    )
+    return {
+        'order_count': summary['order_count'],
+        'total_spent': round(summary['total_spent'], 2),
+        'last_order': summary.get('last_order'),
+        'favorite_items': favorites[:FAVORITE_ITEMS]
+    }
@@ -0,0 +1,287 @@
+"""
+Order and kitchen routes
+"""
+
+from flask import Blueprint, request, jsonify, g
+from pymongo.errors import PyMongoError, DuplicateKeyError
+from datetime import datetime
+from cache import cached
+from archive import fetch_archived, parse_cursor
+from kitchen import ORDER_TRANSITIONS, InvalidTransition, transition_order, kitchen_queue
+from concurrency import VersionConflict, parse_version, idempotent_id
+from resilience import CircuitOpenError, is_unavailable
+import order_summary
+from core import (
+    app, tenants, cache, job_queue, order_spool, breaker_for, token_required, admin_required,
+    error_response, order_cache_tags, attach_users, register_bootstrap_section
+)
+
+bp = Blueprint('orders', __name__, url_prefix='/api')
+
+# Items shown on each row of a customer's order history; the rest come from /api/orders/<id>
+PREVIEW_ITEMS = 3
+
+@bp.route('/orders', methods=['POST'])
+@token_required
+def create_order(current_user):
+    try:
+        data = request.get_json()
+        
+        required_fields = ['items', 'total', 'delivery_address']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        try:
+            order_id = idempotent_id(request.headers)
+        except ValueError:
+            return jsonify({'error': 'Idempotency-Key must be a UUID'}), 400
+        
+        new_order = {
+            '_id': order_id,
+            'restaurant_id': g.tenant.id,
+            'user_id': current_user['_id'],
+            'items': data['items'],
+            'total': float(data['total']),
+            'delivery_address': data['delivery_address'],
+            'notes': data.get('notes', ''),
+            'status': 'pending',
+            'active': True,
+            'priority': 0,
+            'version': 0,
+            'order_date': datetime.utcnow()
+        }
+        
+        try:
+            if g.get('degraded'):
+                raise CircuitOpenError('Database is unavailable')
+            g.tenant.db.orders.insert_one(new_order)
+        except DuplicateKeyError:
+            # A retry of an order that was already placed
+            existing = g.tenant.db.orders.find_one(
+                {'_id': order_id, 'restaurant_id': g.tenant.id, 'user_id': current_user['_id']}
+            )
+            if existing is None:
+                return jsonify({'error': 'Idempotency-Key already used'}), 409
+            return jsonify(existing), 200
+        except PyMongoError as e:
+            if not is_unavailable(e):
+                raise
+            # Accept the order now and write it once the database is back
+            order_spool.append({'restaurant_id': g.tenant.id, 'order': new_order})
+            order_spool.replay_in_background(replay_order, app.config['ORDER_SPOOL_REPLAY_INTERVAL'])
+            return jsonify({
+                **new_order,
+                'sync_status': 'accepted_pending',
+                'message': 'Your order has been received and will be confirmed shortly.'
+            }), 202
+        
+        order_summary.record_order(g.tenant.db, new_order)
+        new_order['_id'] = str(new_order['_id'])
+        cache.invalidate(f"orders:{current_user['_id']}", 'orders:all')
+        job_queue.enqueue('order_confirmation', {'order_id': order_id, 'restaurant_id': g.tenant.id})
+        
+        return jsonify(new_order), 201
+        
+    except Exception as e:
+        return error_response(e)
+
+def replay_order(record):
+    # Raises (keeping the order spooled) until the restaurant's database is reachable again
+    restaurant_id = record['restaurant_id']
+    order = record['order']
+    breaker_for(restaurant_id).check()
+    try:
+        tenants.get(restaurant_id).db.orders.insert_one(order)
+    except DuplicateKeyError:
+        return  # written by an earlier replay that was interrupted
+    order_summary.record_order(tenants.get(restaurant_id).db, order)
+    cache.invalidate(f"orders:{order['user_id']}", 'orders:all', scope=restaurant_id)
+    job_queue.enqueue('order_confirmation', {'order_id': order['_id'], 'restaurant_id': restaurant_id})
+
+def fetch_order_rows(tenant, current_user, limit=0):
+    """A customer's order history as compact rows: totals, status and a short item preview"""
+    pipeline = [
+        {'$match': {'restaurant_id': tenant.id, 'user_id': current_user['_id']}},
+        {'$sort': {'order_date': -1}}
+    ]
+    if limit:
+        pipeline.append({'$limit': limit})
+    pipeline.append({'$project': {
+        'order_date': 1,
+        'status': 1,
+        'total': 1,
+        'delivery_address': 1,
+        'item_count': {'$size': '$items'},
+        'items': {'$map': {
+            'input': {'$slice': ['$items', PREVIEW_ITEMS]},
+            'as': 'item',
+            'in': {'name': '$$item.name', 'quantity': '$$item.quantity', 'price': '$$item.price'}
+        }}
+    }})
+    return list(tenant.db.orders.aggregate(pipeline))
+
+def fetch_orders(tenant, current_user, limit=0, compact=True):
+    if current_user['role'] != 'admin' and compact:
+        return fetch_order_rows(tenant, current_user, limit)
+    
+    if current_user['role'] == 'admin':
+        # Admin can see all of the restaurant's orders
+        orders = list(tenant.db.orders.find({'restaurant_id': tenant.id}).sort('order_date', -1).limit(limit))
+        
+        # Populate user information for admin
+        attach_users(orders)
+    else:
+        # Regular users can only see their own orders
+        orders = list(
+            tenant.db.orders.find({'restaurant_id': tenant.id, 'user_id': current_user['_id']})
+            .sort('order_date', -1)
+            .limit(limit)
+        )
+    
+    for order in orders:
+        order['_id'] = str(order['_id'])
+    
+    return orders
+
+@bp.route('/orders', methods=['GET'])
+@token_required
+@cached(cache, tags=order_cache_tags, per_user=True, query_args=('view',))
+def get_orders(current_user):
+    try:
+        # Customers get compact rows unless they ask for ?view=full
+        compact = request.args.get('view') != 'full'
+        return jsonify(fetch_orders(g.tenant, current_user, compact=compact)), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/orders/<order_id>', methods=['GET'])
+@token_required
+def get_order(current_user, order_id):
+    try:
+        query = {'_id': order_id, 'restaurant_id': g.tenant.id}
+        if current_user['role'] != 'admin':
+            query['user_id'] = current_user['_id']
+        
+        order = g.tenant.db.orders.find_one(query)
+        if not order:
+            return jsonify({'error': 'Order not found'}), 404
+        
+        if current_user['role'] == 'admin':
+            attach_users([order])
+        
+        return jsonify(order), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/orders/archive', methods=['GET'])
+@token_required
+def get_archived_orders(current_user):
+    try:
+        before = parse_cursor(request.args.get('before'))
+        limit = min(int(request.args.get('limit', app.config['ITEMS_PER_PAGE'])), 100)
+        
+        query = {'restaurant_id': g.tenant.id}
+        if current_user['role'] != 'admin':
+            query['user_id'] = current_user['_id']
+        orders, next_before = fetch_archived(g.tenant.db.orders_archive, 'order_date', query, before, limit)
+        
+        if current_user['role'] == 'admin':
+            attach_users(orders)
+        
+        return jsonify({'orders': orders, 'next_before': next_before}), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid before or limit'}), 400
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/orders/<order_id>/status', methods=['PUT'])
+@admin_required
+def update_order_status(current_user, order_id):
+    try:
+        data = request.get_json()
+        
+        if 'status' not in data:
+            return jsonify({'error': 'Status is required'}), 400
+        
+        # 'pending' is only ever the starting status, so it is not a valid target
+        if data['status'] not in ORDER_TRANSITIONS:
+            return jsonify({'error': f"Status must be one of: {', '.join(ORDER_TRANSITIONS)}"}), 400
+        
+        try:
+            version = parse_version(data)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'version must be an integer'}), 400
+        
+        try:
+            order = transition_order(g.tenant.db, g.tenant.id, order_id, data['status'], version)
+        except InvalidTransition as e:
+            return jsonify({'error': str(e), 'current_status': e.current}), 409
+        except VersionConflict as e:
+            return jsonify({
+                'error': str(e),
+                'current_status': e.current['status'],
+                'version': e.current.get('version', 0)
+            }), 409
+        
+        if order:
+            order_summary.record_status_change(g.tenant.db, g.tenant.id, order_id, order['user_id'], data['status'])
+            cache.invalidate(f"orders:{order['user_id']}", 'orders:all')
+            return jsonify({
+                'message': 'Order status updated successfully',
+                'version': order.get('version', 0) + 1
+            }), 200
+        else:
+            return jsonify({'error': 'Order not found'}), 404
+            
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/orders/<order_id>/priority', methods=['PUT'])
+@admin_required
+def update_order_priority(current_user, order_id):
+    try:
+        data = request.get_json()
+        
+        if 'priority' not in data:
+            return jsonify({'error': 'Priority is required'}), 400
+        
+        # Only active orders are on the kitchen queue
+        result = g.tenant.db.orders.update_one(
+            {'_id': order_id, 'restaurant_id': g.tenant.id, 'active': True},
+            {'$set': {'priority': int(data['priority'])}}
+        )
+        
+        if result.matched_count:
+            return jsonify({'message': 'Order priority updated successfully'}), 200
+        else:
+            return jsonify({'error': 'Active order not found'}), 404
+            
+    except Exception as e:
+        return error_response(e)
+
+# Kitchen Routes
+@bp.route('/kitchen/queue', methods=['GET'])
+@admin_required
+def get_kitchen_queue(current_user):
+    try:
+        limit = min(request.args.get('limit', app.config['KITCHEN_QUEUE_LIMIT'], type=int), 200)
+        orders = kitchen_queue(g.tenant.db, g.tenant.id, limit)
+        
+        return jsonify({'orders': orders, 'server_time': datetime.utcnow()}), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+register_bootstrap_section('orders', fetch_orders, needs_auth=True, tags=order_cache_tags)
+register_bootstrap_section(
+    'recent_orders', lambda tenant, user: fetch_orders(tenant, user, limit=5), needs_auth=True,
+    tags=order_cache_tags
+)
+
+# Pick up orders spooled before a restart
+if order_spool.pending():
+    order_spool.replay_in_background(replay_order, app.config['ORDER_SPOOL_REPLAY_INTERVAL'])
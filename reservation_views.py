@@ -0,0 +1,158 @@
+"""
+Reservation routes
+"""
+
+from flask import Blueprint, request, jsonify, g
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+from archive import fetch_archived, parse_cursor
+from concurrency import parse_version, version_filter, idempotent_id
+from core import app, job_queue, token_required, admin_required, error_response, attach_users, register_bootstrap_section
+
+bp = Blueprint('reservations', __name__, url_prefix='/api')
+
+@bp.route('/reservations', methods=['POST'])
+@token_required
+def create_reservation(current_user):
+    try:
+        data = request.get_json()
+        
+        required_fields = ['date', 'time', 'guests']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        try:
+            reservation_id = idempotent_id(request.headers)
+        except ValueError:
+            return jsonify({'error': 'Idempotency-Key must be a UUID'}), 400
+        
+        new_reservation = {
+            '_id': reservation_id,
+            'restaurant_id': g.tenant.id,
+            'user_id': current_user['_id'],
+            'date': data['date'],
+            'time': data['time'],
+            'guests': int(data['guests']),
+            'notes': data.get('notes', ''),
+            'status': 'pending',
+            'version': 0,
+            'created_at': datetime.utcnow()
+        }
+        
+        try:
+            g.tenant.db.reservations.insert_one(new_reservation)
+        except DuplicateKeyError:
+            # A retry of a reservation that was already made
+            existing = g.tenant.db.reservations.find_one(
+                {'_id': reservation_id, 'restaurant_id': g.tenant.id, 'user_id': current_user['_id']}
+            )
+            if existing is None:
+                return jsonify({'error': 'Idempotency-Key already used'}), 409
+            return jsonify(existing), 200
+        
+        new_reservation['_id'] = str(new_reservation['_id'])
+        job_queue.enqueue('reservation_confirmation', {'reservation_id': reservation_id, 'restaurant_id': g.tenant.id})
+        
+        return jsonify(new_reservation), 201
+        
+    except Exception as e:
+        return error_response(e)
+
+def fetch_reservations(tenant, current_user):
+    if current_user['role'] == 'admin':
+        reservations = list(tenant.db.reservations.find({'restaurant_id': tenant.id}).sort('created_at', -1))
+        
+        # Populate user information for admin
+        attach_users(reservations)
+    else:
+        reservations = list(
+            tenant.db.reservations.find({'restaurant_id': tenant.id, 'user_id': current_user['_id']})
+            .sort('created_at', -1)
+        )
+    
+    for reservation in reservations:
+        reservation['_id'] = str(reservation['_id'])
+    
+    return reservations
+
+@bp.route('/reservations', methods=['GET'])
+@token_required
+def get_reservations(current_user):
+    try:
+        return jsonify(fetch_reservations(g.tenant, current_user)), 200
+        
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/reservations/archive', methods=['GET'])
+@token_required
+def get_archived_reservations(current_user):
+    try:
+        before = parse_cursor(request.args.get('before'))
+        limit = min(int(request.args.get('limit', app.config['ITEMS_PER_PAGE'])), 100)
+        
+        query = {'restaurant_id': g.tenant.id}
+        if current_user['role'] != 'admin':
+            query['user_id'] = current_user['_id']
+        reservations, next_before = fetch_archived(
+            g.tenant.db.reservations_archive, 'created_at', query, before, limit
+        )
+        
+        if current_user['role'] == 'admin':
+            attach_users(reservations)
+        
+        return jsonify({'reservations': reservations, 'next_before': next_before}), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid before or limit'}), 400
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/reservations/<reservation_id>/status', methods=['PUT'])
+@admin_required
+def update_reservation_status(current_user, reservation_id):
+    try:
+        data = request.get_json()
+        
+        if 'status' not in data:
+            return jsonify({'error': 'Status is required'}), 400
+        
+        try:
+            version = parse_version(data)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'version must be an integer'}), 400
+        
+        query = {'_id': reservation_id, 'restaurant_id': g.tenant.id}
+        if version is not None:
+            query.update(version_filter(version))
+        
+        reservation = g.tenant.db.reservations.find_one_and_update(
+            query,
+            {'$set': {'status': data['status']}, '$inc': {'version': 1}},
+            projection={'version': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if reservation:
+            return jsonify({
+                'message': 'Reservation status updated successfully',
+                'version': reservation['version']
+            }), 200
+        
+        current = g.tenant.db.reservations.find_one(
+            {'_id': reservation_id, 'restaurant_id': g.tenant.id}, {'status': 1, 'version': 1}
+        )
+        if current is None:
+            return jsonify({'error': 'Reservation not found'}), 404
+        return jsonify({
+            'error': 'Modified by someone else; reload and try again',
+            'current_status': current['status'],
+            'version': current.get('version', 0)
+        }), 409
+            
+    except Exception as e:
+        return error_response(e)
+
+register_bootstrap_section('reservations', fetch_reservations, needs_auth=True)
@@ -0,0 +1,302 @@
+"""
+Graceful degradation when MongoDB is slow or unavailable
+
+Every client gets bounded timeouts (`timeoutMS`, which also sends `maxTimeMS`
+with each operation) and a circuit breaker fed by pymongo's monitoring
+events. Once too many operations in a window fail with timeouts or network
+errors, or the cluster has no writable primary, the breaker opens: requests
+stop waiting on the database, cached views fall back to their last-known-good
+responses and new orders are spooled to local disk and replayed once the
+breaker closes again. After `reset_timeout` seconds one trial request is let
+through; its outcome closes or re-opens the breaker.
+"""
+
+import glob
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from bson import json_util
+from pymongo import monitoring
+from pymongo.errors import ConnectionFailure, OperationFailure
+
+from write_buffer import journal_claimable
+
+# Server error codes meaning "not now" rather than "bad request"
+UNAVAILABLE_CODES = {
+    6,      # HostUnreachable
+    7,      # HostNotFound
+    50,     # MaxTimeMSExpired
+    89,     # NetworkTimeout
+    91,     # ShutdownInProgress
+    189,    # PrimarySteppedDown
+    262,    # ExceededTimeLimit
+    9001,   # SocketException
+    10107,  # NotWritablePrimary
+    11600,  # InterruptedAtShutdown
+    11602,  # InterruptedDueToReplStateChange
+    13435   # NotPrimaryNoSecondaryOk
+}
+
+
+class CircuitOpenError(ConnectionFailure):
+    """Raised instead of calling the database while its breaker is open"""
+
+
+def is_unavailable(error):
+    """True for errors caused by the database being slow or unreachable"""
+    if isinstance(error, ConnectionFailure) or getattr(error, 'timeout', False):
+        return True
+    return isinstance(error, OperationFailure) and error.code in UNAVAILABLE_CODES
+
+
+def client_options(config, breaker=None):
+    """Keyword arguments for MongoClient: bounded timeouts plus breaker monitoring"""
+    options = {
+        'timeoutMS': config['MONGO_TIMEOUT_MS'],
+        'serverSelectionTimeoutMS': config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+        'connectTimeoutMS': config['MONGO_CONNECT_TIMEOUT_MS']
+    }
+    if breaker is not None:
+        options['event_listeners'] = [BreakerListener(breaker)]
+    return options
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, failure_ratio=0.5, window=10, reset_timeout=10):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_ratio = failure_ratio
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.stats = {'opened': 0, 'rejected': 0}
+
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._successes = 0
+        self._failures = 0
+        self._opened_at = 0
+        self._trial_started = None
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_started = None
+
+            # One trial at a time; a trial that never touched the database expires
+            if self.state == self.HALF_OPEN and (
+                self._trial_started is None or now - self._trial_started >= self.reset_timeout
+            ):
+                self._trial_started = now
+                return True
+
+            self.stats['rejected'] += 1
+            return False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"Database '{self.name}' is unavailable")
+
+    def retry_after(self):
+        if self.state == self.CLOSED:
+            return 0
+        return max(1, int(self.reset_timeout - (time.monotonic() - self._opened_at)))
+
+    def record_success(self):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._close()
+            else:
+                self._roll_window()
+                self._successes += 1
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._open()
+                return
+            if self.state == self.OPEN:
+                return
+
+            self._roll_window()
+            self._failures += 1
+            total = self._successes + self._failures
+            if self._failures >= self.failure_threshold and self._failures / total >= self.failure_ratio:
+                self._open()
+
+    def trip(self):
+        """Open straight away (e.g. the cluster lost its primary)"""
+        with self._lock:
+            if self.state != self.OPEN:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.stats['opened'] += 1
+
+    def _close(self):
+        self.state = self.CLOSED
+        self._window_start = time.monotonic()
+        self._successes = 0
+        self._failures = 0
+
+    def _roll_window(self):
+        if time.monotonic() - self._window_start > self.window:
+            self._window_start = time.monotonic()
+            self._successes = 0
+            self._failures = 0
+
+
+class BreakerListener(monitoring.CommandListener, monitoring.TopologyListener):
+    """Feeds command outcomes and primary availability into a CircuitBreaker"""
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.breaker.record_success()
+
+    def failed(self, event):
+        failure = event.failure
+        # Network errors and timeouts are reported as {'errtype': ..., 'errmsg': ...}
+        if 'errtype' in failure or failure.get('code') in UNAVAILABLE_CODES:
+            self.breaker.record_failure()
+
+    def opened(self, event):
+        pass
+
+    def description_changed(self, event):
+        old, new = event.previous_description, event.new_description
+        if old.has_writable_server() and not new.has_writable_server():
+            self.breaker.trip()
+
+    def closed(self, event):
+        pass
+
+
+class LocalSpool:
+    """Append-only local journal of records to apply once the database is back.
+
+    Each process appends to its own `<name>-<pid>.jsonl` file. `replay` applies
+    this process's records and those left behind by processes that died, in
+    order, stopping at the first record that cannot be applied yet. A record
+    that fails for any reason other than the database being unavailable would
+    fail forever, so it is moved to `<name>.dead.jsonl` for an operator instead
+    of holding up the records behind it.
+    """
+
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.name = name
+        self.stats = {'spooled': 0, 'replayed': 0, 'dead': 0}
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        os.makedirs(directory, exist_ok=True)
+
+    def replay_in_background(self, apply, interval=5):
+        """Replay every `interval` seconds from a daemon thread (started once per process)"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._replay_loop, args=(apply, interval), name='spool-replay', daemon=True
+            )
+            self._thread.start()
+
+    def _replay_loop(self, apply, interval):
+        while True:
+            time.sleep(interval)
+            if self.pending():
+                try:
+                    self.replay(apply)
+                except Exception:
+                    pass  # spool files that cannot be read are left for an operator
+
+    def _path(self):
+        return os.path.join(self.directory, f'{self.name}-{os.getpid()}.jsonl')
+
+    def append(self, record):
+        line = json_util.dumps(record) + '\n'
+        with self._lock:
+            with open(self._path(), 'a') as spool:
+                spool.write(line)
+                spool.flush()
+                os.fsync(spool.fileno())
+            self.stats['spooled'] += 1
+
+    def _dead_letter(self, entry):
+        entry['failed_at'] = datetime.utcnow()
+        with self._lock, open(os.path.join(self.directory, f'{self.name}.dead.jsonl'), 'a') as dead:
+            dead.write(json_util.dumps(entry) + '\n')
+        self.stats['dead'] += 1
+
+    def pending(self):
+        return bool(glob.glob(os.path.join(self.directory, f'{self.name}-*.jsonl*')))
+
+    def replay(self, apply):
+        """Apply spooled records with `apply(record)`; returns how many were applied"""
+        if not self._replay_lock.acquire(blocking=False):
+            return 0
+        try:
+            applied = 0
+            for path in glob.glob(os.path.join(self.directory, f'{self.name}-*.jsonl*')):
+                if not journal_claimable(path):
+                    continue
+                spool_path = path.split('.replaying-')[0]
+                claimed = f'{spool_path}.replaying-{os.getpid()}-{uuid.uuid4().hex}'
+                try:
+                    with self._lock:
+                        os.rename(path, claimed)  # new appends start a fresh file
+                except FileNotFoundError:
+                    continue
+
+                records = []
+                with open(claimed) as spool:
+                    for line in spool:
+                        if not line.strip():
+                            continue
+                        try:
+                            records.append(json_util.loads(line))
+                        except ValueError as e:
+                            # A line cut short by a crash while it was appended
+                            self._dead_letter({'line': line, 'error': str(e)})
+
+                for index, record in enumerate(records):
+                    try:
+                        apply(record)
+                    except Exception as e:
+                        if not is_unavailable(e):
+                            self._dead_letter({'record': record, 'error': str(e)})
+                            continue
+                        # Keep this record and everything after it for the next attempt
+                        with self._lock, open(self._path(), 'a') as spool:
+                            spool.writelines(json_util.dumps(rest) + '\n' for rest in records[index:])
+                        os.remove(claimed)
+                        self.stats['replayed'] += applied
+                        return applied
+                    applied += 1
+
+                os.remove(claimed)
+            self.stats['replayed'] += applied
+            return applied
+        finally:
+            self._replay_lock.release()
@@ -5,11 +5,7 @@ Server runner script for the Restaurant Management System
 
 import os
 import sys
-from app import app
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from app import app  # config.py loads .env
 
 if __name__ == "__main__":
     # Get configuration from environment
@@ -0,0 +1,92 @@
+"""
+Startup profiling
+
+Workers are started and stopped often, so cold start time matters. Startup is
+split into phases with `mark(name)`; each mark records the time since the
+previous one and which packages were imported in between. With
+STARTUP_PROFILE set, the first request is timed as well (request hooks vs.
+view) and the report is printed once it has been answered. The same report is
+served at /api/admin/startup. See bench_startup.py for measuring
+cold-start-to-first-response from outside the process.
+"""
+
+import json
+import sys
+import time
+from collections import Counter
+
+# Imported before anything heavy, so this is as close to process start as we get
+STARTED = time.perf_counter()
+
+
+class StartupProfile:
+    def __init__(self, started=STARTED):
+        self.started = started
+        self.phases = []
+        self.first_request = None
+        self._last = started
+        self._modules = set(sys.modules)
+        self._request = {}
+
+    def mark(self, name):
+        now = time.perf_counter()
+        modules = set(sys.modules)
+        imported = modules - self._modules
+        packages = Counter(module.split('.')[0] for module in imported)
+        self.phases.append({
+            'phase': name,
+            'ms': round((now - self._last) * 1000, 1),
+            'modules': len(imported),
+            'packages': dict(packages.most_common(8))
+        })
+        self._last = now
+        self._modules = modules
+
+    def instrument(self, app, on_report=None):
+        """Time the first request; register after every other before_request hook"""
+        def request_started():
+            if self.first_request is None and not self._request:
+                self._request['started'] = time.perf_counter()
+
+        def view_started():
+            if self.first_request is None and 'view' not in self._request:
+                self._request['view'] = time.perf_counter()
+
+        def request_finished(response):
+            from flask import request  # already loaded by now; not at import, so STARTED stays early
+
+            if self.first_request is None and 'started' in self._request:
+                now = time.perf_counter()
+                started = self._request['started']
+                view = self._request.get('view', now)
+                self.first_request = {
+                    'path': request.path,
+                    'status': response.status_code,
+                    'hooks_ms': round((view - started) * 1000, 1),
+                    'view_ms': round((now - view) * 1000, 1),
+                    'total_ms': round((now - started) * 1000, 1),
+                    'cold_start_to_response_ms': round((now - self.started) * 1000, 1)
+                }
+                if on_report:
+                    on_report(self.report())
+            return response
+
+        # Before the app's own hooks (tenant lookup, database check) so they are counted
+        app.before_request_funcs.setdefault(None, []).insert(0, request_started)
+        app.before_request(view_started)
+        app.after_request(request_finished)
+
+    def report(self):
+        return {
+            'startup_ms': round((self._last - self.started) * 1000, 1),
+            'modules_loaded': len(sys.modules),
+            'phases': self.phases,
+            'first_request': self.first_request
+        }
+
+
+def print_report(report):
+    print('Startup profile:', json.dumps(report, indent=2), file=sys.stderr)
+
+
+startup_profile = StartupProfile()
@@ -35,35 +35,14 @@ class AdminDashboard {
 
     async loadStats() {
         try {
-            const token = localStorage.getItem("token");
-
-            // Load orders for stats
-            const ordersResponse = await fetch(`${this.baseURL}/orders`, {
-                headers: { Authorization: `Bearer ${token}` },
-            });
-
-            // Load reservations for stats
-            const reservationsResponse = await fetch(
-                `${this.baseURL}/reservations`,
-                {
-                    headers: { Authorization: `Bearer ${token}` },
-                }
-            );
-
-            // Load menu items for stats
-            const menuResponse = await fetch(`${this.baseURL}/menu`);
-
-            if (
-                ordersResponse.ok &&
-                reservationsResponse.ok &&
-                menuResponse.ok
-            ) {
-                const orders = await ordersResponse.json();
-                const reservations = await reservationsResponse.json();
-                const menuItems = await menuResponse.json();
-
-                this.updateStats(orders, reservations, menuItems);
-            }
+            // Orders, reservations and menu all arrive in one bootstrap request
+            const { orders, reservations, menu } = await loadBootstrap([
+                "orders",
+                "reservations",
+                "menu",
+            ]);
+
+            this.updateStats(orders, reservations, menu);
         } catch (error) {
             console.error("Error loading stats:", error);
         }
@@ -105,19 +84,9 @@ class AdminDashboard {
         if (!container) return;
 
         try {
-            const token = localStorage.getItem("token");
-            const response = await fetch(`${this.baseURL}/orders`, {
-                headers: { Authorization: `Bearer ${token}` },
-            });
-
-            if (response.ok) {
-                const orders = await response.json();
-                const recentOrders = orders.slice(0, 5); // Get 5 most recent
-                this.renderRecentOrders(recentOrders);
-            } else {
-                container.innerHTML =
-                    '<p class="error">Failed to load recent orders</p>';
-            }
+            const { orders } = await loadBootstrap(["orders"]);
+            const recentOrders = orders.slice(0, 5); // Get 5 most recent
+            this.renderRecentOrders(recentOrders);
         } catch (error) {
             console.error("Error loading recent orders:", error);
             container.innerHTML =
@@ -160,19 +129,9 @@ class AdminDashboard {
         if (!container) return;
 
         try {
-            const token = localStorage.getItem("token");
-            const response = await fetch(`${this.baseURL}/reservations`, {
-                headers: { Authorization: `Bearer ${token}` },
-            });
-
-            if (response.ok) {
-                const reservations = await response.json();
-                const recentReservations = reservations.slice(0, 5); // Get 5 most recent
-                this.renderRecentReservations(recentReservations);
-            } else {
-                container.innerHTML =
-                    '<p class="error">Failed to load recent reservations</p>';
-            }
+            const { reservations } = await loadBootstrap(["reservations"]);
+            const recentReservations = reservations.slice(0, 5); // Get 5 most recent
+            this.renderRecentReservations(recentReservations);
         } catch (error) {
             console.error("Error loading recent reservations:", error);
             container.innerHTML =
@@ -5,6 +5,7 @@ class AdminMenuManager {
         this.baseURL = "/api";
         this.menuItems = [];
         this.editingItemId = null;
+        this.imageHash = null;
         this.init();
     }
 
@@ -42,6 +43,23 @@ class AdminMenuManager {
             );
         }
 
+        // Image upload
+        const imageFile = document.getElementById("item-image-file");
+        if (imageFile) {
+            imageFile.addEventListener(
+                "change",
+                this.handleImageUpload.bind(this)
+            );
+        }
+
+        // A hand-edited URL no longer matches the uploaded image
+        const imageInput = document.getElementById("item-image");
+        if (imageInput) {
+            imageInput.addEventListener("input", () => {
+                this.imageHash = null;
+            });
+        }
+
         // Modal close handlers
         const modalCloses = document.querySelectorAll(".modal-close");
         modalCloses.forEach((close) => {
@@ -56,15 +74,10 @@ class AdminMenuManager {
         if (!tableBody) return;
 
         try {
-            const response = await fetch(`${this.baseURL}/menu`);
+            const { menu } = await loadBootstrap(["menu"]);
 
-            if (response.ok) {
-                this.menuItems = await response.json();
-                this.renderMenuTable();
-            } else {
-                tableBody.innerHTML =
-                    '<tr><td colspan="7" class="error-cell">Failed to load menu items</td></tr>';
-            }
+            this.menuItems = menu;
+            this.renderMenuTable();
         } catch (error) {
             console.error("Error loading menu items:", error);
             tableBody.innerHTML =
@@ -143,6 +156,7 @@ class AdminMenuManager {
 
     showAddItemModal() {
         this.editingItemId = null;
+        this.imageHash = null;
         document.getElementById("modal-title").textContent = "Add Menu Item";
         document.getElementById("menu-item-form").reset();
         document.getElementById("item-available").checked = true;
@@ -155,6 +169,7 @@ class AdminMenuManager {
         if (!item) return;
 
         this.editingItemId = itemId;
+        this.imageHash = item.image_hash || null;
         document.getElementById("modal-title").textContent = "Edit Menu Item";
 
         // Populate form
@@ -170,6 +185,39 @@ class AdminMenuManager {
         this.showModal("menu-item-modal");
     }
 
+    async handleImageUpload(e) {
+        const file = e.target.files[0];
+        if (!file) return;
+
+        const body = new FormData();
+        body.append("image", file);
+
+        this.showError("image-error", "");
+
+        try {
+            const token = localStorage.getItem("token");
+            const response = await fetch(`${this.baseURL}/menu/upload`, {
+                method: "POST",
+                headers: {
+                    Authorization: `Bearer ${token}`,
+                },
+                body: body,
+            });
+
+            const data = await response.json();
+
+            if (response.ok) {
+                document.getElementById("item-image").value = data.image;
+                this.imageHash = data.image_hash;
+            } else {
+                this.showError("image-error", data.error || "Upload failed");
+            }
+        } catch (error) {
+            console.error("Image upload error:", error);
+            this.showError("image-error", "Upload failed. Please try again.");
+        }
+    }
+
     async handleMenuItemSubmit(e) {
         e.preventDefault();
 
@@ -179,6 +227,7 @@ class AdminMenuManager {
             price: parseFloat(document.getElementById("item-price").value),
             description: document.getElementById("item-description").value,
             image: document.getElementById("item-image").value,
+            image_hash: this.imageHash,
             available: document.getElementById("item-available").checked,
             popular: document.getElementById("item-popular").checked,
         };
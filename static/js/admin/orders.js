@@ -69,18 +69,10 @@ class AdminOrdersManager {
             '<tr><td colspan="7" class="loading-cell"><div class="loading-spinner"><i class="fas fa-spinner fa-spin"></i><p>Loading orders...</p></div></td></tr>';
 
         try {
-            const token = localStorage.getItem("token");
-            const response = await fetch(`${this.baseURL}/orders`, {
-                headers: { Authorization: `Bearer ${token}` },
-            });
+            const { orders } = await loadBootstrap(["orders"]);
 
-            if (response.ok) {
-                this.orders = await response.json();
-                this.renderOrdersTable();
-            } else {
-                tableBody.innerHTML =
-                    '<tr><td colspan="7" class="error-cell">Failed to load orders</td></tr>';
-            }
+            this.orders = orders;
+            this.renderOrdersTable();
         } catch (error) {
             console.error("Error loading orders:", error);
             tableBody.innerHTML =
@@ -291,8 +283,32 @@ class AdminOrdersManager {
         const order = this.orders.find((o) => o._id === orderId);
         if (!order) return;
 
+        // Offer only the statuses the order can move to from where it is
+        const select = document.getElementById("order-status");
+        const transitions = JSON.parse(select.dataset.transitions);
+        const allowed = Array.from(select.options).filter((option) => {
+            const ok = (transitions[option.value] || []).includes(
+                order.status
+            );
+            option.hidden = !ok;
+            option.disabled = !ok;
+            return ok;
+        });
+
+        if (!allowed.length) {
+            if (window.app) {
+                window.app.showNotification(
+                    `A ${this.formatStatus(
+                        order.status
+                    ).toLowerCase()} order cannot be changed`,
+                    "error"
+                );
+            }
+            return;
+        }
+
         document.getElementById("status-order-id").value = orderId;
-        document.getElementById("order-status").value = order.status;
+        select.value = allowed[0].value;
 
         this.showModal("status-modal");
     }
@@ -302,6 +318,7 @@ class AdminOrdersManager {
 
         const orderId = document.getElementById("status-order-id").value;
         const newStatus = document.getElementById("order-status").value;
+        const current = this.orders.find((o) => o._id === orderId);
 
         try {
             const token = localStorage.getItem("token");
@@ -313,7 +330,11 @@ class AdminOrdersManager {
                         "Content-Type": "application/json",
                         Authorization: `Bearer ${token}`,
                     },
-                    body: JSON.stringify({ status: newStatus }),
+                    // The version shown, so a change made meanwhile is not overwritten
+                    body: JSON.stringify({
+                        status: newStatus,
+                        version: current ? current.version || 0 : undefined,
+                    }),
                 }
             );
 
@@ -329,6 +350,9 @@ class AdminOrdersManager {
                 }
             } else {
                 const data = await response.json();
+                if (response.status === 409) {
+                    this.loadOrders(); // Show what changed
+                }
                 if (window.app) {
                     window.app.showNotification(
                         data.error || "Status update failed",
@@ -366,6 +390,7 @@ class AdminOrdersManager {
             preparing: "Preparing",
             ready: "Ready",
             delivered: "Delivered",
+            cancelled: "Cancelled",
         };
         return statusMap[status] || status;
     }
@@ -69,18 +69,10 @@ class AdminReservationsManager {
             '<tr><td colspan="7" class="loading-cell"><div class="loading-spinner"><i class="fas fa-spinner fa-spin"></i><p>Loading reservations...</p></div></td></tr>';
 
         try {
-            const token = localStorage.getItem("token");
-            const response = await fetch(`${this.baseURL}/reservations`, {
-                headers: { Authorization: `Bearer ${token}` },
-            });
+            const { reservations } = await loadBootstrap(["reservations"]);
 
-            if (response.ok) {
-                this.reservations = await response.json();
-                this.renderReservationsTable();
-            } else {
-                tableBody.innerHTML =
-                    '<tr><td colspan="7" class="error-cell">Failed to load reservations</td></tr>';
-            }
+            this.reservations = reservations;
+            this.renderReservationsTable();
         } catch (error) {
             console.error("Error loading reservations:", error);
             tableBody.innerHTML =
@@ -252,6 +244,7 @@ class AdminReservationsManager {
             "status-reservation-id"
         ).value;
         const newStatus = document.getElementById("reservation-status").value;
+        const current = this.reservations.find((r) => r._id === reservationId);
 
         try {
             const token = localStorage.getItem("token");
@@ -263,7 +256,11 @@ class AdminReservationsManager {
                         "Content-Type": "application/json",
                         Authorization: `Bearer ${token}`,
                     },
-                    body: JSON.stringify({ status: newStatus }),
+                    // The version shown, so a change made meanwhile is not overwritten
+                    body: JSON.stringify({
+                        status: newStatus,
+                        version: current ? current.version || 0 : undefined,
+                    }),
                 }
             );
 
@@ -279,6 +276,9 @@ class AdminReservationsManager {
                 }
             } else {
                 const data = await response.json();
+                if (response.status === 409) {
+                    this.loadReservations(); // Show what changed
+                }
                 if (window.app) {
                     window.app.showNotification(
                         data.error || "Status update failed",
@@ -45,16 +45,8 @@ class AuthManager {
 
     async verifyToken(token) {
         try {
-            const response = await fetch(`${this.baseURL}/profile`, {
-                headers: {
-                    Authorization: `Bearer ${token}`,
-                },
-            });
-
-            if (!response.ok) {
-                // Token is invalid
-                this.logout();
-            }
+            // Shares the page's bootstrap request; rejects if the token is invalid
+            await loadBootstrap(["profile"]);
         } catch (error) {
             console.error("Token verification failed:", error);
             this.logout();
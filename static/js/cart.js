@@ -145,6 +145,8 @@ class CartManager {
 
     saveCartToStorage() {
         localStorage.setItem("cart", JSON.stringify(this.cart));
+        // A changed cart is a new order, not a retry of the last attempt
+        this.checkoutKey = null;
     }
 
     updateCartUI() {
@@ -327,11 +329,15 @@ class CartManager {
                 notes: notes || "",
             };
 
+            // Retrying after a network error must not place the order twice
+            this.checkoutKey = this.checkoutKey || newUUID();
+
             const response = await fetch(`${this.baseURL}/orders`, {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
                     Authorization: `Bearer ${token}`,
+                    "Idempotency-Key": this.checkoutKey,
                 },
                 body: JSON.stringify(orderData),
             });
@@ -346,6 +352,11 @@ class CartManager {
 
                 // Show success modal
                 this.showOrderSuccess(data._id);
+
+                // Accepted while the kitchen's system is catching up
+                if (response.status === 202 && window.app) {
+                    window.app.showNotification(data.message, "info");
+                }
             } else {
                 if (window.app) {
                     window.app.showNotification(
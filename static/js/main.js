@@ -492,6 +492,76 @@ function getCartItemCount() {
     return cart.reduce((total, item) => total + item.quantity, 0);
 }
 
+// Page-load data: sections requested in the same tick share one /api/bootstrap call
+const bootstrapBatch = {
+    pending: {},
+    inflight: {},
+    timer: null
+};
+
+function loadBootstrap(sections) {
+    const promises = sections.map(section => {
+        if (!bootstrapBatch.inflight[section]) {
+            bootstrapBatch.inflight[section] = new Promise((resolve, reject) => {
+                bootstrapBatch.pending[section] = { resolve, reject };
+            });
+
+            if (!bootstrapBatch.timer) {
+                bootstrapBatch.timer = setTimeout(flushBootstrap, 0);
+            }
+        }
+        return bootstrapBatch.inflight[section];
+    });
+
+    return Promise.all(promises).then(values => {
+        const result = {};
+        sections.forEach((section, index) => result[section] = values[index]);
+        return result;
+    });
+}
+
+async function flushBootstrap() {
+    const pending = bootstrapBatch.pending;
+    bootstrapBatch.pending = {};
+    bootstrapBatch.inflight = {};
+    bootstrapBatch.timer = null;
+
+    const token = localStorage.getItem('token');
+    const headers = token ? { 'Authorization': `Bearer ${token}` } : {};
+
+    try {
+        const response = await fetch(`/api/bootstrap?include=${Object.keys(pending).join(',')}`, { headers });
+        const data = await response.json();
+
+        if (!response.ok) {
+            throw new Error(data.error || data.message || 'Failed to load page data');
+        }
+
+        Object.entries(pending).forEach(([section, { resolve, reject }]) => {
+            if (data.errors[section]) {
+                reject(new Error(data.errors[section]));
+            } else {
+                resolve(data[section]);
+            }
+        });
+    } catch (error) {
+        Object.values(pending).forEach(({ reject }) => reject(error));
+    }
+}
+
+// Random (v4) UUID for Idempotency-Key headers; crypto.randomUUID only exists
+// on HTTPS and localhost, but getRandomValues works on plain HTTP too
+function newUUID() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    bytes[6] = (bytes[6] & 0x0f) | 0x40;
+    bytes[8] = (bytes[8] & 0x3f) | 0x80;
+    const hex = Array.from(bytes, byte => byte.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
 // Global modal functions
 function closeModal() {
     const activeModal = document.querySelector('.modal.active');
@@ -42,21 +42,28 @@ class MenuManager {
         const menuGrid = document.getElementById("menu-grid");
         const noResults = document.getElementById("no-results");
 
+        const stored = this.readStoredMenu();
+
+        // Render the copy from the last visit right away, then catch up in the background
+        if (stored) {
+            this.menuItems = stored.items;
+            this.filteredItems = [...this.menuItems];
+            this.renderMenuItems();
+            this.syncMenu(stored).catch((error) => {
+                console.error("Error syncing menu:", error);
+            });
+            return;
+        }
+
         try {
             // Show loading state
             if (loadingSpinner) loadingSpinner.style.display = "flex";
             if (menuGrid) menuGrid.style.display = "none";
             if (noResults) noResults.style.display = "none";
 
-            const response = await fetch(`${this.baseURL}/menu`);
-
-            if (response.ok) {
-                this.menuItems = await response.json();
-                this.filteredItems = [...this.menuItems];
-                this.renderMenuItems();
-            } else {
-                throw new Error("Failed to load menu items");
-            }
+            this.menuItems = await this.syncMenu(null);
+            this.filteredItems = [...this.menuItems];
+            this.renderMenuItems();
         } catch (error) {
             console.error("Error loading menu:", error);
             this.showError(
@@ -68,6 +75,82 @@ class MenuManager {
         }
     }
 
+    async syncMenu(stored) {
+        const since = stored ? stored.version : 0;
+        const restaurant = stored && stored.restaurant_id ? stored.restaurant_id : "";
+        const response = await fetch(
+            `${this.baseURL}/menu/changes?since=${since}&restaurant_id=${encodeURIComponent(restaurant)}`
+        );
+
+        if (!response.ok) {
+            throw new Error("Failed to load menu items");
+        }
+
+        const data = await response.json();
+        let items;
+
+        if (data.full) {
+            items = data.items;
+        } else {
+            const changed = new Set(data.upserts.map((item) => item._id));
+            const deleted = new Set(data.deletes);
+            items = stored.items
+                .filter((item) => !changed.has(item._id) && !deleted.has(item._id))
+                .concat(data.upserts);
+        }
+
+        this.writeStoredMenu({
+            restaurant_id: data.restaurant_id,
+            version: data.version,
+            items: items,
+        });
+
+        const hasChanges =
+            data.full || data.upserts.length > 0 || data.deletes.length > 0;
+        if (stored && hasChanges) {
+            this.menuItems = items;
+            this.filterItems();
+        }
+
+        return items;
+    }
+
+    readStoredMenu() {
+        try {
+            return JSON.parse(localStorage.getItem("menu") || "null");
+        } catch (error) {
+            return null;
+        }
+    }
+
+    writeStoredMenu(menu) {
+        try {
+            localStorage.setItem("menu", JSON.stringify(menu));
+        } catch (error) {
+            // Storage full or disabled; the next visit simply loads the full menu
+        }
+    }
+
+    renderPicture(item) {
+        const fallback =
+            "https://images.pexels.com/photos/1640777/pexels-photo-1640777.jpeg?auto=compress&cs=tinysrgb&w=600";
+        const srcset = item.srcset || {};
+        const sizes = "(max-width: 576px) 100vw, (max-width: 991px) 50vw, 33vw";
+
+        return `
+                    <picture>
+                        ${
+                            srcset.webp
+                                ? `<source type="image/webp" srcset="${srcset.webp}" sizes="${sizes}">`
+                                : ""
+                        }
+                        <img src="${item.image || fallback}"
+                             ${srcset.jpeg ? `srcset="${srcset.jpeg}" sizes="${sizes}"` : ""}
+                             alt="${item.name}" loading="lazy"
+                             onerror="this.removeAttribute('srcset'); this.src='${fallback}'">
+                    </picture>`;
+    }
+
     handleSearch(event) {
         this.currentSearch = event.target.value.toLowerCase().trim();
         this.filterItems();
@@ -121,12 +204,7 @@ class MenuManager {
                 (item) => `
             <div class="menu-item-card" data-item-id="${item._id}">
                 <div class="menu-item-image">
-                    <img src="${
-                        item.image ||
-                        "https://images.pexels.com/photos/1640777/pexels-photo-1640777.jpeg?auto=compress&cs=tinysrgb&w=600"
-                    }" 
-                         alt="${item.name}" 
-                         onerror="this.src='https://images.pexels.com/photos/1640777/pexels-photo-1640777.jpeg?auto=compress&cs=tinysrgb&w=600'">
+                    ${this.renderPicture(item)}
                     <div class="menu-item-category">${this.formatCategory(
                         item.category
                     )}</div>
@@ -334,6 +412,10 @@ const menuStyles = `
         overflow: hidden;
     }
 
+    .menu-item-image picture {
+        display: contents;
+    }
+
     .menu-item-image img {
         width: 100%;
         height: 100%;
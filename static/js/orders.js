@@ -5,6 +5,9 @@ class OrdersManager {
         this.baseURL = "/api";
         this.currentFilter = "all";
         this.orders = [];
+        this.details = {};
+        this.archiveCursor = null;
+        this.archiveExhausted = false;
         this.init();
     }
 
@@ -29,6 +32,15 @@ class OrdersManager {
             button.addEventListener("click", this.handleFilterClick.bind(this));
         });
 
+        // Archived orders
+        const loadOlderButton = document.getElementById("load-older-orders");
+        if (loadOlderButton) {
+            loadOlderButton.addEventListener(
+                "click",
+                this.loadArchivedOrders.bind(this)
+            );
+        }
+
         // Modal close handlers
         const modalCloses = document.querySelectorAll(".modal-close");
         modalCloses.forEach((close) => {
@@ -60,25 +72,60 @@ class OrdersManager {
         if (ordersListElement) ordersListElement.style.display = "none";
         if (emptyOrdersElement) emptyOrdersElement.style.display = "none";
 
+        try {
+            const { orders } = await loadBootstrap(["orders"]);
+
+            this.orders = orders;
+            this.renderOrders();
+            this.toggleOlderOrders();
+        } catch (error) {
+            console.error("Error loading orders:", error);
+            this.showError("Network error loading orders");
+        } finally {
+            if (loadingElement) loadingElement.style.display = "none";
+        }
+    }
+
+    async loadArchivedOrders() {
+        const button = document.getElementById("load-older-orders");
+        if (button) button.disabled = true;
+
         try {
             const token = localStorage.getItem("token");
-            const response = await fetch(`${this.baseURL}/orders`, {
-                headers: {
-                    Authorization: `Bearer ${token}`,
-                },
-            });
+            const query = this.archiveCursor
+                ? `?before=${encodeURIComponent(this.archiveCursor)}`
+                : "";
+            const response = await fetch(
+                `${this.baseURL}/orders/archive${query}`,
+                {
+                    headers: {
+                        Authorization: `Bearer ${token}`,
+                    },
+                }
+            );
 
             if (response.ok) {
-                this.orders = await response.json();
-                this.renderOrders();
+                const data = await response.json();
+                this.orders = this.orders.concat(data.orders);
+                this.archiveCursor = data.next_before;
+                this.archiveExhausted = !data.next_before;
+                this.filterOrders();
             } else {
-                this.showError("Failed to load orders");
+                this.showError("Failed to load older orders");
             }
         } catch (error) {
-            console.error("Error loading orders:", error);
-            this.showError("Network error loading orders");
+            console.error("Error loading older orders:", error);
+            this.showError("Network error loading older orders");
         } finally {
-            if (loadingElement) loadingElement.style.display = "none";
+            if (button) button.disabled = false;
+            this.toggleOlderOrders();
+        }
+    }
+
+    toggleOlderOrders() {
+        const olderOrders = document.getElementById("older-orders");
+        if (olderOrders) {
+            olderOrders.style.display = this.archiveExhausted ? "none" : "block";
         }
     }
 
@@ -129,7 +176,7 @@ class OrdersManager {
 
                 <div class="order-body">
                     <div class="order-items">
-                        <h4>Items (${order.items.length})</h4>
+                        <h4>Items (${this.itemCount(order)})</h4>
                         <div class="items-list">
                             ${order.items
                                 .slice(0, 3)
@@ -148,10 +195,10 @@ class OrdersManager {
                                 )
                                 .join("")}
                             ${
-                                order.items.length > 3
+                                this.itemCount(order) > 3
                                     ? `
                                 <div class="more-items">
-                                    +${order.items.length - 3} more items
+                                    +${this.itemCount(order) - 3} more items
                                 </div>
                             `
                                     : ""
@@ -201,8 +248,45 @@ class OrdersManager {
             .join("");
     }
 
-    showOrderDetails(orderId) {
+    itemCount(order) {
+        // History rows only carry a preview of the items
+        return order.item_count ?? order.items.length;
+    }
+
+    async loadOrderDetails(orderId) {
         const order = this.orders.find((o) => o._id === orderId);
+        if (!order || order.item_count === undefined) return order;
+
+        if (!this.details[orderId]) {
+            const token = localStorage.getItem("token");
+            const response = await fetch(`${this.baseURL}/orders/${orderId}`, {
+                headers: {
+                    Authorization: `Bearer ${token}`,
+                },
+            });
+
+            if (!response.ok) {
+                throw new Error("Failed to load order details");
+            }
+            this.details[orderId] = await response.json();
+        }
+        return this.details[orderId];
+    }
+
+    async showOrderDetails(orderId) {
+        let order;
+        try {
+            order = await this.loadOrderDetails(orderId);
+        } catch (error) {
+            console.error("Error loading order details:", error);
+            if (window.app) {
+                window.app.showNotification(
+                    "Failed to load order details",
+                    "error"
+                );
+            }
+            return;
+        }
         if (!order) return;
 
         const modalContent = document.getElementById("order-details-content");
@@ -296,8 +380,20 @@ class OrdersManager {
         this.showModal("order-details-modal");
     }
 
-    reorderItems(orderId) {
-        const order = this.orders.find((o) => o._id === orderId);
+    async reorderItems(orderId) {
+        let order;
+        try {
+            order = await this.loadOrderDetails(orderId);
+        } catch (error) {
+            console.error("Error loading order details:", error);
+            if (window.app) {
+                window.app.showNotification(
+                    "Failed to load order details",
+                    "error"
+                );
+            }
+            return;
+        }
         if (!order) return;
 
         // Add all items from the order to cart
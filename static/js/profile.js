@@ -4,6 +4,10 @@ class ProfileManager {
     constructor() {
         this.baseURL = "/api";
         this.currentTab = "personal-info";
+        this.orders = [];
+        this.showingAllOrders = false;
+        this.archiveCursor = null;
+        this.archiveExhausted = false;
         this.init();
     }
 
@@ -103,18 +107,8 @@ class ProfileManager {
         if (!token) return;
 
         try {
-            const response = await fetch(`${this.baseURL}/profile`, {
-                headers: {
-                    Authorization: `Bearer ${token}`,
-                },
-            });
-
-            if (response.ok) {
-                const user = await response.json();
-                this.populateProfileForm(user);
-            } else {
-                console.error("Failed to load profile");
-            }
+            const { profile } = await loadBootstrap(["profile"]);
+            this.populateProfileForm(profile);
         } catch (error) {
             console.error("Error loading profile:", error);
         }
@@ -291,6 +285,34 @@ class ProfileManager {
             </div>
         `;
 
+        // Only the latest few orders; the full history is loaded on demand
+        this.showingAllOrders = false;
+        this.archiveCursor = null;
+        this.archiveExhausted = false;
+
+        try {
+            const { recent_orders, order_summary } = await loadBootstrap([
+                "recent_orders",
+                "order_summary",
+            ]);
+            this.orders = recent_orders;
+            // No recent orders but a history: it has all been archived
+            if (this.orders.length === 0 && order_summary?.order_count > 0) {
+                this.showingAllOrders = true;
+            }
+            this.renderOrderSummary(order_summary);
+            this.renderOrderHistory(this.orders);
+        } catch (error) {
+            console.error("Error loading orders:", error);
+            container.innerHTML =
+                '<p class="error">Network error loading orders</p>';
+        }
+    }
+
+    async loadAllOrders() {
+        const button = document.getElementById("view-all-orders");
+        if (button) button.disabled = true;
+
         try {
             const token = localStorage.getItem("token");
             const response = await fetch(`${this.baseURL}/orders`, {
@@ -300,23 +322,106 @@ class ProfileManager {
             });
 
             if (response.ok) {
-                const orders = await response.json();
-                this.renderOrderHistory(orders);
-            } else {
-                container.innerHTML =
-                    '<p class="error">Failed to load orders</p>';
+                this.orders = await response.json();
+                this.showingAllOrders = true;
+                this.renderOrderHistory(this.orders);
+            } else if (button) {
+                button.disabled = false;
             }
         } catch (error) {
             console.error("Error loading orders:", error);
-            container.innerHTML =
-                '<p class="error">Network error loading orders</p>';
+            if (button) button.disabled = false;
         }
     }
 
+    async loadArchivedOrders() {
+        const button = document.getElementById("load-older-orders");
+        if (button) button.disabled = true;
+
+        try {
+            const token = localStorage.getItem("token");
+            const query = this.archiveCursor
+                ? `?before=${encodeURIComponent(this.archiveCursor)}`
+                : "";
+            const response = await fetch(
+                `${this.baseURL}/orders/archive${query}`,
+                {
+                    headers: {
+                        Authorization: `Bearer ${token}`,
+                    },
+                }
+            );
+
+            if (response.ok) {
+                const data = await response.json();
+                this.orders = this.orders.concat(data.orders);
+                this.archiveCursor = data.next_before;
+                this.archiveExhausted = !data.next_before;
+                this.renderOrderHistory(this.orders);
+            } else if (button) {
+                button.disabled = false;
+            }
+        } catch (error) {
+            console.error("Error loading older orders:", error);
+            if (button) button.disabled = false;
+        }
+    }
+
+    renderOrderSummary(summary) {
+        const container = document.getElementById("order-summary");
+        if (!container || !summary || summary.order_count === 0) return;
+
+        const favorites = summary.favorite_items
+            .map((item) => item.name)
+            .join(", ");
+        const lastOrder = summary.last_order
+            ? new Date(summary.last_order.order_date).toLocaleDateString()
+            : "-";
+
+        container.innerHTML = `
+            <div class="stat-card">
+                <div class="stat-icon"><i class="fas fa-shopping-bag"></i></div>
+                <div class="stat-info">
+                    <h3>${summary.order_count}</h3>
+                    <p>Orders</p>
+                </div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-icon"><i class="fas fa-dollar-sign"></i></div>
+                <div class="stat-info">
+                    <h3>$${summary.total_spent.toFixed(2)}</h3>
+                    <p>Total Spent</p>
+                </div>
+            </div>
+            <div class="stat-card">
+                <div class="stat-icon"><i class="fas fa-clock"></i></div>
+                <div class="stat-info">
+                    <h3>${lastOrder}</h3>
+                    <p>Last Order</p>
+                </div>
+            </div>
+            ${
+                favorites
+                    ? `
+            <div class="stat-card">
+                <div class="stat-icon"><i class="fas fa-heart"></i></div>
+                <div class="stat-info">
+                    <p>Favorites: ${favorites}</p>
+                </div>
+            </div>
+            `
+                    : ""
+            }
+        `;
+    }
+
     renderOrderHistory(orders) {
         const container = document.getElementById("orders-container");
 
-        if (orders.length === 0) {
+        if (
+            orders.length === 0 &&
+            (!this.showingAllOrders || this.archiveExhausted)
+        ) {
             container.innerHTML = `
                 <div class="empty-state">
                     <i class="fas fa-shopping-bag"></i>
@@ -354,9 +459,9 @@ class ProfileManager {
                         )
                         .join("")}
                     ${
-                        order.items.length > 2
+                        (order.item_count ?? order.items.length) > 2
                             ? `<span class="more-items">+${
-                                  order.items.length - 2
+                                  (order.item_count ?? order.items.length) - 2
                               } more</span>`
                             : ""
                     }
@@ -365,6 +470,29 @@ class ProfileManager {
         `
             )
             .join("");
+
+        // Recent orders first, then the rest of the hot list, then archive pages
+        if (!this.showingAllOrders) {
+            container.insertAdjacentHTML(
+                "beforeend",
+                `<div class="text-center">
+                    <button class="btn btn-outline" id="view-all-orders">View all orders</button>
+                </div>`
+            );
+            document
+                .getElementById("view-all-orders")
+                .addEventListener("click", this.loadAllOrders.bind(this));
+        } else if (!this.archiveExhausted) {
+            container.insertAdjacentHTML(
+                "beforeend",
+                `<div class="text-center">
+                    <button class="btn btn-outline" id="load-older-orders">Load older orders</button>
+                </div>`
+            );
+            document
+                .getElementById("load-older-orders")
+                .addEventListener("click", this.loadArchivedOrders.bind(this));
+        }
     }
 
     async loadReservationsHistory() {
@@ -379,20 +507,8 @@ class ProfileManager {
         `;
 
         try {
-            const token = localStorage.getItem("token");
-            const response = await fetch(`${this.baseURL}/reservations`, {
-                headers: {
-                    Authorization: `Bearer ${token}`,
-                },
-            });
-
-            if (response.ok) {
-                const reservations = await response.json();
-                this.renderReservationsHistory(reservations);
-            } else {
-                container.innerHTML =
-                    '<p class="error">Failed to load reservations</p>';
-            }
+            const { reservations } = await loadBootstrap(["reservations"]);
+            this.renderReservationsHistory(reservations);
         } catch (error) {
             console.error("Error loading reservations:", error);
             container.innerHTML =
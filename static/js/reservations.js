@@ -64,18 +64,27 @@ class ReservationsManager {
         this.setFormLoading(true);
 
         try {
+            // Resubmitting the same details after a network error must not book twice
+            const details = JSON.stringify({ date, time, guests, notes });
+            if (details !== this.submittedDetails) {
+                this.submittedDetails = details;
+                this.reservationKey = newUUID();
+            }
+
             const response = await fetch(`${this.baseURL}/reservations`, {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
                     Authorization: `Bearer ${token}`,
+                    "Idempotency-Key": this.reservationKey,
                 },
-                body: JSON.stringify({ date, time, guests, notes }),
+                body: details,
             });
 
             const data = await response.json();
 
             if (response.ok) {
+                this.submittedDetails = null;
                 // Show success modal
                 this.showReservationSuccess(data._id);
                 form.reset();
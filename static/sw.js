@@ -0,0 +1,94 @@
+// Service worker: keeps the app shell available offline and fast on repeat visits
+
+const CACHE_NAME = "savory-shell-v1";
+
+const APP_SHELL = [
+    "/",
+    "/menu",
+    "/cart",
+    "/static/css/style.css",
+    "/static/css/responsive.css",
+    "/static/js/main.js",
+    "/static/js/auth.js",
+    "/static/js/cart.js",
+    "/static/js/menu.js",
+];
+
+self.addEventListener("install", (event) => {
+    event.waitUntil(
+        caches
+            .open(CACHE_NAME)
+            .then((cache) => cache.addAll(APP_SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener("activate", (event) => {
+    event.waitUntil(
+        caches
+            .keys()
+            .then((keys) =>
+                Promise.all(
+                    keys
+                        .filter((key) => key !== CACHE_NAME)
+                        .map((key) => caches.delete(key))
+                )
+            )
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener("fetch", (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+
+    // API calls always go to the network; menu data is synced by menu.js
+    if (
+        request.method !== "GET" ||
+        url.origin !== self.location.origin ||
+        url.pathname.startsWith("/api/")
+    ) {
+        return;
+    }
+
+    // Uploaded media is content-hashed and never changes
+    if (url.pathname.startsWith("/media/")) {
+        event.respondWith(cacheFirst(request));
+        return;
+    }
+
+    // Pages and static assets: serve the cached copy, refresh it in the background
+    event.respondWith(staleWhileRevalidate(event, request));
+});
+
+async function cacheFirst(request) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(request);
+    if (cached) return cached;
+
+    const response = await fetch(request);
+    if (response.ok) {
+        cache.put(request, response.clone());
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(event, request) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(request);
+
+    const network = fetch(request)
+        .then((response) => {
+            if (response.ok) {
+                cache.put(request, response.clone());
+            }
+            return response;
+        })
+        .catch(() => cached);
+
+    if (cached) {
+        event.waitUntil(network);
+        return cached;
+    }
+    return network;
+}
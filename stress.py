@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress harness for account, order and reservation writes
+
+Starts several server processes against a throwaway local MongoDB database
+and has client threads race on the same writes, then checks invariants in the
+database:
+
+- register: racing sign-ups for one email create exactly one user
+- create_order: racing requests with one Idempotency-Key create one order,
+  and every customer's order summary matches the orders that exist
+- update_order_status: of racing changes from the same version exactly one
+  wins; without versions, every order's history is still a valid path and its
+  version equals the number of changes
+- create_reservation / update_reservation_status: the same, for reservations
+
+Racing requests are released together by a barrier and the workload is drawn
+from --seed, so runs are repeatable; the invariants hold for any interleaving.
+The database in --mongo-uri is dropped first, so its name must contain
+"stress".
+
+Usage: python stress.py [--mongo-uri mongodb://localhost:27017/savory_stress] [--servers 4] [--contenders 8]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import MongoClient
+
+from bench_startup import SERVER, ROOT, free_port
+from init_data import create_indexes
+from kitchen import ORDER_TRANSITIONS
+from order_summary import summary_id
+
+RESTAURANT_ID = 'main'
+FIRST_STATUSES = [status for status, previous in ORDER_TRANSITIONS.items() if 'pending' in previous]
+ORDER_PATHS = [['confirmed', 'preparing', 'ready', 'delivered'], ['preparing', 'ready', 'cancelled'], ['cancelled']]
+
+
+class Client:
+    """JSON over HTTP, spreading requests round-robin across the servers"""
+
+    def __init__(self, urls):
+        self.urls = urls
+        self._next = itertools.count()
+
+    def request(self, method, path, body=None, token=None, headers=None):
+        headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        url = self.urls[next(self._next) % len(self.urls)] + path
+        data = json.dumps(body).encode() if body is not None else None
+        try:
+            request = urllib.request.Request(url, data, headers, method=method)
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'null')
+
+
+class Report:
+    def __init__(self):
+        self.statuses = defaultdict(Counter)
+        self.violations = []
+
+    def record(self, phase, results):
+        for status, _ in results:
+            self.statuses[phase][status] += 1
+            if status >= 500:
+                self.violations.append(f'{phase}: server error {status}')
+
+    def check(self, condition, message):
+        if not condition:
+            self.violations.append(message)
+
+
+def race(groups):
+    """Run every call in `groups` at once; returns the results per group"""
+    calls = [(index, call) for index, group in enumerate(groups) for call in group]
+    barrier = threading.Barrier(len(calls))
+
+    def run(entry):
+        barrier.wait()
+        return entry[0], entry[1]()
+
+    results = [[] for _ in groups]
+    with ThreadPoolExecutor(len(calls)) as pool:
+        for index, result in pool.map(run, calls):
+            results[index].append(result)
+    return results
+
+
+def batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def start_servers(count, mongo_uri, spool_dir):
+    env = dict(
+        os.environ,
+        MONGO_URI=mongo_uri,
+        ORDER_SPOOL_DIR=spool_dir,
+        MAIL_BACKEND='memory',
+        CACHE_BACKEND='memory',
+        STARTUP_PROFILE='False'
+    )
+    servers = []
+    for _ in range(count):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, '-c', SERVER, str(port)],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        servers.append((process, f'http://127.0.0.1:{port}'))
+
+    for process, url in servers:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(f'{url}/api/restaurants', timeout=5).read()
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f'Server at {url} did not start')
+                time.sleep(0.05)
+    return servers
+
+
+def stress_register(client, report, args):
+    tokens = []
+    emails = [f'racer{n}@stress.test' for n in range(args.users)]
+    for group_emails in batches(emails, args.batch):
+        groups = [
+            [lambda email=email: client.request('POST', '/api/register', {
+                'name': email.split('@')[0], 'email': email, 'password': 'stress'
+            })] * args.contenders
+            for email in group_emails
+        ]
+        for email, results in zip(group_emails, race(groups)):
+            report.record('register', results)
+            created = [body for status, body in results if status == 201]
+            report.check(len(created) == 1, f'register {email}: {len(created)} sign-ups succeeded')
+            if created:
+                tokens.append(created[0]['token'])
+    return tokens
+
+
+def stress_orders(client, report, args, rng, tokens, menu):
+    orders = []
+    requests = []
+    for token in tokens:
+        for _ in range(args.orders):
+            items = [
+                {'id': item['_id'], 'name': item['name'], 'price': item['price'], 'quantity': rng.randint(1, 3)}
+                for item in rng.sample(menu, rng.randint(1, min(4, len(menu))))
+            ]
+            body = {
+                'items': items,
+                'total': round(sum(item['price'] * item['quantity'] for item in items), 2),
+                'delivery_address': '1 Stress Street'
+            }
+            requests.append((token, str(uuid.UUID(int=rng.getrandbits(128))), body))
+
+    for group in batches(requests, args.batch):
+        groups = [
+            [lambda token=token, key=key, body=body: client.request(
+                'POST', '/api/orders', body, token, {'Idempotency-Key': key}
+            )] * args.contenders
+            for token, key, body in group
+        ]
+        for (token, key, body), results in zip(group, race(groups)):
+            report.record('create_order', results)
+            created = [status for status, _ in results if status == 201]
+            ids = {result['_id'] for status, result in results if status in (200, 201)}
+            report.check(len(created) == 1, f'order {key}: created {len(created)} times')
+            report.check(ids == {key}, f'order {key}: responses named orders {sorted(ids)}')
+            orders.append(key)
+    return orders
+
+
+def stress_order_status(client, report, args, rng, admin, orders):
+    # Everyone starts from version 0: exactly one change may win
+    for group in batches(orders, args.batch):
+        groups = [
+            [lambda order_id=order_id, status=rng.choice(FIRST_STATUSES): client.request(
+                'PUT', f'/api/orders/{order_id}/status', {'status': status, 'version': 0}, admin
+            ) for _ in range(args.contenders)]
+            for order_id in group
+        ]
+        for order_id, results in zip(group, race(groups)):
+            report.record('update_order_status(version)', results)
+            won = [status for status, _ in results if status == 200]
+            report.check(len(won) == 1, f'order {order_id}: {len(won)} versioned changes won')
+
+    # Without versions, staff race through whole paths; the state machine must hold
+    succeeded = Counter()
+    for group in batches(orders, args.batch):
+        paths = {order_id: [rng.choice(ORDER_PATHS) for _ in range(args.contenders)] for order_id in group}
+
+        groups = [
+            [lambda order_id=order_id, path=path: [
+                client.request('PUT', f'/api/orders/{order_id}/status', {'status': status}, admin)
+                for status in path
+            ] for path in paths[order_id]]
+            for order_id in group
+        ]
+        for order_id, walks in zip(group, race(groups)):
+            results = [result for walked in walks for result in walked]
+            report.record('update_order_status', results)
+            succeeded[order_id] += sum(1 for status, _ in results if status == 200)
+    return succeeded
+
+
+def stress_reservations(client, report, args, rng, admin, tokens):
+    reservations = []
+    requests = [
+        (token, str(uuid.UUID(int=rng.getrandbits(128))), {
+            'date': f'2031-01-{rng.randint(1, 28):02d}',
+            'time': f'{rng.randint(12, 21)}:00',
+            'guests': rng.randint(1, 8)
+        })
+        for token in tokens for _ in range(args.reservations)
+    ]
+    for group in batches(requests, args.batch):
+        groups = [
+            [lambda token=token, key=key, body=body: client.request(
+                'POST', '/api/reservations', body, token, {'Idempotency-Key': key}
+            )] * args.contenders
+            for token, key, body in group
+        ]
+        for (token, key, body), results in zip(group, race(groups)):
+            report.record('create_reservation', results)
+            created = [status for status, _ in results if status == 201]
+            report.check(len(created) == 1, f'reservation {key}: created {len(created)} times')
+            reservations.append(key)
+
+    for group in batches(reservations, args.batch):
+        groups = [
+            [lambda reservation_id=reservation_id, status=rng.choice(['confirmed', 'cancelled']): client.request(
+                'PUT', f'/api/reservations/{reservation_id}/status', {'status': status, 'version': 0}, admin
+            ) for _ in range(args.contenders)]
+            for reservation_id in group
+        ]
+        for reservation_id, results in zip(group, race(groups)):
+            report.record('update_reservation_status(version)', results)
+            won = [status for status, _ in results if status == 200]
+            report.check(len(won) == 1, f'reservation {reservation_id}: {len(won)} versioned changes won')
+    return reservations
+
+
+def check_database(db, report, args, orders, succeeded, reservations):
+    for email, count in Counter(user['email'] for user in db.users.find({}, {'email': 1})).items():
+        report.check(count == 1, f'{count} users share {email}')
+    report.check(
+        db.users.count_documents({'email': {'$regex': r'@stress\.test$'}}) == args.users,
+        'registered user count does not match the number of emails'
+    )
+
+    stored = {order['_id']: order for order in db.orders.find({'restaurant_id': RESTAURANT_ID})}
+    report.check(set(stored) == set(orders), f'{len(stored)} orders stored for {len(orders)} order keys')
+
+    for order_id in orders:
+        order = stored.get(order_id)
+        if order is None:
+            continue
+        history = [entry['status'] for entry in order.get('status_history', [])]
+        previous = 'pending'
+        for status in history:
+            report.check(previous in ORDER_TRANSITIONS[status], f'order {order_id}: invalid {previous} -> {status}')
+            previous = status
+        report.check(previous == order['status'], f'order {order_id}: history ends {previous}, not {order["status"]}')
+        report.check(
+            order.get('version', 0) == len(history),
+            f'order {order_id}: version {order.get("version")} after {len(history)} changes'
+        )
+        # One change per order was made in the versioned round
+        report.check(
+            succeeded[order_id] + 1 == len(history),
+            f'order {order_id}: {succeeded[order_id] + 1} changes answered 200, {len(history)} applied'
+        )
+
+    by_user = defaultdict(list)
+    for order in stored.values():
+        by_user[order['user_id']].append(order)
+    for user_id, user_orders in by_user.items():
+        summary = db.order_summaries.find_one({'_id': summary_id(RESTAURANT_ID, user_id)}) or {}
+        counted = [order for order in user_orders if order['status'] != 'cancelled']
+        report.check(
+            summary.get('order_count') == len(counted),
+            f'summary for {user_id}: order_count {summary.get("order_count")}, expected {len(counted)}'
+        )
+        report.check(
+            abs(summary.get('total_spent', 0) - sum(order['total'] for order in counted)) < 1e-6,
+            f'summary for {user_id}: total_spent does not match its orders'
+        )
+
+    stored = {doc['_id']: doc for doc in db.reservations.find({'restaurant_id': RESTAURANT_ID})}
+    report.check(set(stored) == set(reservations), f'{len(stored)} reservations stored for {len(reservations)} keys')
+    for reservation_id, reservation in stored.items():
+        report.check(
+            reservation.get('version') == 1,
+            f'reservation {reservation_id}: version {reservation.get("version")} after one change'
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Race concurrent writes and check invariants')
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/savory_stress')
+    parser.add_argument('--servers', type=int, default=4, help='server processes')
+    parser.add_argument('--contenders', type=int, default=8, help='racing requests per document')
+    parser.add_argument('--batch', type=int, default=8, help='documents raced at the same time')
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--orders', type=int, default=3, help='orders per user')
+    parser.add_argument('--reservations', type=int, default=2, help='reservations per user')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--skip-indexes', action='store_true', help='start from an empty database without init_data.py indexes')
+    args = parser.parse_args()
+
+    mongo = MongoClient(args.mongo_uri)
+    db = mongo.get_default_database()
+    if 'stress' not in db.name:
+        raise SystemExit(f'Refusing to drop {db.name}: the database name must contain "stress"')
+    mongo.drop_database(db.name)
+    if not args.skip_indexes:
+        create_indexes(db)
+
+    rng = random.Random(args.seed)
+    report = Report()
+    started = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        servers = start_servers(args.servers, args.mongo_uri, spool_dir)
+        try:
+            client = Client([url for _, url in servers])
+            client.request('POST', '/api/init-data')
+            _, login = client.request('POST', '/api/login', {'email': 'admin@savory.com', 'password': 'savory@admin'})
+            admin = login['token']
+            _, menu = client.request('GET', '/api/menu')
+
+            tokens = stress_register(client, report, args)
+            orders = stress_orders(client, report, args, rng, tokens, menu)
+            succeeded = stress_order_status(client, report, args, rng, admin, orders)
+            reservations = stress_reservations(client, report, args, rng, admin, tokens)
+        finally:
+            for process, _ in servers:
+                process.terminate()
+                process.wait()
+
+    check_database(db, report, args, orders, succeeded, reservations)
+
+    print(f"{args.servers} servers, {args.contenders} contenders per document, {time.perf_counter() - started:.1f}s")
+    for phase, statuses in report.statuses.items():
+        print(f"  {phase:<36} " + '  '.join(f'{status}: {count}' for status, count in sorted(statuses.items())))
+
+    if report.violations:
+        print(f"\n{len(report.violations)} invariant violations:")
+        for violation in report.violations[:50]:
+            print(f"  {violation}")
+        sys.exit(1)
+    print("All invariants held")
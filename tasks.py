@@ -0,0 +1,116 @@
+"""
+Background job handlers for the Restaurant Management System
+"""
+
+from analytics import rebuild_sales, rollup_sales
+from archive import archive_history
+from jobs import job_handler
+
+# Words that push a contact message to the front of the triage list
+URGENT_KEYWORDS = ['allergy', 'allergic', 'refund', 'sick', 'complaint', 'wrong order', 'urgent']
+SPAM_KEYWORDS = ['viagra', 'casino', 'crypto', 'seo services', 'backlinks']
+
+
+@job_handler('order_confirmation')
+def send_order_confirmation(ctx, payload):
+    db = ctx.restaurant_db(payload.get('restaurant_id'))
+    order = db.orders.find_one({'_id': payload['order_id']})
+    if not order:
+        return
+
+    user = ctx.db.users.find_one({'_id': order['user_id']})
+    if not user:
+        return
+
+    lines = [f"- {item.get('name', 'Item')} x {item.get('quantity', 1)}" for item in order['items']]
+    body = (
+        f"Hi {user['name']},\n\n"
+        f"Thanks for your order! We have received it and will start preparing it shortly.\n\n"
+        f"Order #{order['_id'][:8]}\n"
+        + '\n'.join(lines) +
+        f"\n\nTotal: ${order['total']:.2f}\n"
+        f"Delivery address: {order['delivery_address']}\n\n"
+        f"- The Savory Team"
+    )
+    ctx.mailer.send(user['email'], 'Your Savory order has been received', body)
+
+
+@job_handler('reservation_confirmation')
+def send_reservation_confirmation(ctx, payload):
+    db = ctx.restaurant_db(payload.get('restaurant_id'))
+    reservation = db.reservations.find_one({'_id': payload['reservation_id']})
+    if not reservation:
+        return
+
+    user = ctx.db.users.find_one({'_id': reservation['user_id']})
+    if not user:
+        return
+
+    body = (
+        f"Hi {user['name']},\n\n"
+        f"We have received your reservation request for {reservation['guests']} "
+        f"on {reservation['date']} at {reservation['time']}.\n"
+        f"We will let you know once it is confirmed.\n\n"
+        f"- The Savory Team"
+    )
+    ctx.mailer.send(user['email'], 'Your Savory reservation request', body)
+
+
+@job_handler('contact_received')
+def triage_contact(ctx, payload):
+    contact = ctx.db.contacts.find_one({'_id': payload['contact_id']})
+    if not contact:
+        return
+
+    text = f"{contact['subject']} {contact['message']}".lower()
+
+    if any(word in text for word in SPAM_KEYWORDS) or text.count('http') > 2:
+        priority = 'spam'
+    elif any(word in text for word in URGENT_KEYWORDS):
+        priority = 'high'
+    else:
+        priority = 'normal'
+
+    ctx.db.contacts.update_one({'_id': contact['_id']}, {'$set': {'priority': priority}})
+
+    if priority == 'spam':
+        return
+
+    body = (
+        f"Hi {contact['name']},\n\n"
+        f"Thank you for contacting Savory about \"{contact['subject']}\". "
+        f"We will get back to you soon.\n\n"
+        f"- The Savory Team"
+    )
+    ctx.mailer.send(contact['email'], 'We received your message', body)
+
+
+@job_handler('archive_history')
+def archive_old_history(ctx, payload):
+    for restaurant_id, db in ctx.restaurants(payload.get('restaurant_id')):
+        user_ids, counts = archive_history(
+            db,
+            restaurant_id,
+            order_days=ctx.config['ARCHIVE_ORDERS_AFTER_DAYS'],
+            reservation_days=ctx.config['ARCHIVE_RESERVATIONS_AFTER_DAYS'],
+            batch_size=ctx.config['ARCHIVE_BATCH_SIZE']
+        )
+
+        # Hot order listings for these customers just shrank
+        if ctx.cache and counts['orders']:
+            ctx.cache.invalidate(
+                'orders:all', *[f'orders:{user_id}' for user_id in user_ids], scope=restaurant_id
+            )
+
+
+@job_handler('sales_rollup')
+def roll_up_sales(ctx, payload):
+    for restaurant_id, db in ctx.restaurants(payload.get('restaurant_id')):
+        if payload.get('rebuild'):
+            window = rebuild_sales(db, restaurant_id)
+        else:
+            window = rollup_sales(db, restaurant_id)
+
+        # Analytics views and the sales-ranked popular list read the rollups
+        if ctx.cache and window:
+            ctx.cache.invalidate('analytics', scope=restaurant_id)
@@ -0,0 +1,161 @@
+"""
+Multi-restaurant (tenant) routing and data placement
+
+Each restaurant is registered in the `restaurants` collection of the main
+database:
+
+    {_id: 'downtown', name: 'Savory Downtown', hosts: ['downtown.savory.example'],
+     database: 'savory_downtown', mongo_uri: 'mongodb://big-cluster:27017'}
+
+A request belongs to the restaurant named by its URL prefix (/r/<id>/...),
+its host name, an `X-Restaurant-Id` header or the `restaurant` cookie set by
+an earlier prefixed request, in that order, and otherwise to the default
+restaurant. Restaurant-owned documents carry `restaurant_id`, every query
+filters on it and it is the leading key of every compound index. Restaurants
+with a `database` (and optionally a `mongo_uri` for another cluster) keep
+their menu, orders and reservations there, so a busy location's working set
+and indexes do not compete with the others. Users, jobs and contact messages
+stay in the main database.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from pymongo import ASCENDING, DESCENDING, MongoClient
+from pymongo.errors import PyMongoError
+
+PREFIX_ENVIRON_KEY = 'savory.restaurant_id'
+COOKIE_NAME = 'restaurant'
+HEADER_NAME = 'X-Restaurant-Id'
+
+# Collections whose documents belong to one restaurant
+TENANT_COLLECTIONS = [
+    'menu_items', 'orders', 'reservations', 'orders_archive', 'reservations_archive'
+]
+
+Tenant = namedtuple('Tenant', ['id', 'db'])
+
+
+class PathPrefixMiddleware:
+    """Strip a leading /<prefix>/<restaurant_id> from the path and remember the id"""
+
+    def __init__(self, app, prefix='r'):
+        self.app = app
+        self.prefix = prefix
+
+    def __call__(self, environ, start_response):
+        parts = environ.get('PATH_INFO', '').split('/', 3)
+        if len(parts) >= 3 and parts[1] == self.prefix and parts[2]:
+            environ[PREFIX_ENVIRON_KEY] = parts[2]
+            environ['PATH_INFO'] = '/' + (parts[3] if len(parts) > 3 else '')
+        return self.app(environ, start_response)
+
+
+class TenantRouter:
+    def __init__(self, db, default_restaurant='main', refresh_interval=60, client_factory=MongoClient):
+        self.db = db
+        self.default_restaurant = default_restaurant
+        self.refresh_interval = refresh_interval
+        self.client_factory = client_factory
+        self._restaurants = {}
+        self._hosts = {}
+        self._loaded_at = None
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def restaurants(self):
+        # The registry changes rarely, so it is read at most once per interval
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            self.reload()
+        return self._restaurants
+
+    def reload(self):
+        try:
+            restaurants = {doc['_id']: doc for doc in self.db.restaurants.find()}
+        except PyMongoError:
+            # Keep routing with what we last knew; try again after the next interval
+            if self._loaded_at is None:
+                self._restaurants = {self.default_restaurant: {'_id': self.default_restaurant}}
+            self._loaded_at = time.monotonic()
+            return
+        restaurants.setdefault(self.default_restaurant, {'_id': self.default_restaurant})
+        self._hosts = {
+            host.lower(): restaurant_id
+            for restaurant_id, doc in restaurants.items()
+            for host in doc.get('hosts', [])
+        }
+        self._restaurants = restaurants
+        self._loaded_at = time.monotonic()
+
+    def resolve(self, environ, host=None, header=None, cookie=None):
+        """Return the restaurant id for a request, or None if it names an unknown one"""
+        restaurants = self.restaurants()
+
+        explicit = environ.get(PREFIX_ENVIRON_KEY) or header
+        if explicit:
+            return explicit if explicit in restaurants else None
+
+        if host:
+            restaurant_id = self._hosts.get(host.split(':')[0].lower())
+            if restaurant_id:
+                return restaurant_id
+
+        if cookie in restaurants:
+            return cookie
+        return self.default_restaurant
+
+    def cluster(self, restaurant_id):
+        """The dedicated cluster URI a restaurant lives on, or None for the main one"""
+        doc = self.restaurants().get(restaurant_id) or {}
+        return doc.get('mongo_uri') if doc.get('database') else None
+
+    def database(self, restaurant_id):
+        doc = self.restaurants().get(restaurant_id) or {}
+        if not doc.get('database'):
+            return self.db
+
+        uri = doc.get('mongo_uri')
+        if not uri:
+            return self.db.client[doc['database']]
+
+        with self._lock:
+            client = self._clients.get(uri)
+            if client is None:
+                client = self._clients[uri] = self.client_factory(uri)
+        return client[doc['database']]
+
+    def get(self, restaurant_id):
+        return Tenant(restaurant_id, self.database(restaurant_id))
+
+    def all(self):
+        return [self.get(restaurant_id) for restaurant_id in self.restaurants()]
+
+
+def ensure_indexes(db):
+    db.menu_items.create_index([('restaurant_id', ASCENDING), ('category', ASCENDING)])
+    db.orders.create_index([('restaurant_id', ASCENDING), ('user_id', ASCENDING), ('order_date', DESCENDING)])
+    db.reservations.create_index([('restaurant_id', ASCENDING), ('created_at', DESCENDING)])
+    db.reservations.create_index([('restaurant_id', ASCENDING), ('user_id', ASCENDING), ('created_at', DESCENDING)])
+    db.contacts.create_index([('restaurant_id', ASCENDING), ('created_at', DESCENDING)])
+
+
+def ensure_restaurant_indexes(db):
+    """Indexes for every restaurant-owned collection, in the main or a dedicated database"""
+    # Imported here so routing requests does not load the analytics and archive modules
+    import analytics
+    import archive
+    import kitchen
+    import menu_sync
+
+    ensure_indexes(db)
+    archive.ensure_indexes(db)
+    analytics.ensure_indexes(db)
+    menu_sync.ensure_indexes(db)
+    kitchen.ensure_indexes(db)
+
+
+def backfill(db, restaurant_id):
+    """Assign documents written before restaurants existed to `restaurant_id`"""
+    for name in TENANT_COLLECTIONS + ['contacts']:
+        db[name].update_many({'restaurant_id': {'$exists': False}}, {'$set': {'restaurant_id': restaurant_id}})
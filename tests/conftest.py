@@ -0,0 +1,97 @@
+"""
+Shared fixtures: an in-memory MongoDB database (mongomock), so the suite
+runs without a server, and the whole application running on it
+"""
+
+import uuid
+
+import mongomock
+import pytest
+from mongomock.collection import Collection
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().savory_test
+
+
+def _bind_new(expression, new):
+    # $$new.<field> in a whenMatched pipeline is the document being merged in
+    if isinstance(expression, dict):
+        return {key: _bind_new(value, new) for key, value in expression.items()}
+    if isinstance(expression, list):
+        return [_bind_new(value, new) for value in expression]
+    if isinstance(expression, str) and expression.startswith('$$new.'):
+        return {'$literal': new.get(expression[len('$$new.'):])}
+    return expression
+
+
+@pytest.fixture
+def merge_stage(monkeypatch):
+    """Run $merge (on _id, whenMatched pipeline or insert), which mongomock lacks"""
+    aggregate = Collection.aggregate
+
+    def with_merge(self, pipeline, *args, **kwargs):
+        if not pipeline or '$merge' not in pipeline[-1]:
+            return aggregate(self, pipeline, *args, **kwargs)
+        merge = pipeline[-1]['$merge']
+        target = self.database[merge['into']]
+        for doc in aggregate(self, pipeline[:-1], *args, **kwargs):
+            if target.find_one({'_id': doc['_id']}) is None:
+                target.insert_one(doc)
+                continue
+            stages = [{'$match': {'_id': doc['_id']}}] + _bind_new(merge['whenMatched'], doc)
+            target.replace_one({'_id': doc['_id']}, next(aggregate(target, stages)))
+        return iter([])
+
+    monkeypatch.setattr(Collection, 'aggregate', with_merge)
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    # Settings are read and clients created when core is imported, so the app
+    # is imported once, with TestingConfig and pymongo's client swapped for mongomock
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('APP_CONFIG', 'testing')
+        patch.setenv('ORDER_SPOOL_DIR', str(tmp_path_factory.mktemp('spool')))
+        patch.setenv('WRITE_BEHIND_JOURNAL_DIR', str(tmp_path_factory.mktemp('journal')))
+        patch.setattr('pymongo.MongoClient', mongomock.MongoClient)
+        patch.setattr('flask_pymongo.MongoClient', mongomock.MongoClient)
+        import app as application
+    return application.app
+
+
+@pytest.fixture
+def client(app):
+    import core
+
+    # Every test starts with empty databases, caches and restaurant registry
+    for name in core.mongo.cx.list_database_names():
+        core.mongo.cx.drop_database(name)
+    core.tenants._clients.clear()
+    core.tenants.reload()
+    core.cache.clear()
+    return app.test_client()
+
+
+@pytest.fixture
+def core(client):
+    # Imported through a fixture: importing it at collection would connect to a real server
+    import core
+    return core
+
+
+@pytest.fixture
+def login(core):
+    """Create a user and return the Authorization header for them"""
+    def login(role='customer', **fields):
+        user = {
+            '_id': str(uuid.uuid4()),
+            'name': role.title(),
+            'email': f'{uuid.uuid4().hex}@savory.test',
+            'role': role,
+            **fields
+        }
+        core.mongo.db.users.insert_one(user)
+        return {'Authorization': 'Bearer ' + core.issue_token(user)}
+    return login
@@ -0,0 +1,188 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import analytics
+
+NOW = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+MENU = [
+    {'_id': 'soup', 'restaurant_id': 'main', 'name': 'Soup', 'category': 'starters'},
+    {'_id': 'steak', 'restaurant_id': 'main', 'name': 'Steak', 'category': 'mains'}
+]
+
+
+@pytest.fixture(autouse=True)
+def rollups(merge_stage):
+    pass
+
+
+def order(order_id, items, order_date, status='delivered', restaurant_id='main'):
+    return {
+        '_id': order_id,
+        'restaurant_id': restaurant_id,
+        'user_id': 'u1',
+        'items': [{'id': item_id, 'name': item_id.title(), 'price': price, 'quantity': quantity}
+                  for item_id, price, quantity in items],
+        'total': sum(price * quantity for _, price, quantity in items),
+        'status': status,
+        'order_date': order_date,
+        'status_updated_at': order_date
+    }
+
+
+def just_now():
+    # Past the millisecond the next run's window ends on
+    moment = datetime.utcnow()
+    time.sleep(0.01)
+    return moment
+
+
+def totals(db):
+    return {row['_id']: (row['quantity'], row['revenue']) for row in analytics.top_items(db, 'main', days=60)}
+
+
+def test_orders_are_rolled_up_by_hour_and_day(db):
+    db.menu_items.insert_many(MENU)
+    db.orders.insert_many([
+        order('o1', [('soup', 5, 2), ('steak', 20, 1)], NOW - timedelta(hours=3)),
+        order('o2', [('soup', 5, 1)], NOW - timedelta(hours=2)),
+        order('other', [('soup', 5, 9)], NOW - timedelta(hours=2), restaurant_id='downtown')
+    ])
+
+    assert analytics.rollup_sales(db, 'main', lag=0)
+
+    assert totals(db) == {'soup': (3, 15), 'steak': (1, 20)}
+    assert db.sales_hourly.count_documents({'restaurant_id': 'main'}) == 3
+    assert {row['_id']: row['revenue'] for row in analytics.category_revenue(db, 'main')} == {
+        'mains': 20, 'starters': 15
+    }
+
+
+def test_each_run_only_adds_new_orders(db):
+    db.orders.insert_one(order('o1', [('soup', 5, 2)], NOW - timedelta(hours=3)))
+    analytics.rollup_sales(db, 'main', lag=0)
+    assert analytics.rollup_sales(db, 'main', lag=60) is None
+
+    db.orders.insert_one(order('o2', [('soup', 5, 1)], just_now()))
+    analytics.rollup_sales(db, 'main', lag=0)
+
+    assert totals(db) == {'soup': (3, 15)}
+
+
+def test_cancelling_a_counted_order_subtracts_it(db):
+    db.orders.insert_one(order('o1', [('soup', 5, 2)], NOW - timedelta(hours=3)))
+    db.orders.insert_one(order('o2', [('soup', 5, 1)], NOW - timedelta(hours=3)))
+    analytics.rollup_sales(db, 'main', lag=0)
+
+    db.orders.update_one({'_id': 'o2'}, {'$set': {'status': 'cancelled', 'status_updated_at': just_now()}})
+    analytics.rollup_sales(db, 'main', lag=0)
+
+    assert totals(db) == {'soup': (2, 10)}
+
+
+def test_history_is_rolled_up_in_bounded_slices(db, monkeypatch):
+    db.orders.insert_many([
+        order(f'o{days}', [('soup', 5, 1)], NOW - timedelta(days=days)) for days in range(10)
+    ])
+    # Archived before the rollups ever ran
+    db.orders_archive.insert_one(order('old', [('soup', 5, 1)], NOW - timedelta(days=30)))
+
+    # The budget runs out after the first window
+    clock = iter([0, 0, 100])
+    with monkeypatch.context() as patch:
+        patch.setattr(analytics.time, 'monotonic', lambda: next(clock))
+        since, until = analytics.rollup_sales(db, 'main', lag=0)
+
+    state = db.analytics_state.find_one({'_id': 'sales_rollup:main'})
+    assert until == NOW - timedelta(days=30) + analytics.ROLLUP_SLICE
+    assert state['watermark'] == until and state['backfill']
+    assert totals(db) == {'soup': (1, 5)}
+
+    assert analytics.rollup_sales(db, 'main', lag=0)
+
+    state = db.analytics_state.find_one({'_id': 'sales_rollup:main'})
+    assert not state['backfill'] and 'window' not in state
+    assert totals(db) == {'soup': (11, 55)}
+
+
+def test_abandoned_window_is_resumed_without_double_counting(db, monkeypatch):
+    db.orders.insert_one(order('o1', [('soup', 5, 2)], NOW - timedelta(hours=3)))
+    aggregate = type(db.orders).aggregate
+    calls = []
+
+    def fail_second_merge(self, pipeline, *args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise TimeoutError('job timed out')
+        return aggregate(self, pipeline, *args, **kwargs)
+
+    monkeypatch.setattr(type(db.orders), 'aggregate', fail_second_merge)
+    with pytest.raises(TimeoutError):
+        analytics.rollup_sales(db, 'main', lag=0)
+    monkeypatch.setattr(type(db.orders), 'aggregate', aggregate)
+
+    # Still leased to the abandoned run
+    assert analytics.rollup_sales(db, 'main', lag=0) is None
+    assert analytics.rollup_sales(db, 'main', lag=0, lease=0)
+
+    assert totals(db) == {'soup': (2, 10)}
+    assert sum(row['quantity'] for row in db.sales_hourly.find()) == 2
+
+
+def test_rebuild_recomputes_from_scratch(db):
+    db.orders.insert_one(order('o1', [('soup', 5, 2)], NOW - timedelta(hours=3)))
+    analytics.rollup_sales(db, 'main', lag=0)
+    db.sales_daily.update_many({}, {'$inc': {'quantity': 100}})
+
+    analytics.rebuild_sales(db, 'main')
+
+    assert totals(db) == {'soup': (2, 10)}
+
+
+@pytest.fixture
+def admin(core, login):
+    db = core.mongo.db
+    db.menu_items.insert_many(MENU)
+    db.orders.insert_many([
+        order('o1', [('soup', 5, 2), ('steak', 20, 1)], NOW - timedelta(days=1, hours=3)),
+        order('o2', [('steak', 20, 3)], NOW - timedelta(days=1, hours=3)),
+        order('o3', [('soup', 5, 1)], NOW - timedelta(days=40))
+    ])
+    analytics.rollup_sales(db, 'main', lag=0)
+    return login('admin')
+
+
+def test_top_items_endpoint(client, admin):
+    body = client.get('/api/analytics/top-items', headers=admin).get_json()
+    assert [(row['_id'], row['quantity'], row['revenue']) for row in body] == [('steak', 4, 80), ('soup', 2, 10)]
+
+    body = client.get('/api/analytics/top-items?days=60&by=revenue&limit=1', headers=admin).get_json()
+    assert [(row['_id'], row['revenue']) for row in body] == [('steak', 80)]
+
+    assert client.get('/api/analytics/top-items?by=price', headers=admin).status_code == 400
+
+
+def test_category_revenue_endpoint(client, admin):
+    body = client.get('/api/analytics/category-revenue', headers=admin).get_json()
+
+    assert [(row['_id'], row['quantity'], row['revenue']) for row in body] == [('mains', 4, 80), ('starters', 2, 10)]
+
+
+def test_heatmap_endpoint(client, admin):
+    placed = NOW - timedelta(days=1, hours=3)
+
+    body = client.get('/api/analytics/heatmap', headers=admin).get_json()
+
+    assert body == [{
+        'weekday': placed.isoweekday() % 7 + 1,
+        'hour': placed.hour,
+        'quantity': 6,
+        'revenue': 90
+    }]
+
+
+def test_analytics_endpoints_are_for_admins(client, login, admin):
+    customer = login()
+    for path in ['top-items', 'category-revenue', 'heatmap']:
+        assert client.get(f'/api/analytics/{path}', headers=customer).status_code == 403
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import analytics
+import order_summary
+from archive import archive_history, fetch_archived, move_batch, parse_cursor
+
+OLD = datetime.utcnow() - timedelta(days=200)
+RECENT = datetime.utcnow() - timedelta(days=2)
+
+
+def order(order_id, status='delivered', order_date=OLD, user_id='u1', restaurant_id='main', total=10):
+    return {
+        '_id': order_id,
+        'restaurant_id': restaurant_id,
+        'user_id': user_id,
+        'items': [{'id': 'soup', 'name': 'Soup', 'price': total, 'quantity': 1}],
+        'total': total,
+        'status': status,
+        'order_date': order_date,
+        'status_updated_at': order_date
+    }
+
+
+def ids(collection):
+    return sorted(doc['_id'] for doc in collection.find())
+
+
+def test_pages_do_not_skip_documents_sharing_a_date(db):
+    same_day = datetime(2024, 5, 1, 12, 0)
+    db.orders_archive.insert_many(
+        [{'_id': f'o{n}', 'restaurant_id': 'main', 'order_date': same_day} for n in range(5)]
+        + [{'_id': 'older', 'restaurant_id': 'main', 'order_date': datetime(2024, 4, 1)}]
+    )
+
+    seen, cursor = [], None
+    while True:
+        page, next_before = fetch_archived(db.orders_archive, 'order_date', {'restaurant_id': 'main'},
+                                           parse_cursor(cursor), limit=2)
+        seen += [doc['_id'] for doc in page]
+        if not next_before:
+            break
+        cursor = next_before
+
+    assert seen == ['o4', 'o3', 'o2', 'o1', 'o0', 'older']
+
+
+def test_cursor_round_trip():
+    assert parse_cursor('2024-05-01T12:00:00.123000|o3') == (datetime(2024, 5, 1, 12, 0, 0, 123000), 'o3')
+    assert parse_cursor('2024-05-01T12:00:00') == (datetime(2024, 5, 1, 12, 0), None)
+    assert parse_cursor('') is None
+    with pytest.raises(ValueError):
+        parse_cursor('yesterday')
+
+
+def test_only_old_finished_orders_and_past_reservations_move(db):
+    db.orders.insert_many([
+        order('delivered'),
+        order('cancelled', status='cancelled', user_id='u2'),
+        order('still-cooking', status='preparing'),
+        order('recent', order_date=RECENT),
+        order('other-restaurant', restaurant_id='downtown')
+    ])
+    db.reservations.insert_many([
+        {'_id': 'past', 'restaurant_id': 'main', 'user_id': 'u3', 'date': OLD.strftime('%Y-%m-%d')},
+        {'_id': 'upcoming', 'restaurant_id': 'main', 'user_id': 'u3', 'date': '2999-01-01'}
+    ])
+
+    user_ids, counts = archive_history(db, 'main')
+
+    assert counts == {'orders': 2, 'reservations': 1}
+    assert user_ids == {'u1', 'u2', 'u3'}
+    assert ids(db.orders) == ['other-restaurant', 'recent', 'still-cooking']
+    assert ids(db.orders_archive) == ['cancelled', 'delivered']
+    assert ids(db.reservations) == ['upcoming']
+    assert ids(db.reservations_archive) == ['past']
+    assert all('archived_at' in doc for doc in db.orders_archive.find())
+
+
+def test_move_copies_before_deleting(db):
+    db.orders.insert_many([order(f'o{n}', order_date=OLD + timedelta(minutes=n)) for n in range(5)])
+
+    batch = move_batch(db.orders, db.orders_archive, {'restaurant_id': 'main'}, 'order_date', 2)
+
+    assert [doc['_id'] for doc in batch] == ['o0', 'o1']  # oldest first
+    assert ids(db.orders_archive) == ['o0', 'o1']
+    assert ids(db.orders) == ['o2', 'o3', 'o4']
+
+
+def test_interrupted_move_is_finished_by_the_next_run(db):
+    # A crash after the copy leaves the order in both collections
+    db.orders.insert_one(order('o1'))
+    db.orders_archive.insert_one(dict(order('o1'), archived_at=OLD))
+
+    user_ids, counts = archive_history(db, 'main')
+
+    assert counts['orders'] == 1
+    assert ids(db.orders) == []
+    assert ids(db.orders_archive) == ['o1']
+
+
+def test_runs_are_bounded_by_batches(db):
+    db.orders.insert_many([order(f'o{n}') for n in range(5)])
+
+    _, counts = archive_history(db, 'main', batch_size=2, max_batches=2)
+
+    assert counts['orders'] == 4
+    assert db.orders.count_documents({}) == 1
+
+
+def test_summaries_still_count_archived_orders(db):
+    for doc in [order('o1', total=10), order('o2', total=15), order('o3', order_date=RECENT, total=5)]:
+        db.orders.insert_one(doc)
+        order_summary.record_order(db, doc)
+    before = order_summary.get_summary(db, 'main', 'u1')
+
+    archive_history(db, 'main')
+
+    assert db.orders.count_documents({}) == 1
+    assert order_summary.get_summary(db, 'main', 'u1') == before
+    assert before['order_count'] == 3 and before['total_spent'] == 30
+
+    # A summary rebuilt after archiving reads the archive too
+    db.order_summaries.delete_many({})
+    assert order_summary.get_summary(db, 'main', 'u1') == before
+
+
+def test_rollups_still_count_archived_orders(db, merge_stage):
+    db.orders.insert_many([order('o1', total=10), order('o2', total=15), order('o3', order_date=RECENT, total=5)])
+    analytics.rollup_sales(db, 'main', lag=0)
+
+    archive_history(db, 'main')
+    # Archived orders were counted once and are not counted again
+    analytics.rollup_sales(db, 'main', lag=0)
+    assert analytics.top_items(db, 'main', days=365)[0]['quantity'] == 3
+
+    # A rebuild goes through the archive as well
+    analytics.rebuild_sales(db, 'main')
+    assert analytics.top_items(db, 'main', days=365)[0]['quantity'] == 3
+    assert analytics.top_items(db, 'main', days=365)[0]['revenue'] == 30
@@ -0,0 +1,77 @@
+import logging
+
+import pytest
+from mongomock.collection import Collection
+
+
+@pytest.fixture
+def auth_views(core, monkeypatch):
+    import auth_views
+    # The index is only created once per process; every test starts without it
+    monkeypatch.setattr(auth_views, 'email_index_ready', False)
+    return auth_views
+
+
+def register(client, email, name='Ada'):
+    return client.post('/api/register', json={'name': name, 'email': email, 'password': 'secret'})
+
+
+def test_registration_creates_the_unique_email_index(core, client, auth_views):
+    assert register(client, 'ada@savory.test').status_code == 201
+
+    response = register(client, 'ada@savory.test')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'User already exists'}
+    assert core.mongo.db.users.index_information()['email_1']['unique']
+
+
+def test_concurrent_duplicate_is_rejected_by_the_index(core, client, auth_views, monkeypatch):
+    assert register(client, 'ada@savory.test').status_code == 201
+    # The other sign-up passed the pre-check before this one was inserted
+    monkeypatch.setattr(Collection, 'find_one', lambda self, *args, **kwargs: None)
+
+    response = register(client, 'ada@savory.test', name='Ada Again')
+
+    assert response.status_code == 400
+    assert core.mongo.db.users.count_documents({'email': 'ada@savory.test'}) == 1
+
+
+def test_index_failure_falls_back_to_the_pre_check(core, client, auth_views, monkeypatch, caplog):
+    # Accounts created before the index existed share an email
+    core.mongo.db.users.insert_many([
+        {'_id': 'u1', 'email': 'twin@savory.test'},
+        {'_id': 'u2', 'email': 'twin@savory.test'}
+    ])
+    create_index = Collection.create_index
+    attempts = []
+
+    def counting_create_index(self, *args, **kwargs):
+        attempts.append(args)
+        return create_index(self, *args, **kwargs)
+
+    monkeypatch.setattr(Collection, 'create_index', counting_create_index)
+
+    with caplog.at_level(logging.ERROR):
+        assert register(client, 'ada@savory.test').status_code == 201
+        assert register(client, 'grace@savory.test').status_code == 201
+        assert register(client, 'twin@savory.test').status_code == 400
+
+    assert len(attempts) == 1
+    assert 'email_1' not in core.mongo.db.users.index_information()
+    assert 'unique index on users.email' in caplog.text
+
+
+def test_migration_names_the_duplicate_emails(db):
+    import init_data
+    db.users.insert_many([
+        {'_id': 'u1', 'email': 'twin@savory.test'},
+        {'_id': 'u2', 'email': 'twin@savory.test'},
+        {'_id': 'u3', 'email': 'ada@savory.test'}
+    ])
+
+    with pytest.raises(SystemExit) as failure:
+        init_data.create_email_index(db)
+
+    assert 'twin@savory.test' in str(failure.value.code)
+    assert 'ada@savory.test' not in str(failure.value.code)
@@ -0,0 +1,101 @@
+import threading
+from datetime import datetime
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+
+@pytest.fixture
+def section(core, monkeypatch):
+    """Register a bootstrap section for one test"""
+    def register(name, loader, needs_auth=False):
+        monkeypatch.setitem(core.BOOTSTRAP_SECTIONS, name, (loader, needs_auth, None))
+    return register
+
+
+def add_order(core, user_id, total):
+    core.mongo.db.orders.insert_one({
+        '_id': f'order-{total}',
+        'restaurant_id': 'main',
+        'user_id': user_id,
+        'items': [{'name': 'Soup', 'quantity': 1, 'price': total}],
+        'total': total,
+        'status': 'pending',
+        'order_date': datetime(2026, 1, total)
+    })
+
+
+def test_only_the_requested_sections_are_loaded(core, client, login):
+    core.mongo.db.menu_items.insert_one({'_id': 'soup', 'restaurant_id': 'main', 'name': 'Soup', 'available': True})
+    headers = login(_id='u1')
+    for total in range(1, 8):
+        add_order(core, 'u1', total)
+
+    response = client.get('/api/bootstrap?include=menu,recent_orders', headers=headers)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert sorted(body) == ['errors', 'menu', 'recent_orders']
+    assert body['errors'] == {}
+    assert [item['_id'] for item in body['menu']] == ['soup']
+    assert [order['total'] for order in body['recent_orders']] == [7, 6, 5, 4, 3]
+
+
+def test_nothing_requested_loads_nothing(client):
+    assert client.get('/api/bootstrap').get_json() == {'errors': {}}
+
+
+def test_unknown_sections_are_rejected(client):
+    response = client.get('/api/bootstrap?include=menu,wine_list')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Unknown sections: wine_list'}
+
+
+def test_sections_needing_a_user_fail_alone(client):
+    body = client.get('/api/bootstrap?include=menu,orders').get_json()
+
+    assert body['menu'] == []
+    assert body['errors'] == {'orders': 'Authentication required'}
+
+
+def test_invalid_token_is_rejected(client):
+    response = client.get('/api/bootstrap?include=menu', headers={'Authorization': 'Bearer nonsense'})
+
+    assert response.status_code == 401
+
+
+def test_sections_load_concurrently(section, client):
+    # Each loader waits for the other, so they only finish if they run at the same time
+    both_started = threading.Barrier(2, timeout=5)
+
+    def loader(tenant, user):
+        both_started.wait()
+        return tenant.id
+
+    section('left', loader)
+    section('right', loader)
+
+    body = client.get('/api/bootstrap?include=left,right').get_json()
+
+    assert body == {'left': 'main', 'right': 'main', 'errors': {}}
+
+
+def test_failed_sections_are_reported_per_section(section, client):
+    def broken(tenant, user):
+        raise ValueError('bad menu document')
+
+    def down(tenant, user):
+        raise AutoReconnect('no primary')
+
+    section('broken', broken)
+    section('down', down)
+    section('fine', lambda tenant, user: 'ok')
+
+    response = client.get('/api/bootstrap?include=broken,down,fine')
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'fine': 'ok',
+        'errors': {'broken': 'bad menu document', 'down': 'Temporarily unavailable'}
+    }
@@ -0,0 +1,171 @@
+import threading
+import time
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+from flask import Flask, jsonify, request
+
+from cache import Cache, LocalLRU, MemoryStore, SQLiteStore, cached
+from resilience import is_unavailable
+
+
+@pytest.fixture
+def cache():
+    return Cache(MemoryStore(), stale_ttl=60, fallback=is_unavailable)
+
+
+def test_value_is_loaded_once_then_cached(cache):
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return {'items': 3}
+
+    assert cache.get_or_set('menu', loader) == {'items': 3}
+    assert cache.get_or_set('menu', loader) == {'items': 3}
+    assert len(loads) == 1
+    assert cache.stats['misses'] == 1
+    assert cache.stats['local_hits'] == 1
+
+
+def test_concurrent_misses_run_the_loader_once(cache):
+    loads = []
+    started = threading.Event()
+
+    def slow_loader():
+        loads.append(1)
+        started.set()
+        time.sleep(0.2)
+        return 'menu'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_set('menu', slow_loader)))
+               for _ in range(8)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['menu'] * 8
+    assert len(loads) == 1
+    assert cache.stats['coalesced'] == 7
+
+
+def test_invalidating_a_tag_drops_only_its_entries(cache):
+    cache.set('menu', 'full menu', tags=['menu'])
+    cache.set('orders:u1', 'orders', tags=['orders:u1'])
+
+    cache.invalidate('menu')
+
+    assert cache.get('menu') is None
+    assert cache.get('orders:u1') == 'orders'
+
+
+def test_invalidation_reaches_other_processes_through_the_shared_store():
+    # Other processes' LRUs only notice once their short local TTL is over;
+    # without local entries the shared tag version decides straight away
+    shared = MemoryStore()
+    worker_a, worker_b = Cache(shared, lambda: LocalLRU(ttl=0)), Cache(shared, lambda: LocalLRU(ttl=0))
+    worker_a.set('menu', 'v1', tags=['menu'])
+    assert worker_b.get('menu') == 'v1'
+
+    worker_a.invalidate('menu')
+
+    assert worker_b.get('menu') is None
+
+
+def test_value_loaded_during_an_invalidation_is_not_stored(cache):
+    def loader():
+        cache.invalidate('menu')  # the menu changes while we read it
+        return 'old menu'
+
+    assert cache.get_or_set('menu', loader, tags=['menu']) == 'old menu'
+    assert cache.get('menu') is None
+
+
+def test_scopes_are_isolated(cache):
+    cache.set('menu', 'main menu', tags=['menu'], scope='main')
+    cache.set('menu', 'other menu', tags=['menu'], scope='other')
+
+    cache.invalidate('menu', scope='main')
+
+    assert cache.get('menu', scope='main') is None
+    assert cache.get('menu', scope='other') == 'other menu'
+
+
+def test_stale_copy_is_served_while_the_database_is_down(cache):
+    cache.set('menu', 'last good menu', tags=['menu'])
+    cache.invalidate('menu')
+
+    def down():
+        raise AutoReconnect('no primary')
+
+    assert cache.fetch('menu', down, tags=['menu']) == ('last good menu', True)
+    assert cache.stats['stale'] == 1
+
+
+def test_other_errors_are_not_hidden(cache):
+    cache.set('menu', 'last good menu')
+    cache.clear()
+
+    with pytest.raises(ValueError):
+        cache.get_or_set('menu', lambda: (_ for _ in ()).throw(ValueError('bug')))
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryStore(maxsize=3, sweep_interval=0)
+    return SQLiteStore(str(tmp_path / 'cache.sqlite3'), maxsize=3, sweep_interval=0)
+
+
+def test_store_is_bounded_and_keeps_tag_versions(store):
+    store.incr('tag:menu')
+    for n in range(10):
+        store.set(f'view:{n}', n, ttl=60)
+
+    assert len(store) == 4  # three entries and the tag version
+    assert store.get_many(['view:9', 'tag:menu']) == {'view:9': 9, 'tag:menu': 1}
+    assert store.get_many(['view:0']) == {}
+
+
+def test_memory_store_evicts_the_least_recently_used():
+    store = MemoryStore(maxsize=2)
+    store.set('a', 1, ttl=60)
+    store.set('b', 2, ttl=60)
+    store.get_many(['a'])
+    store.set('c', 3, ttl=60)
+
+    assert store.get_many(['a', 'b', 'c']) == {'a': 1, 'c': 3}
+
+
+def test_expired_entries_are_swept(store, monkeypatch):
+    store.set('old', 1, ttl=1)
+    store.incr('tag:menu')
+    now = time.time()
+    monkeypatch.setattr('cache.time.time', lambda: now + 5)
+    store.set('new', 2, ttl=60)
+
+    assert len(store) == 2
+    assert store.get_many(['old', 'new', 'tag:menu']) == {'new': 2, 'tag:menu': 1}
+
+
+def test_view_key_only_uses_the_arguments_the_view_reads():
+    app = Flask(__name__)
+    cache = Cache(MemoryStore())
+    calls = []
+
+    @app.route('/menu')
+    @cached(cache, tags=['menu'], query_args=('category',))
+    def menu():
+        calls.append(request.args.get('category'))
+        return jsonify(calls), 200
+
+    client = app.test_client()
+    for n in range(5):
+        assert client.get(f'/menu?_={n}').get_json() == [None]
+    assert client.get('/menu?category=pizza&_=9').get_json() == [None, 'pizza']
+    assert len(cache.shared) == 2
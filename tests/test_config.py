@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHOW_CONFIG = (
+    "import json; from core import app; "
+    "print(json.dumps({key: app.config.get(key) for key in "
+    "['TESTING', 'MONGO_URI', 'JOB_QUEUE_EAGER', 'MAIL_BACKEND', 'WRITE_BEHIND_MODE']}))"
+)
+
+
+def app_config(app_config=None):
+    # Settings are read at import, so each case gets a fresh interpreter
+    env = {key: value for key, value in os.environ.items() if key not in ('APP_CONFIG', 'MONGO_URI', 'TEST_MONGO_URI')}
+    if app_config:
+        env['APP_CONFIG'] = app_config
+    result = subprocess.run([sys.executable, '-c', SHOW_CONFIG], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_base_config_by_default():
+    config = app_config()
+
+    assert not config['TESTING']
+    assert config['MONGO_URI'] == 'mongodb://localhost:27017/restaurant_db'
+
+
+def test_testing_config_is_selectable():
+    config = app_config('testing')
+
+    assert config == {
+        'TESTING': True,
+        'MONGO_URI': 'mongodb://localhost:27017/restaurant_test',
+        'JOB_QUEUE_EAGER': True,
+        'MAIL_BACKEND': 'memory',
+        'WRITE_BEHIND_MODE': 'sync'
+    }
+
+
+def test_unknown_config_name_fails_loudly():
+    env = dict(os.environ, APP_CONFIG='staging')
+    result = subprocess.run([sys.executable, '-c', 'import core'], cwd=ROOT, env=env, capture_output=True, text=True)
+
+    assert result.returncode != 0
+    assert "Unknown APP_CONFIG 'staging'" in result.stderr
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+from fieldsets import Field, UnknownFields, cents, field, parse_fields, projection, render, timestamp
+
+FIELDS = {
+    'id': Field({'_id': 1}, lambda doc: str(doc['_id'])),
+    'name': field('name'),
+    'price_cents': Field({'price': 1}, lambda doc: cents(doc.get('price'))),
+    'item_count': Field({'item_count': {'$size': '$items'}}, lambda doc: doc['item_count'])
+}
+DEFAULT = ['id', 'name']
+
+
+def test_default_fields_when_none_are_asked_for():
+    assert parse_fields(None, FIELDS, DEFAULT) == ['id', 'name']
+    assert parse_fields(' , ', FIELDS, DEFAULT) == ['id', 'name']
+
+
+def test_requested_fields_keep_the_resource_order():
+    assert parse_fields('price_cents, id,price_cents', FIELDS, DEFAULT) == ['id', 'price_cents']
+
+
+def test_unknown_fields_are_named():
+    with pytest.raises(UnknownFields) as error:
+        parse_fields('id,colour,size', FIELDS, DEFAULT)
+
+    assert 'Unknown fields: colour, size' in str(error.value)
+    assert 'Allowed: id, name, price_cents, item_count' in str(error.value)
+
+
+def test_projection_reads_only_what_is_asked_for():
+    assert projection(['name', 'price_cents'], FIELDS) == {'_id': 0, 'name': 1, 'price': 1}
+    assert projection(['id', 'item_count'], FIELDS) == {'_id': 1, 'item_count': {'$size': '$items'}}
+
+
+def test_render():
+    doc = {'_id': 'abc', 'name': 'Soup', 'price': 4.5}
+
+    assert render(doc, ['id', 'name', 'price_cents'], FIELDS) == {'id': 'abc', 'name': 'Soup', 'price_cents': 450}
+
+
+def test_cents_rounds_float_prices():
+    assert cents(24.99) == 2499
+    assert cents(0.29) == 29
+    assert cents(None) is None
+
+
+def test_timestamp_treats_stored_dates_as_utc():
+    assert timestamp(datetime(2024, 1, 1)) == 1704067200
+    assert timestamp(None) is None
@@ -0,0 +1,133 @@
+from datetime import datetime
+
+from jobs import HANDLERS, JobContext, JobQueue, job_handler
+from mailer import MemoryMailer, SMTPMailer, create_mailer
+
+calls = []
+
+
+@job_handler('test_record')
+def record(ctx, payload):
+    calls.append(payload)
+
+
+@job_handler('test_broken')
+def broken(ctx, payload):
+    raise RuntimeError('boom')
+
+
+def make_queue(db, **kwargs):
+    config = {'DEFAULT_RESTAURANT_ID': 'main'}
+    return JobQueue(db, context=JobContext(db, MemoryMailer(), config), **kwargs)
+
+
+def run_next(queue):
+    job = queue.claim('test-worker')
+    assert job is not None
+    return queue.process(job)
+
+
+def test_job_runs_and_completes(db):
+    queue = make_queue(db)
+    job_id = queue.enqueue('test_record', {'n': 1})
+
+    assert run_next(queue)
+    assert {'n': 1} in calls
+    job = db.jobs.find_one({'_id': job_id})
+    assert job['status'] == 'done'
+    assert 'locked_by' not in job
+    assert queue.claim('test-worker') is None
+
+
+def test_failed_job_is_retried_with_backoff(db):
+    queue = make_queue(db, backoff_base=30)
+    job_id = queue.enqueue('test_broken')
+
+    assert not run_next(queue)
+    job = db.jobs.find_one({'_id': job_id})
+    assert job['status'] == 'queued'
+    assert job['attempts'] == 1
+    assert 'boom' in job['last_error']
+    # Not due again until the backoff has passed
+    assert (job['run_at'] - datetime.utcnow()).total_seconds() > 25
+    assert queue.claim('test-worker') is None
+
+
+def test_job_is_dead_lettered_after_max_attempts(db):
+    queue = make_queue(db, backoff_base=0, max_attempts=3)
+    job_id = queue.enqueue('test_broken')
+
+    for _ in range(3):
+        assert not run_next(queue)
+
+    assert db.jobs.find_one({'_id': job_id}) is None
+    dead = db.jobs_dead.find_one({'_id': job_id})
+    assert dead['status'] == 'dead'
+    assert dead['attempts'] == 3
+
+    assert queue.retry_dead(job_id)
+    assert db.jobs_dead.find_one({'_id': job_id}) is None
+    assert db.jobs.find_one({'_id': job_id})['attempts'] == 0
+
+
+def test_unknown_job_type_fails(db):
+    queue = make_queue(db, max_attempts=1)
+    job_id = queue.enqueue('test_no_such_handler')
+
+    assert not run_next(queue)
+    assert 'No handler registered' in db.jobs_dead.find_one({'_id': job_id})['last_error']
+
+
+def test_eager_queue_runs_inline(db):
+    queue = make_queue(db, eager=True)
+    job_id = queue.enqueue('test_record', {'n': 'eager'})
+
+    assert {'n': 'eager'} in calls
+    assert db.jobs.find_one({'_id': job_id})['status'] == 'done'
+
+
+def test_handler_module_is_loaded_with_the_first_job(db):
+    queue = make_queue(db, eager=True, handlers='tasks')
+    db.contacts.insert_one({'_id': 'c1', 'name': 'Ann', 'email': 'ann@example.com',
+                            'subject': 'Refund', 'message': 'Please refund my order'})
+
+    queue.enqueue('contact_received', {'contact_id': 'c1'})
+
+    assert 'contact_received' in HANDLERS
+    assert db.contacts.find_one({'_id': 'c1'})['priority'] == 'high'
+
+
+def test_triage_mails_customers_but_not_spam(db):
+    queue = make_queue(db, eager=True, handlers='tasks')
+    db.contacts.insert_many([
+        {'_id': 'real', 'name': 'Ann', 'email': 'ann@example.com',
+         'subject': 'Booking', 'message': 'Can I bring a dog?'},
+        {'_id': 'spam', 'name': 'Bot', 'email': 'bot@example.com',
+         'subject': 'SEO services', 'message': 'Cheap backlinks'}
+    ])
+
+    queue.enqueue_many('contact_received', [{'contact_id': 'real'}, {'contact_id': 'spam'}])
+
+    outbox = queue.context.mailer.outbox
+    assert [message['to'] for message in outbox] == ['ann@example.com']
+    assert outbox[0]['subject'] == 'We received your message'
+    assert db.contacts.find_one({'_id': 'spam'})['priority'] == 'spam'
+
+
+def test_mailer_backend_selection():
+    assert isinstance(create_mailer({'MAIL_BACKEND': 'smtp'}), SMTPMailer)
+    assert isinstance(create_mailer({'MAIL_BACKEND': 'memory'}), MemoryMailer)
+    # Tests never send real mail, whatever the backend says
+    assert isinstance(create_mailer({'MAIL_BACKEND': 'smtp', 'TESTING': True}), MemoryMailer)
+
+
+def test_memory_mailer_keeps_messages():
+    mailer = MemoryMailer({'MAIL_DEFAULT_SENDER': 'kitchen@savory.com'})
+    mailer.send('ann@example.com', 'Hello', 'Body')
+
+    assert mailer.outbox == [{
+        'from': 'kitchen@savory.com',
+        'to': 'ann@example.com',
+        'subject': 'Hello',
+        'body': 'Body'
+    }]
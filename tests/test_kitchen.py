@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from concurrency import VersionConflict
+from kitchen import ORDER_TRANSITIONS, InvalidTransition, kitchen_queue, transition_order
+
+
+def place(db, order_id, status='pending', **fields):
+    order = dict({
+        '_id': order_id,
+        'restaurant_id': 'main',
+        'user_id': 'u1',
+        'status': status,
+        'active': True,
+        'priority': 0,
+        'order_date': datetime.utcnow(),
+        'items': [{'name': 'Soup', 'quantity': 1}]
+    }, **fields)
+    db.orders.insert_one(order)
+    return order
+
+
+def test_order_moves_through_the_kitchen(db):
+    place(db, 'o1')
+
+    for status in ['confirmed', 'preparing', 'ready', 'delivered']:
+        assert transition_order(db, 'main', 'o1', status) is not None
+
+    order = db.orders.find_one({'_id': 'o1'})
+    assert order['status'] == 'delivered'
+    assert order['active'] is False
+    assert order['version'] == 4
+    assert [entry['status'] for entry in order['status_history']] == ['confirmed', 'preparing', 'ready', 'delivered']
+
+
+def test_transition_returns_the_order_as_it_was(db):
+    place(db, 'o1')
+
+    previous = transition_order(db, 'main', 'o1', 'preparing')
+
+    assert previous['status'] == 'pending'
+    assert previous['user_id'] == 'u1'
+
+
+def test_invalid_transition_is_rejected(db):
+    place(db, 'o1', status='preparing')
+
+    with pytest.raises(InvalidTransition) as error:
+        transition_order(db, 'main', 'o1', 'delivered')
+
+    assert error.value.current == 'preparing'
+    assert db.orders.find_one({'_id': 'o1'})['status'] == 'preparing'
+
+
+def test_pending_is_not_a_target(db):
+    place(db, 'o1', status='confirmed')
+
+    assert 'pending' not in ORDER_TRANSITIONS
+    with pytest.raises(InvalidTransition):
+        transition_order(db, 'main', 'o1', 'pending')
+
+
+def test_delivered_orders_cannot_be_cancelled(db):
+    place(db, 'o1', status='delivered', active=False)
+
+    with pytest.raises(InvalidTransition):
+        transition_order(db, 'main', 'o1', 'cancelled')
+
+
+def test_stale_version_conflicts(db):
+    place(db, 'o1')
+    transition_order(db, 'main', 'o1', 'confirmed', version=0)
+
+    # A second client still looking at version 0
+    with pytest.raises(VersionConflict) as error:
+        transition_order(db, 'main', 'o1', 'cancelled', version=0)
+
+    assert error.value.current['status'] == 'confirmed'
+    assert error.value.current['version'] == 1
+    assert transition_order(db, 'main', 'o1', 'cancelled', version=1) is not None
+
+
+def test_missing_or_foreign_order(db):
+    place(db, 'o1')
+
+    assert transition_order(db, 'main', 'nope', 'confirmed') is None
+    assert transition_order(db, 'other', 'o1', 'confirmed') is None
+
+
+def test_kitchen_queue_puts_rush_orders_first_then_oldest(db):
+    now = datetime.utcnow()
+    place(db, 'old', order_date=now - timedelta(minutes=10))
+    place(db, 'new', order_date=now)
+    place(db, 'rush', priority=1, order_date=now + timedelta(minutes=1))
+    place(db, 'done', status='delivered', active=False, order_date=now - timedelta(hours=1))
+    place(db, 'elsewhere', restaurant_id='other')
+
+    assert [order['_id'] for order in kitchen_queue(db, 'main')] == ['rush', 'old', 'new']
+    assert len(kitchen_queue(db, 'main', limit=1)) == 1
@@ -0,0 +1,66 @@
+from menu_sync import changes_since, current_version, record_change
+
+
+def test_no_changes_means_full_sync(db):
+    assert current_version(db, 'main') == 0
+    assert changes_since(db, 'main', 0) is None
+
+
+def test_changes_since_a_version(db):
+    record_change(db, 'main', ['a', 'b'])
+    record_change(db, 'main', 'c')
+    record_change(db, 'main', 'a', op='delete')
+
+    assert changes_since(db, 'main', 1) == (3, ['c'], ['a'])
+    assert changes_since(db, 'main', 3) == (3, [], [])
+
+
+def test_latest_operation_on_an_item_wins(db):
+    record_change(db, 'main', 'a')
+    record_change(db, 'main', 'b', op='delete')
+    record_change(db, 'main', 'b')
+
+    version, changed, deleted = changes_since(db, 'main', 1)
+    assert version == 3
+    assert sorted(changed) == ['b']
+    assert deleted == []
+
+
+def test_clients_ahead_of_the_server_resync(db):
+    record_change(db, 'main', 'a')
+
+    assert changes_since(db, 'main', 5) is None
+
+
+def test_trimmed_log_forces_a_resync(db):
+    for item_id in ['a', 'b', 'c']:
+        record_change(db, 'main', item_id)
+    db.menu_changes.delete_one({'version': 2})
+
+    assert changes_since(db, 'main', 1) is None
+
+
+def test_stops_at_a_change_not_logged_yet(db):
+    record_change(db, 'main', 'a')
+    record_change(db, 'main', 'b')
+    # A writer has taken version 3 but not logged its change yet
+    db.counters.update_one({'_id': 'menu_version:main'}, {'$inc': {'seq': 1}})
+    db.menu_changes.insert_one({'_id': 'main:4', 'restaurant_id': 'main', 'version': 4, 'item_ids': ['d'], 'op': 'upsert'})
+
+    assert changes_since(db, 'main', 1) == (2, ['b'], [])
+
+
+def test_restaurants_have_separate_versions(db):
+    record_change(db, 'main', 'a')
+    record_change(db, 'other', 'x')
+    record_change(db, 'other', 'y')
+
+    assert current_version(db, 'main') == 1
+    assert changes_since(db, 'other', 1) == (2, ['y'], [])
+
+
+def test_empty_change_is_not_logged(db):
+    record_change(db, 'main', 'a')
+
+    assert record_change(db, 'main', []) == 1
+    assert db.menu_changes.count_documents({}) == 1
@@ -0,0 +1,229 @@
+import os
+import subprocess
+import sys
+import uuid
+
+import pytest
+from bson import json_util
+from pymongo.errors import AutoReconnect, OperationFailure
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError, LocalSpool, is_unavailable
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def failing(breaker, times):
+    for _ in range(times):
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_enough_failures(clock):
+    breaker = CircuitBreaker('main', failure_threshold=3, reset_timeout=10)
+
+    failing(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    failing(breaker, 1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats == {'opened': 1, 'rejected': 1}
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_failures_must_be_a_large_enough_share(clock):
+    breaker = CircuitBreaker('main', failure_threshold=3, failure_ratio=0.5)
+
+    for _ in range(10):
+        breaker.record_success()
+    failing(breaker, 5)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_window_forgets_old_failures(clock):
+    breaker = CircuitBreaker('main', failure_threshold=3, window=10)
+
+    failing(breaker, 2)
+    clock[0] += 11
+    failing(breaker, 2)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_one_trial_after_reset_timeout(clock):
+    breaker = CircuitBreaker('main', failure_threshold=1, reset_timeout=10)
+    breaker.trip()
+    assert breaker.retry_after() == 10
+
+    clock[0] += 10
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Everyone else waits for the trial's outcome
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker('main', failure_threshold=1, reset_timeout=10)
+    breaker.trip()
+    clock[0] += 10
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats['opened'] == 2
+    assert not breaker.allow()
+
+
+def test_abandoned_trial_expires(clock):
+    breaker = CircuitBreaker('main', failure_threshold=1, reset_timeout=10)
+    breaker.trip()
+    clock[0] += 10
+    assert breaker.allow()
+
+    clock[0] += 10
+    assert breaker.allow()
+
+
+def test_unavailable_errors():
+    assert is_unavailable(AutoReconnect('connection reset'))
+    assert is_unavailable(CircuitOpenError('open'))
+    assert is_unavailable(OperationFailure('stepped down', code=189))
+    assert not is_unavailable(OperationFailure('bad query', code=2))
+    assert not is_unavailable(ValueError('nope'))
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+def write_spool(path, records):
+    with open(path, 'w') as spool:
+        spool.writelines(json_util.dumps(record) + '\n' for record in records)
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return LocalSpool(str(tmp_path), 'orders')
+
+
+def test_spooled_records_are_replayed_in_order(spool, tmp_path):
+    for n in range(3):
+        spool.append({'n': n})
+    assert os.listdir(tmp_path) == [f'orders-{os.getpid()}.jsonl']
+    assert spool.pending()
+
+    applied = []
+    assert spool.replay(applied.append) == 3
+
+    assert [record['n'] for record in applied] == [0, 1, 2]
+    assert not spool.pending()
+    assert spool.stats == {'spooled': 3, 'replayed': 3, 'dead': 0}
+
+
+def test_replay_stops_while_the_database_is_unavailable(spool):
+    for n in range(3):
+        spool.append({'n': n})
+    applied = []
+
+    def apply(record):
+        if record['n'] == 1:
+            raise AutoReconnect('no primary')
+        applied.append(record['n'])
+
+    assert spool.replay(apply) == 1
+    assert spool.pending()
+
+    assert spool.replay(lambda record: applied.append(record['n'])) == 2
+    assert applied == [0, 1, 2]
+    assert not spool.pending()
+
+
+def test_records_that_can_never_apply_are_dead_lettered(spool, tmp_path):
+    spool.append({'n': 0})
+    spool.append({'n': 1})
+    with open(tmp_path / f'orders-{os.getpid()}.jsonl', 'a') as partial:
+        partial.write('{"n": 2')  # cut short by a crash
+    applied = []
+
+    def apply(record):
+        if record['n'] == 0:
+            raise KeyError('unknown restaurant')
+        applied.append(record['n'])
+
+    assert spool.replay(apply) == 1
+
+    assert applied == [1]
+    dead = [json_util.loads(line) for line in open(tmp_path / 'orders.dead.jsonl')]
+    assert [entry.get('record') for entry in dead] == [None, {'n': 0}]
+    assert 'line' in dead[0] and 'failed_at' in dead[1]
+    assert spool.stats['dead'] == 2
+    assert not spool.pending()
+
+
+def test_spools_of_dead_processes_are_reclaimed(spool, tmp_path):
+    live = os.getppid()
+    write_spool(tmp_path / f'orders-{dead_pid()}.jsonl', [{'n': 'dead'}])
+    write_spool(tmp_path / f'orders-{dead_pid()}.jsonl.replaying-{dead_pid()}-abc', [{'n': 'dead replayer'}])
+    write_spool(tmp_path / f'orders-{live}.jsonl', [{'n': 'live'}])
+    write_spool(tmp_path / f'orders-{dead_pid()}.jsonl.replaying-{live}-abc', [{'n': 'live replayer'}])
+    applied = []
+
+    assert spool.replay(lambda record: applied.append(record['n'])) == 2
+
+    assert sorted(applied) == ['dead', 'dead replayer']
+    assert len(os.listdir(tmp_path)) == 2
+
+
+@pytest.fixture
+def outage(core, monkeypatch, tmp_path):
+    """The main database's breaker is open; orders spool to tmp_path"""
+    breaker = CircuitBreaker('main')
+    breaker.trip()
+    monkeypatch.setitem(core.breakers, 'main', breaker)
+    monkeypatch.setattr(core.order_spool, 'directory', str(tmp_path))
+    monkeypatch.setattr(core.order_spool, 'replay_in_background', lambda *args: None)
+
+    def recover():
+        monkeypatch.setitem(core.breakers, 'main', CircuitBreaker('main'))
+    return recover
+
+
+def test_orders_are_accepted_during_an_outage_and_written_later(core, client, login, outage):
+    import order_views
+
+    customer = dict(login(_id='u1'), **{'Idempotency-Key': str(uuid.uuid4())})
+    order = {'items': [{'id': 'soup', 'name': 'Soup', 'price': 6, 'quantity': 2}], 'total': 12, 'delivery_address': 'x'}
+
+    response = client.post('/api/orders', headers=customer, json=order)
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['sync_status'] == 'accepted_pending'
+    # The customer's retry is spooled too, under the same id
+    assert client.post('/api/orders', headers=customer, json=order).status_code == 202
+    assert core.mongo.db.orders.count_documents({}) == 0
+
+    # Still down: nothing is lost
+    assert core.order_spool.replay(order_views.replay_order) == 0
+    assert core.order_spool.pending()
+
+    outage()
+    assert core.order_spool.replay(order_views.replay_order) == 2
+
+    assert [doc['_id'] for doc in core.mongo.db.orders.find()] == [body['_id']]
+    assert core.order_spool.stats['dead'] == 0
+    summary = client.get('/api/profile/summary', headers=customer).get_json()
+    assert summary['order_count'] == 1 and summary['total_spent'] == 12
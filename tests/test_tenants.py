@@ -0,0 +1,135 @@
+import mongomock
+import pytest
+
+from tenants import PREFIX_ENVIRON_KEY, PathPrefixMiddleware, TenantRouter
+
+RESTAURANTS = [
+    {'_id': 'downtown', 'name': 'Savory Downtown', 'hosts': ['Downtown.Savory.Example'], 'database': 'savory_downtown'},
+    {'_id': 'airport', 'name': 'Savory Airport', 'database': 'savory_airport', 'mongo_uri': 'mongodb://far-away:27017'},
+    {'_id': 'uptown', 'name': 'Savory Uptown'}
+]
+
+
+@pytest.fixture
+def router(db):
+    db.restaurants.insert_many(RESTAURANTS)
+    return TenantRouter(db, refresh_interval=60, client_factory=mongomock.MongoClient)
+
+
+def test_path_prefix_comes_first(router):
+    environ = {PREFIX_ENVIRON_KEY: 'uptown'}
+
+    assert router.resolve(environ, host='downtown.savory.example', header='airport', cookie='airport') == 'uptown'
+
+
+def test_header_then_host_then_cookie(router):
+    assert router.resolve({}, host='downtown.savory.example', header='airport') == 'airport'
+    assert router.resolve({}, host='Downtown.savory.example:8443', cookie='uptown') == 'downtown'
+    assert router.resolve({}, host='www.savory.example', cookie='uptown') == 'uptown'
+
+
+def test_default_restaurant_otherwise(router):
+    assert router.resolve({}, host='www.savory.example') == 'main'
+    # A stale cookie for a restaurant that no longer exists is ignored
+    assert router.resolve({}, cookie='closed') == 'main'
+
+
+def test_explicitly_named_unknown_restaurant_is_rejected(router):
+    assert router.resolve({PREFIX_ENVIRON_KEY: 'closed'}) is None
+    assert router.resolve({}, header='closed') is None
+
+
+def test_registry_is_reread_after_the_refresh_interval(db, router):
+    router.resolve({})
+    db.restaurants.insert_one({'_id': 'harbour'})
+    assert router.resolve({}, header='harbour') is None
+
+    router.refresh_interval = 0
+    assert router.resolve({}, header='harbour') == 'harbour'
+
+
+def test_restaurants_without_a_database_share_the_main_one(db, router):
+    assert router.get('uptown').db is db
+    assert router.get('main').db is db
+
+
+def test_dedicated_database_and_cluster(db, router):
+    downtown = router.get('downtown')
+    assert downtown.db.name == 'savory_downtown'
+    assert downtown.db.client is db.client
+    assert router.cluster('downtown') is None
+
+    airport = router.get('airport')
+    assert airport.db.name == 'savory_airport'
+    assert airport.db.client is not db.client
+    assert router.get('airport').db.client is airport.db.client  # one client per cluster
+    assert router.cluster('airport') == 'mongodb://far-away:27017'
+
+
+def test_path_prefix_is_stripped():
+    seen = []
+    middleware = PathPrefixMiddleware(lambda environ, start_response: seen.append(dict(environ)), prefix='r')
+
+    middleware({'PATH_INFO': '/r/downtown/api/menu'}, None)
+    middleware({'PATH_INFO': '/r/downtown'}, None)
+    middleware({'PATH_INFO': '/api/menu'}, None)
+
+    assert [(environ['PATH_INFO'], environ.get(PREFIX_ENVIRON_KEY)) for environ in seen] == [
+        ('/api/menu', 'downtown'),
+        ('/', 'downtown'),
+        ('/api/menu', None)
+    ]
+
+
+@pytest.fixture
+def restaurants(core):
+    core.mongo.db.restaurants.insert_many(RESTAURANTS[:1] + RESTAURANTS[2:])
+    core.tenants.reload()
+    for restaurant_id in ['main', 'downtown', 'uptown']:
+        core.tenants.get(restaurant_id).db.menu_items.insert_one({
+            '_id': f'{restaurant_id}-soup', 'restaurant_id': restaurant_id, 'name': 'Soup', 'available': True
+        })
+    return core.tenants
+
+
+def menu_ids(response):
+    return [item['_id'] for item in response.get_json()]
+
+
+def test_restaurants_sharing_a_database_only_see_their_own_documents(client, restaurants):
+    assert menu_ids(client.get('/api/menu')) == ['main-soup']
+    assert menu_ids(client.get('/r/uptown/api/menu')) == ['uptown-soup']
+    assert menu_ids(client.get('/api/menu', headers={'X-Restaurant-Id': 'uptown'})) == ['uptown-soup']
+
+
+def test_dedicated_database_holds_the_restaurants_documents(core, client, restaurants, login):
+    customer, admin = login(), login('admin')
+
+    assert menu_ids(client.get('/api/menu', headers={'Host': 'downtown.savory.example'})) == ['downtown-soup']
+    response = client.post('/r/downtown/api/orders', headers=customer, json={
+        'items': [{'id': 'downtown-soup', 'name': 'Soup', 'price': 6, 'quantity': 1}],
+        'total': 6,
+        'delivery_address': '1 Main St'
+    })
+    assert response.status_code == 201
+    order_id = response.get_json()['_id']
+
+    assert core.mongo.db.client['savory_downtown'].orders.count_documents({'_id': order_id}) == 1
+    assert core.mongo.db.orders.count_documents({}) == 0
+    assert len(client.get('/r/downtown/api/orders', headers=admin).get_json()) == 1
+    # The prefixed request left a restaurant cookie behind, so name the main one
+    main = dict(admin, **{'X-Restaurant-Id': 'main'})
+    assert client.get('/api/orders', headers=main).get_json() == []
+    status = client.put(f'/api/orders/{order_id}/status', headers=main, json={'status': 'confirmed'})
+    assert status.status_code == 404
+
+
+def test_prefixed_requests_remember_the_restaurant(client, restaurants):
+    response = client.get('/r/uptown/api/restaurants')
+    assert 'restaurant=uptown' in response.headers['Set-Cookie']
+
+    assert client.get('/api/restaurants').get_json()['current'] == 'uptown'
+
+
+def test_unknown_restaurant_is_not_found(client, restaurants):
+    assert client.get('/r/closed/api/menu').status_code == 404
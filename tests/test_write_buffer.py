@@ -0,0 +1,183 @@
+import glob
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from bson import json_util
+from pymongo.errors import AutoReconnect
+
+from write_buffer import WriteBehindBuffer
+
+
+class FlakyCollection:
+    """A collection whose inserts fail while `down` is set"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.name = collection.name
+        self.down = False
+
+    def insert_many(self, documents, ordered=True):
+        if self.down:
+            raise AutoReconnect('no primary')
+        return self.collection.insert_many(documents, ordered=ordered)
+
+
+@pytest.fixture
+def contacts(db):
+    return FlakyCollection(db.contacts)
+
+
+@pytest.fixture
+def flushed():
+    return []
+
+
+def make_buffer(contacts, flushed, **kwargs):
+    kwargs.setdefault('max_delay', 60)
+    return WriteBehindBuffer(
+        contacts, on_flush=lambda documents: flushed.extend(doc['_id'] for doc in documents), **kwargs
+    )
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+def write_journal(path, documents):
+    with open(path, 'w') as journal:
+        journal.writelines(json_util.dumps(doc) + '\n' for doc in documents)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def ids(collection):
+    return [doc['_id'] for doc in collection.collection.find()]
+
+
+def test_documents_are_written_in_one_batch_on_flush(contacts, flushed):
+    buffer = make_buffer(contacts, flushed)
+    for n in range(3):
+        buffer.insert({'_id': f'c{n}'})
+    assert ids(contacts) == []
+
+    buffer.flush()
+
+    assert ids(contacts) == ['c0', 'c1', 'c2']
+    assert flushed == ['c0', 'c1', 'c2']
+    assert buffer.stats == {'buffered': 3, 'batches': 1, 'written': 3, 'errors': 0}
+
+
+def test_full_buffer_is_flushed_by_the_thread(contacts, flushed):
+    buffer = make_buffer(contacts, flushed, max_size=2)
+    buffer.insert({'_id': 'c0'})
+    buffer.insert({'_id': 'c1'})
+
+    wait_for(lambda: len(ids(contacts)) == 2)
+    assert buffer.stats['batches'] == 1
+
+
+def test_failed_batch_is_retried_ahead_of_newer_documents(contacts, flushed):
+    buffer = make_buffer(contacts, flushed)
+    buffer.insert({'_id': 'c0'})
+    contacts.down = True
+    with pytest.raises(AutoReconnect):
+        buffer.flush()
+    assert buffer.stats['errors'] == 1
+
+    contacts.down = False
+    buffer.insert({'_id': 'c1'})
+    buffer.flush()
+
+    assert ids(contacts) == ['c0', 'c1']
+    assert flushed == ['c0', 'c1']
+
+
+def test_on_flush_only_gets_documents_inserted_now(contacts, flushed):
+    # A batch retried after a failure that had already written part of it
+    contacts.collection.insert_one({'_id': 'c0'})
+    buffer = make_buffer(contacts, flushed)
+    buffer.insert({'_id': 'c0'})
+    buffer.insert({'_id': 'c1'})
+
+    buffer.flush()
+
+    assert flushed == ['c1']
+    assert buffer.stats['written'] == 1
+
+
+def test_sync_mode_writes_straight_away(db, flushed):
+    buffer = make_buffer(db.contacts, flushed, mode='sync')
+    buffer.insert({'_id': 'c0'})
+
+    assert db.contacts.count_documents({}) == 1
+    assert flushed == ['c0']
+
+
+def test_journal_is_removed_once_its_batch_is_written(contacts, flushed, tmp_path):
+    buffer = make_buffer(contacts, flushed, mode='journal', journal_dir=str(tmp_path))
+    buffer.insert({'_id': 'c0'})
+    journal = tmp_path / f'contacts-{os.getpid()}.jsonl'
+    assert json_util.loads(journal.read_text()) == {'_id': 'c0'}
+
+    contacts.down = True
+    with pytest.raises(AutoReconnect):
+        buffer.flush()
+    assert len(os.listdir(tmp_path)) == 1  # kept until the batch is written
+
+    contacts.down = False
+    buffer.flush()
+
+    assert ids(contacts) == ['c0']
+    assert os.listdir(tmp_path) == []
+
+
+def test_replay_waits_for_the_database_instead_of_failing_startup(contacts, flushed, tmp_path):
+    journal = tmp_path / f'contacts-{dead_pid()}.jsonl'
+    write_journal(journal, [{'_id': 'c0'}, {'_id': 'c1'}])
+    contacts.down = True
+
+    buffer = make_buffer(contacts, flushed, mode='journal', journal_dir=str(tmp_path), max_delay=0.01)
+
+    wait_for(lambda: buffer.stats['errors'] >= 1)
+    assert ids(contacts) == []
+    contacts.down = False
+    wait_for(lambda: len(ids(contacts)) == 2)
+    wait_for(lambda: not journal.exists())
+    assert flushed == ['c0', 'c1']
+    assert os.listdir(tmp_path) == []
+
+
+def test_replay_reclaims_journals_of_dead_replayers_only(contacts, flushed, tmp_path):
+    orphaned = tmp_path / f'contacts-{dead_pid()}.jsonl.replaying-{dead_pid()}-abc'
+    write_journal(orphaned, [{'_id': 'c0'}])
+    # Journals of live processes, and the ones they are replaying, are theirs
+    live = os.getppid()
+    write_journal(tmp_path / f'contacts-{live}.jsonl', [{'_id': 'c1'}])
+    write_journal(tmp_path / f'contacts-{dead_pid()}.jsonl.replaying-{live}-abc', [{'_id': 'c2'}])
+
+    buffer = make_buffer(contacts, flushed, mode='journal', journal_dir=str(tmp_path))
+
+    wait_for(lambda: ids(contacts) == ['c0'])
+    wait_for(lambda: not orphaned.exists())
+    assert len(os.listdir(tmp_path)) == 2
+    assert buffer.stats['errors'] == 0
+
+
+def test_replayed_documents_already_written_are_not_flushed_again(contacts, flushed, tmp_path):
+    contacts.collection.insert_one({'_id': 'c0'})
+    write_journal(tmp_path / f'contacts-{dead_pid()}.jsonl.flushing-abc', [{'_id': 'c0'}, {'_id': 'c1'}])
+
+    make_buffer(contacts, flushed, mode='journal', journal_dir=str(tmp_path))
+
+    wait_for(lambda: glob.glob(str(tmp_path / '*')) == [])
+    assert flushed == ['c1']
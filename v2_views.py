@@ -0,0 +1,138 @@
+"""
+Version 2 of the JSON API, built for small payloads
+
+Every listing takes `?fields=` (see fieldsets.py), prices are integer cents,
+dates are Unix timestamps and order statuses are small integers (the table is
+served at /api/v2/codes). Responses are encoded without whitespace or key
+sorting. Rows are short, so clients fetch details such as
+/api/v2/orders/<id> when they need them; over HTTP/2 those extra requests
+share one connection. The v1 API is unchanged.
+"""
+
+import json
+from flask import Blueprint, Response, request, jsonify, g
+from cache import cached
+from fieldsets import Field, UnknownFields, field, parse_fields, projection, render, cents, timestamp
+from media import build_srcset
+from menu_views import menu_query
+from core import cache, token_required, error_response, order_cache_tags
+
+bp = Blueprint('v2', __name__, url_prefix='/api/v2')
+
+# Codes are part of the API: never renumber, only add
+ORDER_STATUS_CODES = {
+    'pending': 0,
+    'confirmed': 1,
+    'preparing': 2,
+    'ready': 3,
+    'delivered': 4,
+    'cancelled': 5
+}
+
+MENU_FIELDS = {
+    'id': Field({'_id': 1}, lambda doc: str(doc['_id'])),
+    'name': field('name'),
+    'category': field('category'),
+    'description': field('description'),
+    'price_cents': Field({'price': 1}, lambda doc: cents(doc.get('price'))),
+    'image': field('image'),
+    'srcset': Field({'image': 1, 'image_variants': 1}, build_srcset),
+    'popular': field('popular'),
+    'created_at': Field({'created_at': 1}, lambda doc: timestamp(doc.get('created_at')))
+}
+MENU_DEFAULT = ['id', 'name', 'category', 'price_cents', 'image']
+
+ORDER_FIELDS = {
+    'id': Field({'_id': 1}, lambda doc: str(doc['_id'])),
+    'status': Field({'status': 1}, lambda doc: ORDER_STATUS_CODES.get(doc.get('status'))),
+    'total_cents': Field({'total': 1}, lambda doc: cents(doc.get('total'))),
+    'order_date': Field({'order_date': 1}, lambda doc: timestamp(doc.get('order_date'))),
+    'item_count': Field({'item_count': {'$size': '$items'}}, lambda doc: doc['item_count']),
+    'items': Field(
+        {'items': {'$map': {
+            'input': '$items',
+            'as': 'item',
+            'in': {'id': '$$item.id', 'name': '$$item.name', 'quantity': '$$item.quantity', 'price': '$$item.price'}
+        }}},
+        lambda doc: [
+            {'id': item.get('id'), 'name': item.get('name'), 'quantity': item.get('quantity'),
+             'price_cents': cents(item.get('price'))}
+            for item in doc['items']
+        ]
+    ),
+    'delivery_address': field('delivery_address'),
+    'notes': field('notes'),
+    'priority': field('priority'),
+    'user_id': field('user_id')
+}
+ORDER_DEFAULT = ['id', 'status', 'total_cents', 'order_date', 'item_count']
+
+def respond(payload, status=200):
+    # jsonify sorts keys and, in debug, indents; neither helps a machine client
+    return Response(json.dumps(payload, separators=(',', ':')), status=status, mimetype='application/json')
+
+def fetch_menu(tenant, names, category=None, search=None):
+    docs = tenant.db.menu_items.find(menu_query(tenant, category, search), projection(names, MENU_FIELDS))
+    return [render(doc, names, MENU_FIELDS) for doc in docs]
+
+def fetch_orders(tenant, current_user, names, match=None):
+    query = dict(match or {}, restaurant_id=tenant.id)
+    if current_user['role'] != 'admin':
+        query['user_id'] = current_user['_id']
+    
+    docs = tenant.db.orders.aggregate([
+        {'$match': query},
+        {'$sort': {'order_date': -1}},
+        {'$project': projection(names, ORDER_FIELDS)}
+    ])
+    return [render(doc, names, ORDER_FIELDS) for doc in docs]
+
+@bp.route('/codes', methods=['GET'])
+def get_codes():
+    return respond({'order_status': ORDER_STATUS_CODES})
+
+@bp.route('/menu', methods=['GET'])
+@cached(cache, tags=['menu'], query_args=('fields', 'category', 'search'))
+def get_menu():
+    try:
+        names = parse_fields(request.args.get('fields'), MENU_FIELDS, MENU_DEFAULT)
+        category = request.args.get('category')
+        search = request.args.get('search')
+        
+        return respond(fetch_menu(g.tenant, names, category, search))
+        
+    except UnknownFields as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/orders', methods=['GET'])
+@token_required
+@cached(cache, tags=order_cache_tags, per_user=True, query_args=('fields',))
+def get_orders(current_user):
+    try:
+        names = parse_fields(request.args.get('fields'), ORDER_FIELDS, ORDER_DEFAULT)
+        
+        return respond(fetch_orders(g.tenant, current_user, names))
+        
+    except UnknownFields as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return error_response(e)
+
+@bp.route('/orders/<order_id>', methods=['GET'])
+@token_required
+def get_order(current_user, order_id):
+    try:
+        names = parse_fields(request.args.get('fields'), ORDER_FIELDS, list(ORDER_FIELDS))
+        
+        orders = fetch_orders(g.tenant, current_user, names, {'_id': order_id})
+        if not orders:
+            return jsonify({'error': 'Order not found'}), 404
+        
+        return respond(orders[0])
+        
+    except UnknownFields as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return error_response(e)
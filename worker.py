@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Background job worker for the Restaurant Management System
+
+Usage: python worker.py [--processes N] [--poll-interval SECONDS]
+"""
+
+import argparse
+import multiprocessing
+import signal
+import sys
+
+
+def work(poll_interval):
+    # Each process builds its own app (and Mongo client) after it starts; the
+    # job queue needs none of the web routes, so they are not imported
+    from core import app, job_queue
+    from jobs import run_worker
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+
+    with app.app_context():
+        try:
+            run_worker(job_queue, poll_interval=poll_interval, stop=lambda: bool(stopping))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run background job workers')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"Starting {args.processes} job worker(s)...")
+
+    if args.processes == 1:
+        work(args.poll_interval)
+        sys.exit(0)
+
+    context = multiprocessing.get_context('spawn')
+    workers = [
+        context.Process(target=work, args=(args.poll_interval,))
+        for _ in range(args.processes)
+    ]
+    for process in workers:
+        process.start()
+
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        print("\nStopping workers...")
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.join()
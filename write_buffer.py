@@ -0,0 +1,224 @@
+"""
+Write-behind buffer for low-priority inserts
+
+Documents are collected in-process and written with one unordered
+`insert_many` once `max_size` documents are waiting or `max_delay` seconds
+have passed, instead of one acknowledged `insert_one` per request.
+
+A batch whose insert fails is put back in front of the buffer and retried
+with the next flush, so a database outage delays writes rather than dropping
+them. Documents a retried or replayed batch had already written are
+skipped, and `on_flush` only gets the documents each insert actually added.
+
+Durability modes:
+    memory  - buffered in memory only; everything not yet written, including
+              batches waiting to be retried, is lost if the process dies
+    journal - each document is appended to a local journal file first and
+              replayed by the flusher thread on the next start if the process
+              dies before flushing; a batch's journal is only removed once it
+              has been written
+    sync    - no buffering; every document is inserted immediately
+"""
+
+import atexit
+import glob
+import os
+import threading
+import time
+import uuid
+
+from bson import json_util
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+
+def process_alive(pid):
+    """Whether a process other than this one is running with `pid`"""
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def journal_owner_alive(path):
+    """Whether another live process owns a journal named <name>-<pid>.jsonl[...]"""
+    return process_alive(int(os.path.basename(path).split('.')[0].rsplit('-', 1)[1]))
+
+
+def journal_claimable(path):
+    """Whether a journal can be taken over for replay by this process
+
+    Journals being replayed are named <journal>.replaying-<pid>-<token>; those
+    of live processes are theirs, and those of processes that died while
+    replaying are claimable again. Our own are only left if unreadable.
+    """
+    if '.replaying-' in path:
+        claimer = int(path.rsplit('.replaying-', 1)[1].split('-')[0])
+        return claimer != os.getpid() and not process_alive(claimer)
+    return not journal_owner_alive(path)
+
+
+class WriteBehindBuffer:
+    def __init__(self, collection, max_size=100, max_delay=1.0, mode='memory',
+                 journal_dir=None, on_flush=None):
+        self.collection = collection
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.mode = mode
+        self.journal_dir = journal_dir
+        self.on_flush = on_flush
+        self.stats = {'buffered': 0, 'batches': 0, 'written': 0, 'errors': 0}
+
+        self._pending = []
+        self._journal = None
+        self._unwritten = []  # journals of batches waiting to be retried
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+        if mode == 'journal':
+            os.makedirs(journal_dir, exist_ok=True)
+            # Journals left by dead processes are replayed by the flusher, so an
+            # unreachable database cannot stop the app from starting
+            self._ensure_thread()
+
+        atexit.register(self.close)
+
+    def insert(self, document):
+        if self.mode == 'sync':
+            self.collection.insert_one(document)
+            self._flushed([document])
+            return
+
+        with self._condition:
+            self._ensure_thread()
+            if self.mode == 'journal':
+                self._journal_file().write(json_util.dumps(document) + '\n')
+                self._journal.flush()
+            self._pending.append(document)
+            self.stats['buffered'] += 1
+            if len(self._pending) >= self.max_size:
+                self._condition.notify()
+
+    def flush(self):
+        with self._condition:
+            batch, self._pending = self._pending, []
+            journal = self._rotate_journal()
+            if journal:
+                self._unwritten.append(journal)
+            journals, self._unwritten = self._unwritten, []
+
+        if batch:
+            try:
+                self._write(batch)
+            except Exception:
+                self.stats['errors'] += 1
+                # Retried with the next flush, ahead of anything buffered since
+                with self._condition:
+                    self._pending[:0] = batch
+                    self._unwritten[:0] = journals
+                raise
+        for journal in journals:
+            os.remove(journal)
+
+    def close(self):
+        self.flush()
+
+    def replay(self):
+        """Insert documents left in journals by processes that died before flushing"""
+        # Includes batches whose flush failed; duplicates are skipped on insert
+        pattern = os.path.join(self.journal_dir, f'{self.collection.name}-*.jsonl*')
+        for path in glob.glob(pattern):
+            if not journal_claimable(path):
+                continue
+            journal_path = path.split('.replaying-')[0]
+            claimed = f'{journal_path}.replaying-{os.getpid()}-{uuid.uuid4().hex}'
+            try:
+                os.rename(path, claimed)  # another process may have claimed it first
+            except FileNotFoundError:
+                continue
+
+            try:
+                with open(claimed) as journal:
+                    documents = [json_util.loads(line) for line in journal if line.strip()]
+                if documents:
+                    self._write(documents)
+            except Exception:
+                os.rename(claimed, journal_path)  # left for the next attempt
+                raise
+            os.remove(claimed)
+
+    def _ensure_thread(self):
+        # Started lazily (and restarted after fork) so every worker process gets its own flusher
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._pending = []
+            self._journal = None
+            self._unwritten = []
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        replayed = self.mode != 'journal'
+        while True:
+            if not replayed:
+                try:
+                    self.replay()
+                    replayed = True
+                except Exception:
+                    self.stats['errors'] += 1  # tried again on the next round
+            with self._condition:
+                deadline = time.monotonic() + self.max_delay
+                while len(self._pending) < self.max_size and time.monotonic() < deadline:
+                    self._condition.wait(timeout=deadline - time.monotonic())
+            try:
+                self.flush()
+            except Exception:
+                # Counted by flush; wait before retrying rather than hammering the database
+                time.sleep(self.max_delay)
+
+    def _write(self, documents):
+        failure = None
+        try:
+            self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Replayed or retried documents may already be in the collection;
+            # only those inserted now are handed to on_flush
+            errors = e.details['writeErrors']
+            skipped = {error['index'] for error in errors}
+            documents = [doc for index, doc in enumerate(documents) if index not in skipped]
+            if any(error['code'] != DUPLICATE_KEY for error in errors):
+                failure = e
+        self.stats['written'] += len(documents)
+        if documents:
+            self._flushed(documents)
+        if failure:
+            raise failure
+        self.stats['batches'] += 1
+
+    def _flushed(self, documents):
+        if self.on_flush:
+            self.on_flush(documents)
+
+    def _journal_file(self):
+        if self._journal is None:
+            path = os.path.join(self.journal_dir, f'{self.collection.name}-{os.getpid()}.jsonl')
+            self._journal = open(path, 'a')
+        return self._journal
+
+    def _rotate_journal(self):
+        # Called with the lock held: the current journal now belongs to the batch being flushed
+        if self._journal is None:
+            return None
+        path = self._journal.name
+        self._journal.close()
+        self._journal = None
+        flushing = f'{path}.flushing-{uuid.uuid4().hex}'
+        os.rename(path, flushing)
+        return flushing